@@ -14,5 +14,34 @@ CORS_ORIGINS = [
     if origin.strip()
 ]
 
+# Notification retention: read notifications expire after this many days,
+# unread ones are moved to the per-user archive after this many days
+NOTIFICATION_READ_TTL_DAYS = int(os.getenv("NOTIFICATION_READ_TTL_DAYS", "30"))
+NOTIFICATION_ARCHIVE_AFTER_DAYS = int(os.getenv("NOTIFICATION_ARCHIVE_AFTER_DAYS", "90"))
+
+# Event bus backend: "local" (this process only) or "mongo" (shared between workers)
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "local")
+
+# MongoDB commands one request may send before it is logged as a likely N+1
+MONGO_COMMAND_BUDGET = int(os.getenv("MONGO_COMMAND_BUDGET", "25"))
+
+# Queries slower than this are recorded in `slow_queries` with an explain plan,
+# which is captured at most once per shape per interval
+SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "600"))
+
+# Shared secret for the /admin endpoints (sent as X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
 # Export for use in other modules
-__all__ = ["FRONTEND_URL", "CORS_ORIGINS"]
+__all__ = [
+    "FRONTEND_URL",
+    "CORS_ORIGINS",
+    "NOTIFICATION_READ_TTL_DAYS",
+    "NOTIFICATION_ARCHIVE_AFTER_DAYS",
+    "EVENT_BUS_BACKEND",
+    "MONGO_COMMAND_BUDGET",
+    "SLOW_QUERY_MS",
+    "SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS",
+    "ADMIN_TOKEN",
+]
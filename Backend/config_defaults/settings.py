@@ -3,6 +3,28 @@
 Preferred import point for backend configuration. Uses pydantic BaseSettings
 (with pydantic v1 or pydantic-settings for v2) to load environment-backed
 settings. Keeps defaults in code while allowing overrides via .env/.env.local.
+
+The `mongo_*` settings tune the MongoDB client per deployment (environment
+variables are the upper-cased names, e.g. MONGO_MAX_POOL_SIZE):
+
+- Pool: `mongo_max_pool_size` connections at most per process, of which
+  `mongo_min_pool_size` are opened at startup and kept open. Idle
+  connections close after `mongo_max_idle_time_ms`. Requests wait at most
+  `mongo_wait_queue_timeout_ms` for a free connection.
+- Timeouts: `mongo_connect_timeout_ms`, `mongo_server_selection_timeout_ms`
+  and `mongo_socket_timeout_ms` (per operation on the wire). Leave the socket
+  timeout unset or above the slowest maintenance job.
+- `mongo_compressors`: comma-separated wire compressors in order of
+  preference. zstd needs the `zstandard` package and snappy `python-snappy`;
+  unavailable ones are skipped.
+- `mongo_retry_reads` / `mongo_retry_writes`: retry once on network errors
+  and primary failovers.
+- `mongo_secondary_reads`: on replica sets, serve reads that tolerate
+  slightly stale data from secondaries, unless a secondary lags the primary
+  by more than `mongo_max_staleness_seconds` (at least 90, or -1 for no
+  limit; lower values are raised to 90 at connect).
+
+Leaving an optional value unset keeps the driver default.
 """
 from typing import Optional
 
@@ -34,6 +56,20 @@ if PYDANTIC_V2:
             firebase_storage_bucket: str = ""
             firebase_credentials_path: Optional[str] = None
 
+            # MongoDB client tuning (see database/connection.py)
+            mongo_max_pool_size: int = 100
+            mongo_min_pool_size: int = 5
+            mongo_max_idle_time_ms: Optional[int] = None
+            mongo_wait_queue_timeout_ms: Optional[int] = None
+            mongo_connect_timeout_ms: int = 10000
+            mongo_server_selection_timeout_ms: int = 10000
+            mongo_socket_timeout_ms: Optional[int] = None
+            mongo_compressors: str = "zstd,zlib"
+            mongo_retry_reads: bool = True
+            mongo_retry_writes: bool = True
+            mongo_secondary_reads: bool = True
+            mongo_max_staleness_seconds: int = 90
+
             model_config = ConfigDict(
                 env_file=[".env.local", ".env"],
                 extra="ignore",
@@ -48,6 +84,20 @@ if PYDANTIC_V2:
             firebase_storage_bucket: str = ""
             firebase_credentials_path: Optional[str] = None
 
+            # MongoDB client tuning (see database/connection.py)
+            mongo_max_pool_size: int = 100
+            mongo_min_pool_size: int = 5
+            mongo_max_idle_time_ms: Optional[int] = None
+            mongo_wait_queue_timeout_ms: Optional[int] = None
+            mongo_connect_timeout_ms: int = 10000
+            mongo_server_selection_timeout_ms: int = 10000
+            mongo_socket_timeout_ms: Optional[int] = None
+            mongo_compressors: str = "zstd,zlib"
+            mongo_retry_reads: bool = True
+            mongo_retry_writes: bool = True
+            mongo_secondary_reads: bool = True
+            mongo_max_staleness_seconds: int = 90
+
             class Config:
                 env_file = [".env.local", ".env"]
                 extra = "ignore"
@@ -61,6 +111,20 @@ else:
         firebase_storage_bucket: str = ""
         firebase_credentials_path: Optional[str] = None
 
+        # MongoDB client tuning (see database/connection.py)
+        mongo_max_pool_size: int = 100
+        mongo_min_pool_size: int = 5
+        mongo_max_idle_time_ms: Optional[int] = None
+        mongo_wait_queue_timeout_ms: Optional[int] = None
+        mongo_connect_timeout_ms: int = 10000
+        mongo_server_selection_timeout_ms: int = 10000
+        mongo_socket_timeout_ms: Optional[int] = None
+        mongo_compressors: str = "zstd,zlib"
+        mongo_retry_reads: bool = True
+        mongo_retry_writes: bool = True
+        mongo_secondary_reads: bool = True
+        mongo_max_staleness_seconds: int = 90
+
         class Config:
             env_file = [".env.local", ".env"]
             extra = "ignore"
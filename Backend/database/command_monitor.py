@@ -0,0 +1,117 @@
+"""Per-request accounting of MongoDB commands.
+
+`CommandStats` is registered as a pymongo command listener when the client
+is created. Every command that finishes while a `track_commands()` block is
+active is added to that block's `RequestCommands`:
+
+- commands: number of commands sent (each getMore of a cursor counts)
+- duration_ms: total time the server round trips took
+- by_command: counts per "<command> <collection>", e.g. "find users"
+
+The active block is kept in a contextvar. Motor runs the driver in executor
+threads with a copy of the caller's context, so commands are attributed to
+the request that awaited them. The HTTP middleware in main.py wraps every
+request in a block, reports the totals in a `Server-Timing` header and logs
+requests that send more than MONGO_COMMAND_BUDGET commands, which is what
+an N+1 loop looks like. Tests can use the same block to pin query counts:
+
+    with track_commands() as commands:
+        await list_items()
+    assert commands.commands <= 2
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+from pymongo import monitoring
+
+
+Route = Union[str, Callable[[], Optional[str]], None]
+
+
+class RequestCommands:
+    """Commands one request sent; driver threads update it concurrently."""
+
+    def __init__(self, route: Route = None):
+        self._lock = threading.Lock()
+        self._route = route
+        self.commands = 0
+        self.duration_ms = 0.0
+        self.by_command: Dict[str, int] = {}
+
+    @property
+    def route(self) -> Optional[str]:
+        """Route the commands serve, e.g. "GET /items/{item_id}".
+
+        A callable is resolved on each access, since a request's route is
+        only known once it has been routed.
+        """
+        return self._route() if callable(self._route) else self._route
+
+    def record(self, name: str, duration_micros: int) -> None:
+        with self._lock:
+            self.commands += 1
+            self.duration_ms += duration_micros / 1000
+            self.by_command[name] = self.by_command.get(name, 0) + 1
+
+    def top_commands(self, limit: int = 5) -> str:
+        """The most frequent commands, e.g. "find users x12, aggregate items x1"."""
+        with self._lock:
+            ranked = sorted(self.by_command.items(), key=lambda kv: kv[1], reverse=True)
+        return ", ".join(f"{name} x{count}" for name, count in ranked[:limit])
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value for these commands."""
+        return f'db;dur={self.duration_ms:.1f};desc="{self.commands} MongoDB commands"'
+
+
+_current: ContextVar[Optional[RequestCommands]] = ContextVar("mongo_request_commands", default=None)
+
+
+def current_commands() -> Optional[RequestCommands]:
+    """The block commands are currently attributed to, if any."""
+    return _current.get()
+
+
+@contextmanager
+def track_commands(route: Route = None) -> Iterator[RequestCommands]:
+    """Attribute the commands sent inside the block to a new RequestCommands."""
+    commands = RequestCommands(route)
+    token = _current.set(commands)
+    try:
+        yield commands
+    finally:
+        _current.reset(token)
+
+
+class CommandStats(monitoring.CommandListener):
+    """Adds each finished command to the active RequestCommands."""
+
+    def __init__(self):
+        # Collection per in-flight command; only started events carry it
+        self._collections: Dict[Any, str] = {}
+
+    def started(self, event) -> None:
+        if _current.get() is None:
+            return
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        if isinstance(target, str):
+            self._collections[event.request_id] = target
+
+    def _record(self, event) -> None:
+        collection = self._collections.pop(event.request_id, None)
+        commands = _current.get()
+        if commands is None:
+            return
+        name = f"{event.command_name} {collection}" if collection else event.command_name
+        commands.record(name, event.duration_micros)
+
+    def succeeded(self, event) -> None:
+        self._record(event)
+
+    def failed(self, event) -> None:
+        self._record(event)
@@ -2,16 +2,124 @@
 
 This module provides MongoDB connection management with support for
 local and production environments via environment variables.
+
+Read routing:
+    get_db()                  Primary. Use for writes and for reads that must
+                              reflect the latest writes (credits, swap state,
+                              uniqueness checks).
+    get_db(stale_reads=True)  secondaryPreferred, bounded by
+                              mongo_max_staleness_seconds, on replica sets.
+                              Use for anonymous browsing and other reads that
+                              tolerate data a few seconds old. Elsewhere it is
+                              the primary handle. Users reading their own
+                              data (e.g. right after editing it) read the
+                              primary, as a secondary may not have the edit.
 """
 
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+import asyncio
+import importlib.util
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from pymongo.errors import PyMongoError
+from pymongo.read_preferences import SecondaryPreferred
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
 
 from config_defaults.settings import settings
+from database.command_monitor import CommandStats
+from database.pool_monitor import PoolStats
+from database.slow_query_monitor import SlowQueryListener
 
 
 _db_client: Optional[AsyncIOMotorClient] = None
 _database = None
+# Same database routed to secondaries (see get_db); the primary elsewhere
+_stale_read_database = None
+
+# Deployment topology detected at connect time: "replica_set", "sharded",
+# "standalone" or "unknown". Multi-document transactions need a replica set
+# or sharded cluster, so the capability is probed once instead of per call.
+_topology: str = "unknown"
+_transactions_supported: bool = False
+
+# Retry policy for transient transaction failures (write conflicts,
+# primary step-downs, commits with unknown outcome)
+TRANSACTION_MAX_ATTEMPTS = 5
+TRANSACTION_BACKOFF_SECONDS = 0.05
+
+# Smallest maxStalenessSeconds the driver accepts for secondary reads
+MIN_MAX_STALENESS_SECONDS = 90
+
+# Module each wire compressor needs (zlib ships with Python)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+# Pool events of the current client (see get_pool_stats)
+pool_stats = PoolStats()
+
+# Per-request command accounting (see database/command_monitor.py)
+command_stats = CommandStats()
+
+# Slow query detection; recording starts with services.slow_query_service.start()
+slow_query_listener = SlowQueryListener()
+
+T = TypeVar("T")
+
+
+def _available_compressors(names: str) -> List[str]:
+    """Keep the configured compressors whose Python package is installed."""
+    compressors = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        module = COMPRESSOR_MODULES.get(name)
+        if module is None:
+            print(f"WARNING: Unknown MongoDB compressor '{name}' ignored")
+        elif importlib.util.find_spec(module) is None:
+            print(f"WARNING: MongoDB {name} compression needs the '{module}' package; skipped")
+        else:
+            compressors.append(name)
+    return compressors
+
+
+def _client_options() -> Dict[str, Any]:
+    """Motor client options from the `mongo_*` settings.
+
+    Optional settings left unset are omitted so the driver default applies.
+    """
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "retryReads": settings.mongo_retry_reads,
+        "retryWrites": settings.mongo_retry_writes,
+        "event_listeners": [pool_stats, command_stats, slow_query_listener],
+    }
+    for option, value in (
+        ("maxIdleTimeMS", settings.mongo_max_idle_time_ms),
+        ("waitQueueTimeoutMS", settings.mongo_wait_queue_timeout_ms),
+        ("socketTimeoutMS", settings.mongo_socket_timeout_ms),
+    ):
+        if value is not None:
+            options[option] = value
+    compressors = _available_compressors(settings.mongo_compressors)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+async def _warm_pool():
+    """Open `mongo_min_pool_size` connections now instead of on first requests.
+
+    The driver fills the pool up to minPoolSize in the background; running
+    that many pings at once makes the first burst of requests find the
+    connections already established.
+    """
+    size = min(settings.mongo_min_pool_size, settings.mongo_max_pool_size)
+    if size <= 1:
+        return
+    try:
+        await asyncio.gather(*(_db_client.admin.command("ping") for _ in range(size)))
+    except PyMongoError as e:
+        print(f"WARNING: Connection pool warm-up failed: {e}")
 
 
 async def connect_db():
@@ -28,11 +136,9 @@ async def connect_db():
     # Use the same database name from settings
     fallback_uri = f"mongodb://mongo:27017/{settings.database_name}"
     
-    # Build connection options
-    client_options = {
-        "serverSelectionTimeoutMS": 10000,  # Reduced timeout for faster fallback
-        "connectTimeoutMS": 10000,
-    }
+    # Build connection options (pool, timeouts, compression, retries)
+    client_options = _client_options()
+    pool_stats.reset()
     
     # For mongodb+srv, TLS is handled automatically by the connection string
     # For regular mongodb://, we might need to add TLS options
@@ -51,6 +157,9 @@ async def connect_db():
         # Test the connection
         await _db_client.admin.command("ping")
         print(f"✓ MongoDB connected successfully to primary database: {settings.database_name}")
+        await _detect_transaction_support()
+        _configure_read_routing()
+        await _warm_pool()
         return
     except Exception as e:
         print(f"✗ Primary MongoDB connection failed: {str(e)}")
@@ -65,14 +174,21 @@ async def connect_db():
                 
                 # Try local MongoDB with shorter timeout
                 fallback_options = {
+                    **client_options,
                     "serverSelectionTimeoutMS": 5000,
                     "connectTimeoutMS": 5000,
                 }
+                fallback_options.pop("tls", None)
+                fallback_options.pop("tlsAllowInvalidCertificates", None)
+                pool_stats.reset()
                 _db_client = AsyncIOMotorClient(fallback_uri, **fallback_options)
                 _database = _db_client[settings.database_name]
                 # Test the connection
                 await _db_client.admin.command("ping")
                 print(f"✓ MongoDB connected successfully to local fallback database: {settings.database_name}")
+                await _detect_transaction_support()
+                _configure_read_routing()
+                await _warm_pool()
                 return
             except Exception as fallback_error:
                 print(f"✗ Local MongoDB fallback also failed: {str(fallback_error)}")
@@ -86,18 +202,175 @@ async def connect_db():
     raise RuntimeError("Failed to connect to MongoDB (both primary and fallback failed)")
 
 
+def _configure_read_routing():
+    """Choose the handle for stale-tolerant reads once the topology is known."""
+    global _stale_read_database
+    if _topology == "replica_set" and settings.mongo_secondary_reads:
+        max_staleness = settings.mongo_max_staleness_seconds
+        # pymongo only rejects a lower value on the first stale read (-1: no limit)
+        if max_staleness != -1 and max_staleness < MIN_MAX_STALENESS_SECONDS:
+            print(
+                f"WARNING: mongo_max_staleness_seconds={max_staleness} is below the "
+                f"minimum of {MIN_MAX_STALENESS_SECONDS}; using {MIN_MAX_STALENESS_SECONDS}"
+            )
+            max_staleness = MIN_MAX_STALENESS_SECONDS
+        _stale_read_database = _database.with_options(
+            read_preference=SecondaryPreferred(max_staleness=max_staleness)
+        )
+    else:
+        _stale_read_database = _database
+
+
+async def _detect_transaction_support():
+    """Probe the deployment topology once and cache transaction support."""
+    global _topology, _transactions_supported
+
+    try:
+        hello = await _db_client.admin.command("hello")
+    except Exception as e:
+        print(f"WARNING: Could not determine MongoDB topology ({str(e)}). Transactions disabled.")
+        _topology = "unknown"
+        _transactions_supported = False
+        return
+
+    if hello.get("setName"):
+        _topology = "replica_set"
+    elif hello.get("msg") == "isdbgrid":
+        _topology = "sharded"
+    else:
+        _topology = "standalone"
+    # Sessions (and therefore transactions) are only advertised when enabled
+    _transactions_supported = _topology != "standalone" and (
+        hello.get("logicalSessionTimeoutMinutes") is not None
+    )
+    print(
+        f"✓ MongoDB topology: {_topology} "
+        f"(transactions {'enabled' if _transactions_supported else 'disabled'})"
+    )
+
+
+def get_topology() -> str:
+    """Return the topology detected at connect time."""
+    return _topology
+
+
+def transactions_supported() -> bool:
+    """Return True if the connected deployment supports multi-document transactions."""
+    return _transactions_supported
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool statistics of this process (see database.pool_monitor)."""
+    return {
+        **pool_stats.snapshot(),
+        "max_pool_size": settings.mongo_max_pool_size,
+        "min_pool_size": settings.mongo_min_pool_size,
+    }
+
+
+async def _backoff(attempt: int):
+    """Sleep with exponential backoff before retrying a transaction."""
+    await asyncio.sleep(TRANSACTION_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+
+
+async def _commit_with_retry(session: AsyncIOMotorClientSession):
+    """Commit the active transaction, retrying commits with an unknown outcome."""
+    for attempt in range(1, TRANSACTION_MAX_ATTEMPTS + 1):
+        try:
+            await session.commit_transaction()
+            return
+        except PyMongoError as e:
+            if (
+                e.has_error_label("UnknownTransactionCommitResult")
+                and attempt < TRANSACTION_MAX_ATTEMPTS
+            ):
+                await _backoff(attempt)
+                continue
+            raise
+
+
+async def run_in_transaction(
+    operation: Callable[[Optional[AsyncIOMotorClientSession]], Awaitable[T]],
+    client: Optional[AsyncIOMotorClient] = None,
+) -> T:
+    """Run `operation(session)` atomically using the strategy chosen at connect time.
+
+    On replica sets and sharded clusters the operation runs inside a
+    transaction; the whole transaction is retried on
+    `TransientTransactionError` and the commit on
+    `UnknownTransactionCommitResult`, with exponential backoff. On
+    standalone deployments the operation is called once with `session=None`,
+    so callers should keep each individual write atomic on its own.
+
+    Args:
+        operation: Coroutine function taking the session (or None)
+        client: Motor client to open the session on (defaults to the connected client)
+
+    Returns:
+        Whatever `operation` returns
+    """
+    client = client if client is not None else _db_client
+    if not _transactions_supported or client is None:
+        return await operation(None)
+
+    async with await client.start_session() as session:
+        for attempt in range(1, TRANSACTION_MAX_ATTEMPTS + 1):
+            session.start_transaction()
+            try:
+                result = await operation(session)
+            except BaseException as e:
+                if session.in_transaction:
+                    await session.abort_transaction()
+                if (
+                    isinstance(e, PyMongoError)
+                    and e.has_error_label("TransientTransactionError")
+                    and attempt < TRANSACTION_MAX_ATTEMPTS
+                ):
+                    await _backoff(attempt)
+                    continue
+                raise
+
+            try:
+                await _commit_with_retry(session)
+            except PyMongoError as e:
+                if (
+                    e.has_error_label("TransientTransactionError")
+                    and attempt < TRANSACTION_MAX_ATTEMPTS
+                ):
+                    await _backoff(attempt)
+                    continue
+                raise
+            return result
+
+    # Unreachable: the last attempt either returns or raises
+    raise RuntimeError("Transaction retry loop exited unexpectedly")
+
+
 async def close_db():
     """Close MongoDB connection."""
-    global _db_client, _database
+    global _db_client, _database, _stale_read_database, _topology, _transactions_supported
     if _db_client:
         _db_client.close()
         _db_client = None
         _database = None
+        _stale_read_database = None
+    _topology = "unknown"
+    _transactions_supported = False
     print("MongoDB connection closed")
 
 
-def get_db():
-    """Get the database instance."""
+def get_db(stale_reads: bool = False):
+    """Get the database instance.
+
+    Args:
+        stale_reads: Route reads to secondaries where possible (see module
+            docstring); only for reads that tolerate slightly old data
+
+    Raises:
+        RuntimeError: If the database is not connected
+    """
     if _database is None:
         raise RuntimeError("Database not connected. Call connect_db() first.")
+    if stale_reads and _stale_read_database is not None:
+        return _stale_read_database
     return _database
@@ -0,0 +1,152 @@
+"""Registry of every MongoDB index the backend relies on.
+
+Each service declares the indexes behind its queries next to those queries
+(`ITEM_INDEXES`, `USER_INDEXES`, ...) and knows how to build them, including
+upgrades such as changing a TTL or removing duplicates that block a unique
+index. This module collects those declarations per collection so that:
+
+- `ensure_indexes` builds all of them at startup (idempotently) and then
+  reports drift between the registry and the live database, and
+- `find_index_drift` can be run on its own to audit a deployment.
+
+Audit a deployment from the Backend directory:
+    python -m database.indexes
+"""
+
+import asyncio
+from typing import Any, Dict, List
+
+from pymongo import IndexModel
+
+from database.connection import get_db
+from services import (
+    credit_service,
+    notification_retention,
+    notification_service,
+    rating_service,
+    reconciliation_service,
+    slow_query_service,
+    storage_service,
+    swap_service,
+    user_service,
+)
+
+
+# Expected indexes per collection (the default `_id_` index is implied)
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "items": storage_service.ITEM_INDEXES,
+    "users": user_service.USER_INDEXES,
+    "swap_requests": swap_service.SWAP_REQUEST_INDEXES,
+    "transactions": credit_service.TRANSACTION_INDEXES,
+    "balance_checkpoints": credit_service.CHECKPOINT_INDEXES,
+    "credit_drift_reports": reconciliation_service.DRIFT_REPORT_INDEXES,
+    "notifications": (
+        notification_service.NOTIFICATION_INDEXES + notification_retention.RETENTION_INDEXES
+    ),
+    "notification_archives": notification_retention.ARCHIVE_INDEXES,
+    "ratings": rating_service.RATING_INDEXES,
+    "slow_queries": slow_query_service.SLOW_QUERY_INDEXES,
+}
+
+# Builders for the indexes above; each one is idempotent
+INDEX_BUILDERS = (
+    storage_service.ensure_item_indexes,
+    swap_service.ensure_swap_request_indexes,
+    credit_service.ensure_credit_indexes,
+    reconciliation_service.ensure_drift_report_indexes,
+    notification_service.ensure_notification_indexes,
+    notification_retention.ensure_retention_indexes,
+    user_service.ensure_user_indexes,
+    rating_service.ensure_rating_indexes,
+    slow_query_service.ensure_slow_query_indexes,
+)
+
+# Index options that change query behaviour and so count as drift
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _index_signature(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Key pattern and behavioural options of an index, comparable across sources."""
+    key = [
+        (field, int(direction) if isinstance(direction, (int, float)) else direction)
+        for field, direction in spec["key"].items()
+    ]
+    options = {
+        option: spec[option] for option in COMPARED_OPTIONS if spec.get(option) not in (None, False)
+    }
+    return {"key": key, **options}
+
+
+async def find_index_drift() -> Dict[str, Dict[str, List[str]]]:
+    """Compare the live indexes with INDEX_REGISTRY.
+
+    Returns:
+        Per collection with drift, the index names that are `missing`,
+        `changed` (different keys or options) or `unexpected` (not in the
+        registry). Collections without drift are left out.
+    """
+    db = get_db()
+    drift: Dict[str, Dict[str, List[str]]] = {}
+    for collection, models in INDEX_REGISTRY.items():
+        expected = {model.document["name"]: model.document for model in models}
+        existing = {
+            index["name"]: index
+            async for index in db[collection].list_indexes()
+            if index["name"] != "_id_"
+        }
+        report = {
+            "missing": [name for name in expected if name not in existing],
+            "changed": [
+                name for name in expected
+                if name in existing
+                and _index_signature(expected[name]) != _index_signature(existing[name])
+            ],
+            "unexpected": [name for name in existing if name not in expected],
+        }
+        if any(report.values()):
+            drift[collection] = report
+    return drift
+
+
+async def ensure_indexes() -> Dict[str, Dict[str, List[str]]]:
+    """Build every registered index, then report what still differs.
+
+    A failing builder doesn't block startup or the other builders.
+
+    Returns:
+        The drift left after building (see find_index_drift)
+    """
+    for build in INDEX_BUILDERS:
+        try:
+            await build()
+        except Exception as e:
+            print(f"WARNING: {build.__name__} failed: {e}")
+
+    drift = await find_index_drift()
+    for collection, report in drift.items():
+        details = ", ".join(
+            f"{kind}: {', '.join(names)}" for kind, names in report.items() if names
+        )
+        print(f"WARNING: index drift on {collection} ({details})")
+    return drift
+
+
+async def _main():
+    """Connect and print the drift between the registry and the database."""
+    from database.connection import connect_db, close_db
+
+    await connect_db()
+    try:
+        drift = await find_index_drift()
+        if not drift:
+            print("All indexes match the registry")
+        for collection, report in drift.items():
+            for kind, names in report.items():
+                for name in names:
+                    print(f"{collection}: {kind} {name}")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,107 @@
+"""Connection pool statistics for the MongoDB client.
+
+`PoolStats` is registered as a pymongo connection pool listener when the
+client is created and keeps running counters that `snapshot()` reports:
+
+- open_connections / checked_out / idle: pool occupancy right now
+- wait_queue_length: operations currently waiting for a connection
+- checkouts / checkout_failures: totals since startup (failures include
+  wait queue timeouts)
+- avg_wait_ms / max_wait_ms: time operations spent getting a connection
+
+If `checked_out` sits at the pool size or the wait queue is rarely empty,
+the pool is too small for the request concurrency of this worker.
+"""
+
+import threading
+from typing import Any, Dict
+
+from pymongo import monitoring
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counts pool events; driver threads call it concurrently."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero every counter (e.g. when a new client is created)."""
+        with self._lock:
+            self._open = 0
+            self._checked_out = 0
+            self._waiting = 0
+            self._checkouts = 0
+            self._failures = 0
+            self._pool_clears = 0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+
+    def _record_wait(self, event) -> None:
+        # `duration` (seconds) is reported by pymongo 4.7 and later
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            self._wait_total += duration
+            self._wait_max = max(self._wait_max, duration)
+
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self._open += 1
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self._open = max(0, self._open - 1)
+
+    def connection_check_out_started(self, event) -> None:
+        with self._lock:
+            self._waiting += 1
+
+    def connection_checked_out(self, event) -> None:
+        with self._lock:
+            self._waiting = max(0, self._waiting - 1)
+            self._checked_out += 1
+            self._checkouts += 1
+            self._record_wait(event)
+
+    def connection_check_out_failed(self, event) -> None:
+        with self._lock:
+            self._waiting = max(0, self._waiting - 1)
+            self._failures += 1
+            self._record_wait(event)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self._checked_out = max(0, self._checked_out - 1)
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self._pool_clears += 1
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current occupancy and cumulative checkout statistics."""
+        with self._lock:
+            attempts = self._checkouts + self._failures
+            return {
+                "open_connections": self._open,
+                "checked_out": self._checked_out,
+                "idle": max(0, self._open - self._checked_out),
+                "wait_queue_length": self._waiting,
+                "checkouts": self._checkouts,
+                "checkout_failures": self._failures,
+                "pool_clears": self._pool_clears,
+                "avg_wait_ms": round(self._wait_total / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+            }
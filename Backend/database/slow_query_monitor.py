@@ -0,0 +1,180 @@
+"""Detection of slow MongoDB queries.
+
+`SlowQueryListener` is registered as a pymongo command listener when the
+client is created. While a sink is attached (see services/slow_query_service),
+every find, aggregate, update or findAndModify that takes longer than
+SLOW_QUERY_MS is handed to it as a record:
+
+    {"command", "collection", "database", "shape", "shape_key",
+     "duration_ms", "failed", "route", "at", "command_doc"}
+
+`shape` is the query with every value replaced by "?" (field names,
+operators and, in aggregation expressions, `$field` references are kept;
+sort specs are kept as they are), so queries that differ only in
+their values share a `shape_key` and no user data is stored. `command_doc`
+is the original command, kept for explaining it; it isn't meant to be saved.
+
+The sink is called from driver threads and must not block.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from config_defaults.constants import SLOW_QUERY_MS
+from database.command_monitor import current_commands
+
+
+# Commands that are recorded when slow, with the fields that make up their shape
+SLOW_QUERY_COMMANDS = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "update": ("updates",),
+    "findAndModify": ("query", "sort", "update"),
+}
+
+# Keys whose values are structure rather than data
+STRUCTURAL_KEYS = {"sort"}
+
+Record = Dict[str, Any]
+
+
+def redact(value: Any, expressions: bool = False) -> Any:
+    """Replace the values in a query with "?" and keep its structure.
+
+    Lists of plain values (e.g. an `$in` list) collapse to ["?"] so their
+    length doesn't create new shapes. Strings starting with "$" are kept
+    only where they are field paths, i.e. inside aggregation expressions
+    (`expressions=True`, pipeline stages and `$expr`); in a filter they are
+    values like any other.
+    """
+    if isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            if key == "$match":
+                redacted[key] = redact(item, expressions=False)
+            elif key == "$expr":
+                redacted[key] = redact(item, expressions=True)
+            else:
+                redacted[key] = redact(item, expressions)
+        return redacted
+    if isinstance(value, (list, tuple)):
+        if any(
+            isinstance(item, (dict, list, tuple))
+            or (expressions and isinstance(item, str) and item.startswith("$"))
+            for item in value
+        ):
+            # Documents, or the arguments of an expression operator
+            return [redact(item, expressions) for item in value]
+        return ["?"] if value else []
+    if expressions and isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def _redact_projection(projection: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep inclusion flags of a projection and redact anything else ($elemMatch, $slice...)."""
+    return {
+        field: spec if isinstance(spec, (bool, int)) else redact(spec)
+        for field, spec in projection.items()
+    }
+
+
+def _redact_update(update: Any) -> Any:
+    """Redact an update document, or an update pipeline (a list of stages)."""
+    if isinstance(update, list):
+        return redact(update, expressions=True)
+    return redact(update)
+
+
+def query_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """Redacted shape of a command (see SLOW_QUERY_COMMANDS)."""
+    shape: Dict[str, Any] = {}
+    for field in SLOW_QUERY_COMMANDS[command_name]:
+        if field not in command:
+            continue
+        value = command[field]
+        if field in STRUCTURAL_KEYS:
+            shape[field] = value
+        elif field == "projection":
+            shape[field] = _redact_projection(value)
+        elif field == "pipeline":
+            shape[field] = redact(value, expressions=True)
+        elif field == "update":
+            shape[field] = _redact_update(value)
+        elif field == "updates":
+            # Statements of one update command share a shape in practice
+            shape[field] = [
+                {"q": redact(u.get("q", {})), "u": _redact_update(u.get("u", {}))}
+                for u in value[:1]
+            ]
+        else:
+            shape[field] = redact(value)
+    return shape
+
+
+def shape_key(command_name: str, collection: str, shape: Dict[str, Any]) -> str:
+    """Stable identifier of a query shape on a collection."""
+    canonical = json.dumps([command_name, collection, shape], sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Hands commands slower than the threshold to the attached sink."""
+
+    def __init__(self, threshold_ms: int = SLOW_QUERY_MS):
+        self.threshold_ms = threshold_ms
+        self._sink: Optional[Callable[[Record], None]] = None
+        # Command, database and route of each in-flight command, by connection and request id
+        self._pending: Dict[Tuple[Any, int], Tuple[Dict[str, Any], str, Optional[str]]] = {}
+
+    def attach(self, sink: Callable[[Record], None]) -> None:
+        self._sink = sink
+
+    def detach(self) -> None:
+        self._sink = None
+        self._pending.clear()
+
+    def started(self, event) -> None:
+        if self._sink is None or event.command_name not in SLOW_QUERY_COMMANDS:
+            return
+        commands = current_commands()
+        self._pending[(event.connection_id, event.request_id)] = (
+            dict(event.command),
+            event.database_name,
+            commands.route if commands else None,
+        )
+
+    def _finish(self, event, failed: bool) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        sink = self._sink
+        if pending is None or sink is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        command, database, route = pending
+        name = event.command_name
+        collection = str(command.get(name, ""))
+        shape = query_shape(name, command)
+        sink({
+            "command": name,
+            "collection": collection,
+            "database": database,
+            "shape": shape,
+            "shape_key": shape_key(name, collection, shape),
+            "duration_ms": round(duration_ms, 3),
+            "failed": failed,
+            "route": route,
+            "at": datetime.utcnow(),
+            "command_doc": command,
+        })
+
+    def succeeded(self, event) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._finish(event, failed=True)
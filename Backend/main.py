@@ -4,6 +4,7 @@ Mounts static files and includes the items router. Uses the database
 connection helpers in `Backend/database/connection.py`.
 """
 
+import asyncio
 from pathlib import Path
 from fastapi import FastAPI, Request, status
 from fastapi.staticfiles import StaticFiles
@@ -13,8 +14,25 @@ from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from contextlib import asynccontextmanager
 
-from database.connection import connect_db, close_db
-from config_defaults.constants import CORS_ORIGINS
+from database import indexes
+from database.connection import (
+    close_db,
+    connect_db,
+    get_pool_stats,
+    get_topology,
+    transactions_supported,
+)
+from config_defaults.constants import CORS_ORIGINS, MONGO_COMMAND_BUDGET
+from database.command_monitor import track_commands
+from services import (
+    event_bus,
+    notification_outbox,
+    notification_retention,
+    notification_service,
+    slow_query_service,
+    swap_service,
+    user_service,
+)
 from routes.item_routes import router as items_router
 from routes.auth_routes import router as auth_router
 from routes.user_routes import router as users_router
@@ -24,16 +42,74 @@ from routes.rating_routes import router as ratings_router
 from routes.contact_routes import router as contact_router
 from routes.credit_routes import router as credits_router
 from routes.report_routes import router as reports_router
+from routes.admin_routes import router as admin_router
+
+
+async def _run_backfills():
+    """Run idempotent data backfills in the background after startup."""
+    try:
+        updated = await swap_service.backfill_swap_request_owners()
+        if updated:
+            print(f"Backfilled owner_id on {updated} swap request(s)")
+    except Exception as e:
+        print(f"WARNING: swap request owner backfill failed: {e}")
+    try:
+        updated = await swap_service.sync_pending_request_counts(missing_only=True)
+        if updated:
+            print(f"Backfilled pending_requests on {updated} item(s)")
+    except Exception as e:
+        print(f"WARNING: pending request counter backfill failed: {e}")
+    try:
+        updated = await notification_service.backfill_notification_updated_at()
+        if updated:
+            print(f"Backfilled updated_at on {updated} notification(s)")
+    except Exception as e:
+        print(f"WARNING: notification updated_at backfill failed: {e}")
+    try:
+        updated = await user_service.backfill_user_search_fields()
+        if updated:
+            print(f"Backfilled search fields on {updated} user(s)")
+    except Exception as e:
+        print(f"WARNING: user search field backfill failed: {e}")
+    try:
+        updated = await notification_retention.backfill_notification_read_dates()
+        if updated:
+            print(f"Backfilled read_date on {updated} notification(s)")
+        summary = await notification_retention.compact_notifications()
+        if summary["archived"]:
+            print(f"Archived {summary['archived']} old unread notification(s)")
+    except Exception as e:
+        print(f"WARNING: notification retention failed: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
     await connect_db()
+    # Build every registered index and report drift; failures don't block startup
+    try:
+        await indexes.ensure_indexes()
+    except Exception as e:
+        print(f"WARNING: index bootstrap failed: {e}")
+    try:
+        await event_bus.start()
+    except Exception as e:
+        # Events still reach subscribers in this process
+        print(f"WARNING: event bus backend failed to start: {e}")
+    # Record slow queries with their explain plans
+    slow_query_service.start()
+    # Backfill denormalized fields on older documents without delaying startup
+    backfill_task = asyncio.create_task(_run_backfills())
+    # Deliver notifications off the request path
+    outbox_worker = notification_outbox.start_worker()
     try:
         yield
     finally:
         # shutdown
+        backfill_task.cancel()
+        await notification_outbox.stop_worker(outbox_worker)
+        await slow_query_service.stop()
+        await event_bus.stop()
         await close_db()
 
 
@@ -157,6 +233,27 @@ class OptionsMiddleware(BaseHTTPMiddleware):
             raise
 
 
+def _route_template(request: Request) -> str:
+    """The path template of the route a request matched, e.g. "GET /items/{item_id}"."""
+    route = request.scope.get("route")
+    return f"{request.method} {getattr(route, 'path', request.url.path)}"
+
+
+# Counts the MongoDB commands each request sends (see database/command_monitor.py)
+class CommandBudgetMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        with track_commands(lambda: _route_template(request)) as commands:
+            response = await call_next(request)
+        response.headers["Server-Timing"] = commands.server_timing()
+        if commands.commands > MONGO_COMMAND_BUDGET:
+            print(
+                f"WARNING: {request.method} {request.url.path} sent {commands.commands} MongoDB "
+                f"commands (budget {MONGO_COMMAND_BUDGET}, {commands.duration_ms:.1f} ms): "
+                f"{commands.top_commands()}"
+            )
+        return response
+
+
 # Add FastAPI CORS middleware first (will execute last due to reverse order)
 app.add_middleware(
     CORSMiddleware,
@@ -167,6 +264,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Inside OptionsMiddleware so preflight requests aren't counted
+app.add_middleware(CommandBudgetMiddleware)
+
 # Add custom OPTIONS middleware LAST (will execute FIRST due to reverse order)
 # This ensures OPTIONS requests are intercepted before they reach route handlers
 app.add_middleware(OptionsMiddleware)
@@ -347,6 +447,8 @@ app.include_router(contact_router)
 app.include_router(credits_router)
 # include reports router
 app.include_router(reports_router)
+# include admin router
+app.include_router(admin_router)
 
 # Debug: Print all registered routes on startup
 print("\n" + "=" * 80)
@@ -365,3 +467,13 @@ print("=" * 80 + "\n")
 @app.get("/")
 async def root():
     return {"message": "SwapCircle Backend running"}
+
+
+@app.get("/health/db")
+async def database_health():
+    """MongoDB topology and this worker's connection pool statistics."""
+    return {
+        "topology": get_topology(),
+        "transactions": transactions_supported(),
+        "pool": get_pool_stats(),
+    }
@@ -37,3 +37,9 @@ class ItemOut(ItemCreate):
     owner_id: Optional[str] = None
     status: str = "available"
     images: List[ImageOut] = []
+
+
+class ItemPage(BaseModel):
+    items: List[ItemOut] = []
+    next_cursor: Optional[str] = None
+    has_more: bool = False
@@ -1,6 +1,16 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import VERSION as PYDANTIC_VERSION, BaseModel, Field
+from typing import Dict, List, Optional
+
+# Maximum number of users in one POST /ratings/stats:batch request
+RATING_STATS_BATCH_LIMIT = 300
+
+# List length bounds are named min_items/max_items in pydantic v1
+_BATCH_BOUNDS = (
+    {"min_length": 1, "max_length": RATING_STATS_BATCH_LIMIT}
+    if PYDANTIC_VERSION.startswith("2")
+    else {"min_items": 1, "max_items": RATING_STATS_BATCH_LIMIT}
+)
 
 
 class RatingCreate(BaseModel):
@@ -24,3 +34,12 @@ class UserRatingStats(BaseModel):
     total_ratings: int = Field(..., ge=0)
     rating_breakdown: Optional[dict] = None  # Optional: {1: count, 2: count, ...}
 
+
+class RatingStatsBatchRequest(BaseModel):
+    """Model for requesting rating statistics for many users at once."""
+    user_ids: List[str] = Field(..., **_BATCH_BOUNDS)
+
+
+class RatingStatsBatchOut(BaseModel):
+    """Model for rating statistics keyed by user ID."""
+    stats: Dict[str, UserRatingStats]
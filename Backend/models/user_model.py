@@ -1,6 +1,8 @@
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
+
+from models.item_model import ItemOut
 
 
 def user_document(
@@ -81,6 +83,29 @@ class UserOut(BaseModel):
     total_ratings: int = 0
 
 
+class PublicUserOut(BaseModel):
+    id: str
+    username: str
+    full_name: Optional[str] = ""
+    bio: Optional[str] = None
+    location: Optional[str] = None
+    profile_pic: Optional[str] = None
+    instagram_handle: Optional[str] = None
+    whatsapp_number: Optional[str] = None
+    facebook_url: Optional[str] = None
+    twitter_handle: Optional[str] = None
+    linkedin_url: Optional[str] = None
+    average_rating: Optional[float] = None
+    total_ratings: int = 0
+
+
+class PublicProfileOut(BaseModel):
+    user: PublicUserOut
+    listings: List[ItemOut] = []
+    item_counts: Dict[str, int] = Field(default_factory=dict)  # Items per status
+    swap_count: int = 0  # Completed (approved) swaps
+
+
 class Login(BaseModel):
     email: EmailStr
     password: str
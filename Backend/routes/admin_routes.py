@@ -0,0 +1,40 @@
+"""Operational endpoints for maintainers.
+
+There are no admin accounts, so these endpoints are guarded by a shared
+secret: requests must send ADMIN_TOKEN in the `X-Admin-Token` header. While
+ADMIN_TOKEN is unset the endpoints don't exist (404).
+"""
+
+import hmac
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from config_defaults.constants import ADMIN_TOKEN
+from services import slow_query_service
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Reject requests without the admin token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=100),
+    hours: Optional[int] = Query(None, ge=1, description="Only count the last N hours"),
+):
+    """Recorded slow query shapes, ranked by total time spent in them."""
+    since = datetime.utcnow() - timedelta(hours=hours) if hours else None
+    try:
+        shapes = await slow_query_service.get_slow_query_shapes(limit=limit, since=since)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load slow queries: {str(e)}")
+    return {"shapes": shapes}
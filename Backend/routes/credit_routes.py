@@ -1,7 +1,11 @@
 """Credit-related routes"""
 
-from fastapi import APIRouter, HTTPException, Depends, Header
-from typing import Optional
+import csv
+import io
+import json
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
 from services import credit_service, auth_service
 from models.transaction_model import TransactionCreate, TransactionOut
 
@@ -30,10 +34,11 @@ def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
 
 @router.get("/balance")
 async def get_balance(user_id: str = Depends(get_current_user_id)):
-    """Get current user's credit balance"""
+    """Get current user's credit balance with a ledger integrity check"""
     try:
-        balance = await credit_service.get_user_balance(user_id)
-        return {"user_id": user_id, "balance": balance}
+        return await credit_service.get_balance_summary(user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error retrieving balance: {str(e)}"
@@ -83,12 +88,62 @@ async def deduct_credits(amount: float, user_id: str = Depends(get_current_user_
 
 
 @router.get("/transactions")
-async def get_user_transactions(user_id: str = Depends(get_current_user_id)):
-    """Get transaction history for current user"""
+async def get_user_transactions(
+    user_id: str = Depends(get_current_user_id),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
+    """Get one page of transaction history for current user (newest first)"""
     try:
-        transactions = await credit_service.get_user_transactions(user_id)
-        return {"user_id": user_id, "transactions": transactions}
+        page = await credit_service.get_user_transactions_page(
+            user_id, limit=limit, cursor=cursor
+        )
+        return {"user_id": user_id, **page}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error retrieving transactions: {str(e)}"
         )
+
+
+# Columns written by the transaction export, in order
+EXPORT_FIELDS = ["id", "created_at", "type", "amount", "description"]
+
+
+async def _export_csv(user_id: str) -> AsyncIterator[str]:
+    """Yield the user's transactions as CSV, one row at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    async for transaction in credit_service.iter_user_transactions(user_id):
+        writer.writerow(transaction)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+async def _export_ndjson(user_id: str) -> AsyncIterator[str]:
+    """Yield the user's transactions as newline-delimited JSON."""
+    async for transaction in credit_service.iter_user_transactions(user_id):
+        row = {field: transaction.get(field) for field in EXPORT_FIELDS}
+        yield json.dumps(row) + "\n"
+
+
+@router.get("/transactions/export")
+async def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Stream the current user's full transaction history as CSV or NDJSON"""
+    if format == "csv":
+        body, media_type = _export_csv(user_id), "text/csv"
+    else:
+        body, media_type = _export_ndjson(user_id), "application/x-ndjson"
+    filename = f"transactions.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -16,23 +16,25 @@ This code follows #cs110-CodeReadability by using clear function names,
 meaningful comments, consistent error messages, and helpful documentation.
 """
 
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
 from uuid import uuid4
+import asyncio
 import json
 import re
 
 # Note: re module removed as it's no longer needed (credits parsing moved to swap_routes)
 
 
-from fastapi import APIRouter, UploadFile, File, Body, HTTPException, status, Request
+from fastapi import APIRouter, UploadFile, File, Body, HTTPException, status, Request, Query
 from pydantic import ValidationError
 
-from models.item_model import ItemCreate, ItemOut, ItemUpdate
+from models.item_model import ItemCreate, ItemOut, ItemPage, ItemUpdate
 from services import storage_service
 from services import image_service, auth_service, credit_service, swap_service
+from services import loader_service
 
-# Note: swap_service is still imported here because get_item() checks for pending requests
+# Note: swap_service is still imported here for the legacy swap endpoints below
 
 
 router = APIRouter(prefix="/items", tags=["items"])
@@ -231,33 +233,111 @@ async def create_item(
     return ItemOut(**stored)
 
 
-@router.get("/", response_model=List[ItemOut])
-async def list_items(owner_id: str = None, status: str = None):
+def _item_summary(item: Optional[dict]) -> Optional[dict]:
+    """Compact item shape (id, title, images) used by the legacy swap views."""
+    if not item:
+        return None
+    return {
+        "id": item.get("id"),
+        "title": item.get("title", "Unknown"),
+        "images": item.get("images", []),
+    }
+
+
+def _split_csv(value: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated query parameter into a list of values."""
+    if not value:
+        return None
+    values = [v.strip() for v in value.split(",") if v.strip()]
+    return values or None
+
+
+def _apply_pending_status(rows: List[dict]) -> None:
+    """Report available items with pending swap requests as 'pending'.
+
+    Uses the denormalized pending request counter on each item, so this costs
+    no extra queries regardless of how many items are listed.
     """
-    List all items with optional filtering.
+    for item in rows:
+        item["status"] = storage_service.effective_status(item)
+
+
+@router.get("/", response_model=Union[ItemPage, List[ItemOut]])
+async def list_items(
+    owner_id: str = None,
+    status: str = None,
+    paginate: bool = True,
+    category: Optional[str] = None,
+    size: Optional[str] = None,
+    condition: Optional[str] = None,
+    location: Optional[str] = None,
+    min_credits: Optional[float] = None,
+    max_credits: Optional[float] = None,
+    q: Optional[str] = Query(None, max_length=100),
+    exclude_owner: Optional[str] = None,
+    sort: str = "newest",
+    limit: int = Query(24, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    """
+    List items with server-side filtering, sorting and cursor pagination.
 
     Query parameters:
     - owner_id: Filter items by owner
-    - status: Filter by status (available, pending, sold)
+    - exclude_owner: Leave out items owned by this user (e.g. the viewer)
+    - status, category, size, condition, location: Filters; each accepts a
+      comma-separated list of values
+    - min_credits / max_credits: Credit price range (inclusive)
+    - q: Case-insensitive search of title, category and brand
+    - sort: newest, oldest, credits-asc, credits-desc, title-asc, title-desc
+    - limit: Page size (1-100, default 24)
+    - cursor: `next_cursor` from the previous page
+    - paginate: Set to false to get the legacy unpaginated list of every
+      matching item (only owner_id and status are honoured in that mode)
 
     Items with pending swap requests will automatically get status 'pending'.
     """
-    rows = await storage_service.list_items(owner_id=owner_id, status=status)
+    if not paginate:
+        rows = await storage_service.list_items(owner_id=owner_id, status=status)
 
-    # Apply status filter
-    if status:
-        rows = [item for item in rows if item.get("status") == status]
+        # Apply status filter
+        if status:
+            rows = [item for item in rows if item.get("status") == status]
 
-    # Update status based on pending swap requests
-    for item in rows:
-        if item.get("status") == "available":
-            pending_requests = await swap_service.get_pending_requests_for_item(
-                item.get("id")
-            )
-            if pending_requests:
-                item["status"] = "pending"
+        _apply_pending_status(rows)
+        return [ItemOut(**r) for r in rows]
 
-    return [ItemOut(**r) for r in rows]
+    if sort not in storage_service.ITEM_SORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort. Expected one of: {', '.join(storage_service.ITEM_SORTS)}",
+        )
+
+    try:
+        page = await storage_service.list_items_page(
+            owner_id=owner_id,
+            exclude_owner_id=exclude_owner,
+            statuses=_split_csv(status),
+            categories=_split_csv(category),
+            sizes=_split_csv(size),
+            conditions=_split_csv(condition),
+            locations=_split_csv(location),
+            min_credits=min_credits,
+            max_credits=max_credits,
+            search=q.strip() if q else None,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    _apply_pending_status(page["items"])
+    return ItemPage(
+        items=[ItemOut(**r) for r in page["items"]],
+        next_cursor=page["next_cursor"],
+        has_more=page["has_more"],
+    )
 
 
 @router.get("/swap-requests", status_code=status.HTTP_200_OK)
@@ -287,56 +367,30 @@ async def get_swap_requests(request: Request):
     # Get requests as requester (requests I made)
     requester_requests = await swap_service.get_requests_for_requester(user_id)
 
-    # Enrich requests with item and user information
-    from services.user_service import get_user_by_id
-
-    enriched_owner_requests = []
-    for req in owner_requests:
-        item = await storage_service.get_item(req.get("item_id"))
-        requester = await get_user_by_id(req.get("requester_id"))
-        enriched_owner_requests.append(
-            {
-                **req,
-                "item": (
-                    {
-                        "id": item.get("id") if item else None,
-                        "title": item.get("title") if item else "Unknown",
-                        "images": item.get("images", []) if item else [],
-                    }
-                    if item
-                    else None
-                ),
-                "requester": (
-                    {
-                        "id": requester.get("id") if requester else None,
-                        "username": (
-                            requester.get("username") if requester else "Unknown"
-                        ),
-                        "full_name": requester.get("full_name") if requester else None,
-                    }
-                    if requester
-                    else None
-                ),
-            }
-        )
+    # Enrich requests with item and user information (one batched query per collection)
+    loaders = loader_service.get_loaders(request)
+    items, requesters = await asyncio.gather(
+        loaders.items.load_many(
+            req.get("item_id") for req in owner_requests + requester_requests
+        ),
+        loaders.users.load_many(req.get("requester_id") for req in owner_requests),
+    )
 
-    enriched_requester_requests = []
-    for req in requester_requests:
-        item = await storage_service.get_item(req.get("item_id"))
-        enriched_requester_requests.append(
-            {
-                **req,
-                "item": (
-                    {
-                        "id": item.get("id") if item else None,
-                        "title": item.get("title") if item else "Unknown",
-                        "images": item.get("images", []) if item else [],
-                    }
-                    if item
-                    else None
-                ),
-            }
-        )
+    enriched_owner_requests = [
+        {
+            **req,
+            "item": _item_summary(items.get(req.get("item_id"))),
+            "requester": loader_service.user_summary(
+                requesters.get(req.get("requester_id"))
+            ),
+        }
+        for req in owner_requests
+    ]
+
+    enriched_requester_requests = [
+        {**req, "item": _item_summary(items.get(req.get("item_id")))}
+        for req in requester_requests
+    ]
 
     return {
         "as_owner": enriched_owner_requests,  # Requests for my items (I need to approve/reject)
@@ -365,14 +419,24 @@ async def get_swap_history(request: Request):
     # Get approved swaps where user is owner or requester
     approved_swaps = await swap_service.get_approved_swaps_for_user(user_id)
 
-    # Enrich swaps with item and user information
-    from services.user_service import get_user_by_id
+    # Enrich swaps with item and user information (one batched query per collection)
+    loaders = loader_service.get_loaders(request)
+    items = await loaders.items.load_many(swap.get("item_id") for swap in approved_swaps)
+    users = await loaders.users.load_many(
+        user_id_
+        for swap in approved_swaps
+        for user_id_ in (
+            swap.get("requester_id"),
+            swap.get("owner_id")
+            or (items.get(swap.get("item_id")) or {}).get("owner_id"),
+        )
+    )
 
     enriched_swaps = []
     for swap in approved_swaps:
-        item = await storage_service.get_item(swap.get("item_id"))
-        requester = await get_user_by_id(swap.get("requester_id"))
-        item_owner = await get_user_by_id(item.get("owner_id")) if item else None
+        item = items.get(swap.get("item_id"))
+        requester = users.get(swap.get("requester_id"))
+        item_owner = users.get(item.get("owner_id")) if item else None
 
         # Determine if user is the seller (owner) or buyer (requester)
         is_seller = item and item.get("owner_id") == user_id
@@ -381,28 +445,8 @@ async def get_swap_history(request: Request):
         enriched_swaps.append(
             {
                 **swap,
-                "item": (
-                    {
-                        "id": item.get("id") if item else None,
-                        "title": item.get("title") if item else "Unknown",
-                        "images": item.get("images", []) if item else [],
-                    }
-                    if item
-                    else None
-                ),
-                "other_user": (
-                    {
-                        "id": other_user.get("id") if other_user else None,
-                        "username": (
-                            other_user.get("username") if other_user else "Unknown"
-                        ),
-                        "full_name": (
-                            other_user.get("full_name") if other_user else None
-                        ),
-                    }
-                    if other_user
-                    else None
-                ),
+                "item": _item_summary(item),
+                "other_user": loader_service.user_summary(other_user),
                 "is_seller": is_seller,
             }
         )
@@ -411,7 +455,7 @@ async def get_swap_history(request: Request):
 
 
 @router.get("/{item_id}", response_model=ItemOut)
-async def get_item(item_id: str):
+async def get_item(item_id: str, request: Request):
     """Get a single item by ID.
 
     The item's status will be automatically updated to 'pending' if there
@@ -427,15 +471,16 @@ async def get_item(item_id: str):
     Raises:
         HTTPException: 404 if item not found
     """
-    it = await storage_service.get_item(item_id)
+    it = await storage_service.get_item(item_id, stale_reads=True)
+    # A secondary may not have the owner's latest create/edit yet
+    requester_id = auth_service.get_optional_user_id(request)
+    if requester_id and (not it or it.get("owner_id") == requester_id):
+        it = await storage_service.get_item(item_id)
     if not it:
         raise HTTPException(status_code=404, detail="item not found")
 
-    # Check for pending requests and update status if needed
-    if it.get("status") == "available":
-        pending_requests = await swap_service.get_pending_requests_for_item(item_id)
-        if len(pending_requests) > 0:
-            it["status"] = "pending"
+    # Report 'pending' if the item has open swap requests
+    it["status"] = storage_service.effective_status(it)
 
     return ItemOut(**it)
 
@@ -805,12 +850,16 @@ async def request_swap(item_id: str, request: Request):
 
     # Create swap request (don't transfer credits yet)
     swap_request = await swap_service.create_swap_request(
-        item_id=item_id, requester_id=user_id, credits_required=credits_required
+        item_id=item_id,
+        requester_id=user_id,
+        credits_required=credits_required,
+        owner_id=item_owner_id,
     )
 
     # Mark item as pending (has a swap request)
     it["status"] = "pending"
     await storage_service.upsert_item(it)
+    await storage_service.adjust_pending_requests(item_id, 1)
 
     return {
         "status": "requested",
@@ -893,15 +942,12 @@ async def approve_swap(item_id: str, request_id: str, request: Request):
     await storage_service.upsert_item(it)
 
     # NOW transfer credits (only after approval)
-    # Deduct credits from buyer
-    await credit_service.deduct_credits(user_id=requester_id, amount=credits_required)
-
-    # Add credits to seller
-    await credit_service.add_credits(
-        user_id=item_owner_id,
+    # Buyer debit and seller credit commit together
+    await credit_service.transfer_credits(
+        from_user_id=requester_id,
+        to_user_id=item_owner_id,
         amount=credits_required,
-        transaction_type="swap_credit",
-        description=f"Credits received from approved swap of item: {it.get('title')}",
+        credit_description=f"Credits received from approved swap of item: {it.get('title')}",
     )
 
     return {
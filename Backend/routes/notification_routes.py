@@ -4,24 +4,101 @@ Routes:
 - GET /notifications - Get all notifications for authenticated user
 - GET /notifications/recent - Get recent notifications (legacy endpoint)
 - GET /notifications/unread-count - Get count of unread notifications
+- GET /notifications/stream - Server-Sent Events push of new notifications
+- GET /notifications/sync - Notifications changed since a cursor, plus unread count
+- GET /notifications/archive - Older notifications moved out by retention, paginated
 - PATCH /notifications/{notification_id}/read - Mark a notification as read
 - PATCH /notifications/read-all - Mark all notifications as read
 - DELETE /notifications/{notification_id} - Delete a notification
 """
-from fastapi import APIRouter, Request, HTTPException, status
-from typing import List, Dict, Any
+import asyncio
+import json
+from fastapi import APIRouter, Header, Query, Request, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Dict, Any, Optional
 from pydantic import BaseModel
 
-from services import auth_service, notification_service
+from services import auth_service, notification_hub, notification_retention, notification_service
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT_SECONDS = 15
+
+# Milliseconds a client waits before reconnecting a dropped stream
+STREAM_RETRY_MS = 3000
+
+
 class MarkReadResponse(BaseModel):
     success: bool
     message: str
 
 
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message."""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _stream_user_id(request: Request, token: Optional[str]) -> str:
+    """Authenticate a stream request from the Authorization header or `token` query param.
+
+    Browsers' EventSource cannot set headers, so the token may be passed in
+    the query string instead.
+    """
+    if request.headers.get("authorization") or not token:
+        return auth_service.get_user_id_from_request(request)
+    if not auth_service.verify_access_token(token):
+        raise HTTPException(status_code=401, detail="invalid token")
+    return token.split("|", 1)[0]
+
+
+async def _notification_events(
+    request: Request,
+    user_id: str,
+    last_event_id: Optional[str],
+) -> AsyncIterator[str]:
+    """Yield missed notifications, the unread count, then live events.
+
+    The connection is registered with the hub only once the response starts
+    streaming, so a client that disconnects before that leaves nothing behind.
+    """
+    # Subscribe before replaying so nothing published in between is lost
+    queue = notification_hub.subscribe(user_id)
+    try:
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+
+        # Replay what the client missed while disconnected
+        if last_event_id:
+            missed = await notification_service.get_notifications_after(user_id, last_event_id)
+            for notification in missed:
+                yield _sse("notification", {"notification": notification}, notification["id"])
+
+        unread_count = await notification_service.get_unread_count(user_id)
+        yield _sse("unread_count", {"unread_count": unread_count})
+
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event["type"] == "overflow":
+                # Fell behind; closing makes the client reconnect and replay
+                break
+            if event["type"] == "notification":
+                notification = event["notification"]
+                yield _sse("notification", {"notification": notification}, notification["id"])
+            yield _sse("unread_count", {"unread_count": event["unread_count"]})
+    finally:
+        notification_hub.unsubscribe(user_id, queue)
+
+
 @router.get("", response_model=List[Dict[str, Any]])
 async def get_notifications(
     request: Request,
@@ -108,6 +185,109 @@ async def get_unread_count(request: Request):
         )
 
 
+@router.get("/sync")
+async def sync_notifications(
+    request: Request,
+    since: Optional[str] = None,
+    limit: int = Query(notification_service.SYNC_BATCH_LIMIT, ge=1, le=200),
+):
+    """Get notifications created or changed since the last sync, in one call.
+    
+    Args:
+        request: FastAPI Request object for authentication
+        since: Opaque cursor from the previous response (omit on first sync)
+        limit: Maximum number of notifications to return
+    
+    Returns:
+        Dictionary with "notifications", "unread_count", "cursor" and "has_more"
+    """
+    user_id = auth_service.get_user_id_from_request(request)
+    
+    try:
+        return await notification_service.sync_notifications(
+            user_id=user_id,
+            since=since,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error syncing notifications: {str(e)}"
+        )
+
+
+@router.get("/archive")
+async def get_archived_notifications(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+):
+    """Get older notifications that retention moved to the archive, newest first.
+    
+    Args:
+        request: FastAPI Request object for authentication
+        limit: Maximum number of notifications to return
+        cursor: Opaque cursor from the previous page's "next_cursor"
+    
+    Returns:
+        Dictionary with "notifications", "next_cursor" and "has_more"
+    """
+    user_id = auth_service.get_user_id_from_request(request)
+    
+    try:
+        return await notification_retention.get_archived_notifications(
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving archived notifications: {str(e)}"
+        )
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    token: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = None,
+):
+    """Push new notifications and unread-count changes as Server-Sent Events.
+    
+    Events:
+        notification: {"notification": {...}}, with the notification ID as the event ID
+        unread_count: {"unread_count": int}
+    
+    Args:
+        request: FastAPI Request object for authentication
+        token: Access token (for clients that cannot send an Authorization header)
+        last_event_id: Last-Event-ID header sent automatically by EventSource on reconnect
+        since: ID of the last notification seen, for clients resuming manually
+    
+    Returns:
+        A text/event-stream response that stays open until the client disconnects
+    """
+    user_id = _stream_user_id(request, token)
+    
+    return StreamingResponse(
+        _notification_events(request, user_id, last_event_id or since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.patch("/{notification_id}/read", response_model=MarkReadResponse)
 async def mark_notification_as_read(notification_id: str, request: Request):
     """Mark a specific notification as read.
@@ -3,11 +3,37 @@ from fastapi import APIRouter, HTTPException, status, Request
 from typing import Optional
 
 from services import auth_service, rating_service
-from models.rating_model import RatingCreate, RatingOut, UserRatingStats
+from models.rating_model import (
+    RatingCreate,
+    RatingOut,
+    RatingStatsBatchOut,
+    RatingStatsBatchRequest,
+    UserRatingStats,
+)
 
 router = APIRouter(prefix="/ratings", tags=["Ratings"])
 
 
+# Declared before POST /{rated_user_id} so "stats:batch" isn't taken for a user ID
+@router.post("/stats:batch", response_model=RatingStatsBatchOut)
+async def get_rating_stats_batch(body: RatingStatsBatchRequest):
+    """Get rating statistics for many users in one request.
+    
+    Public endpoint - no authentication required. Accepts up to
+    RATING_STATS_BATCH_LIMIT user IDs; results are cached briefly.
+    """
+    stats = await rating_service.get_cached_rating_stats_for_users(body.user_ids)
+    
+    return RatingStatsBatchOut(stats={
+        user_id: UserRatingStats(
+            average_rating=user_stats["average_rating"],
+            total_ratings=user_stats["total_ratings"],
+            rating_breakdown=user_stats.get("rating_breakdown")
+        )
+        for user_id, user_stats in stats.items()
+    })
+
+
 @router.post("/{rated_user_id}", response_model=RatingOut, status_code=status.HTTP_200_OK)
 async def give_rating(rated_user_id: str, request: Request, rating: RatingCreate):
     """Give or update a rating for a user.
@@ -10,6 +10,7 @@ Routes match the frontend API expectations:
 """
 
 from fastapi import APIRouter, HTTPException, Request, status
+import asyncio
 import re
 import math
 
@@ -18,7 +19,8 @@ from services import (
     swap_service,
     storage_service,
     credit_service,
-    notification_service,
+    loader_service,
+    notification_outbox,
 )
 from services.user_service import get_user_by_id
 from utils.constants import (
@@ -133,12 +135,10 @@ async def request_swap(item_id: str, request: Request):
         )
     except ValueError as exc:
         # Release reservation and surface the error
-        it["status"] = "available"
-        await storage_service.upsert_item(it)
+        await storage_service.release_item_reservation(item_id)
         raise HTTPException(status_code=402, detail=str(exc))
     except Exception as exc:
-        it["status"] = "available"
-        await storage_service.upsert_item(it)
+        await storage_service.release_item_reservation(item_id)
         raise HTTPException(
             status_code=500, detail="Failed to hold credits for request"
         ) from exc
@@ -146,7 +146,10 @@ async def request_swap(item_id: str, request: Request):
     # Create swap request; if anything fails, refund the held credits
     try:
         swap_request = await swap_service.create_swap_request(
-            item_id=item_id, requester_id=user_id, credits_required=credits_required
+            item_id=item_id,
+            requester_id=user_id,
+            credits_required=credits_required,
+            owner_id=item_owner_id,
         )
     except Exception:
         try:
@@ -169,14 +172,11 @@ async def request_swap(item_id: str, request: Request):
             ) from refund_exc
 
         # Revert item status to available since reservation failed downstream
-        it["status"] = "available"
-        await storage_service.upsert_item(it)
+        await storage_service.release_item_reservation(item_id)
         raise
 
-    # Create notification for the item owner
-    requester = await get_user_by_id(user_id)
-    requester_name = requester.get("username", "Someone") if requester else "Someone"
-    await notification_service.create_notification(
+    # Notify the item owner in the background (requester was loaded above)
+    await notification_outbox.enqueue_notification(
         user_id=item_owner_id,
         event_type="new_request",
         request_id=swap_request["id"],
@@ -184,7 +184,7 @@ async def request_swap(item_id: str, request: Request):
         metadata={
             "item_title": it.get("title", "Unknown Item"),
             "other_user_id": user_id,
-            "other_user_name": requester_name,
+            "other_user_name": user.get("username", "Someone"),
             "status": "pending",
         },
     )
@@ -252,10 +252,9 @@ async def approve_swap(item_id: str, request_id: str, request: Request):
     it["status"] = "swapped"
     await storage_service.upsert_item(it)
 
-    # Create notification for the requester
+    # Notify the requester in the background
     owner = await get_user_by_id(item_owner_id)
-    owner_name = owner.get("username", "Someone") if owner else "Someone"
-    await notification_service.create_notification(
+    await notification_outbox.enqueue_notification(
         user_id=requester_id,
         event_type="approved",
         request_id=request_id,
@@ -263,7 +262,7 @@ async def approve_swap(item_id: str, request_id: str, request: Request):
         metadata={
             "item_title": it.get("title", "Unknown Item"),
             "other_user_id": item_owner_id,
-            "other_user_name": owner_name,
+            "other_user_name": owner.get("username", "Someone") if owner else "Someone",
             "status": "approved",
         },
     )
@@ -331,11 +330,9 @@ async def reject_swap(item_id: str, request_id: str, request: Request):
         it["status"] = "available"
         await storage_service.upsert_item(it)
 
-    # Create notification for the requester
-    requester_id = swap_request.get("requester_id")
+    # Notify the requester in the background
     owner = await get_user_by_id(item_owner_id)
-    owner_name = owner.get("username", "Someone") if owner else "Someone"
-    await notification_service.create_notification(
+    await notification_outbox.enqueue_notification(
         user_id=requester_id,
         event_type="rejected",
         request_id=request_id,
@@ -343,7 +340,7 @@ async def reject_swap(item_id: str, request_id: str, request: Request):
         metadata={
             "item_title": it.get("title", "Unknown Item"),
             "other_user_id": item_owner_id,
-            "other_user_name": owner_name,
+            "other_user_name": owner.get("username", "Someone") if owner else "Someone",
             "status": "rejected",
         },
     )
@@ -407,13 +404,10 @@ async def cancel_swap(item_id: str, request: Request):
         it["status"] = "available"
         await storage_service.upsert_item(it)
 
-    # Create notification for the item owner
+    # Notify the item owner in the background; the worker resolves requester's name
     item_owner_id = it.get("owner_id")
-    requester = await get_user_by_id(user_id)
-    requester_name = requester.get("username", "Someone") if requester else "Someone"
-
     if item_owner_id:
-        await notification_service.create_notification(
+        await notification_outbox.enqueue_notification(
             user_id=item_owner_id,
             event_type="request_cancelled",
             request_id=swap_request.get("id"),
@@ -421,7 +415,6 @@ async def cancel_swap(item_id: str, request: Request):
             metadata={
                 "item_title": it.get("title", "Unknown Item"),
                 "other_user_id": user_id,
-                "other_user_name": requester_name,
                 "status": "cancelled",
             },
         )
@@ -449,33 +442,30 @@ async def get_swap_requests(request: Request):
     # Get requests as requester (requests I made)
     requester_requests = await swap_service.get_requests_for_requester(user_id)
 
-    # Enrich requests with item and user information
-    enriched_owner_requests = []
-    for req in owner_requests:
-        item = await storage_service.get_item(req.get("item_id"))
-        requester = await get_user_by_id(req.get("requester_id"))
-        enriched_owner_requests.append(
-            {
-                **req,
-                "item": item,
-                "requester": (
-                    {
-                        "id": requester.get("id") if requester else None,
-                        "username": (
-                            requester.get("username") if requester else "Unknown"
-                        ),
-                        "full_name": requester.get("full_name") if requester else None,
-                    }
-                    if requester
-                    else None
-                ),
-            }
-        )
+    # Enrich requests with item and user information: one batched query per
+    # collection instead of one lookup per row
+    loaders = loader_service.get_loaders(request)
+    items, requesters = await asyncio.gather(
+        loaders.items.load_many(
+            req.get("item_id") for req in owner_requests + requester_requests
+        ),
+        loaders.users.load_many(req.get("requester_id") for req in owner_requests),
+    )
+
+    enriched_owner_requests = [
+        {
+            **req,
+            "item": items.get(req.get("item_id")),
+            "requester": loader_service.user_summary(
+                requesters.get(req.get("requester_id"))
+            ),
+        }
+        for req in owner_requests
+    ]
 
-    enriched_requester_requests = []
-    for req in requester_requests:
-        item = await storage_service.get_item(req.get("item_id"))
-        enriched_requester_requests.append({**req, "item": item})
+    enriched_requester_requests = [
+        {**req, "item": items.get(req.get("item_id"))} for req in requester_requests
+    ]
 
     return {
         "as_owner": enriched_owner_requests,  # Pending requests for my items
@@ -492,29 +482,39 @@ async def get_swap_history(request: Request):
     # Get approved swaps where user is owner or requester
     approved_swaps = await swap_service.get_approved_swaps_for_user(user_id)
 
-    # Enrich swaps with item and user information
+    # Enrich swaps with item and user information. Swap requests carry
+    # owner_id, so items and users can be loaded concurrently.
+    loaders = loader_service.get_loaders(request)
+    items, users = await asyncio.gather(
+        loaders.items.load_many(swap.get("item_id") for swap in approved_swaps),
+        loaders.users.load_many(
+            user
+            for swap in approved_swaps
+            for user in (swap.get("requester_id"), swap.get("owner_id"))
+        ),
+    )
+
+    # Older requests without owner_id fall back to the item's owner
+    owner_ids = {}
+    for swap in approved_swaps:
+        item = items.get(swap.get("item_id"))
+        owner_ids[swap.get("id")] = swap.get("owner_id") or (
+            item.get("owner_id") if item else None
+        )
+    users.update(await loaders.users.load_many(owner_ids.values()))
+
     enriched_swaps = []
     for swap in approved_swaps:
-        item = await storage_service.get_item(swap.get("item_id"))
-        requester = await get_user_by_id(swap.get("requester_id"))
-        item_owner_id = item.get("owner_id") if item else None
-        owner_user = await get_user_by_id(item_owner_id) if item_owner_id else None
+        item = items.get(swap.get("item_id"))
+        item_owner_id = owner_ids[swap.get("id")]
+        owner_user = users.get(item_owner_id)
+        requester = users.get(swap.get("requester_id"))
 
         enriched_swaps.append(
             {
                 **swap,
                 "item": item,
-                "requester": (
-                    {
-                        "id": requester.get("id") if requester else None,
-                        "username": (
-                            requester.get("username") if requester else "Unknown"
-                        ),
-                        "full_name": requester.get("full_name") if requester else None,
-                    }
-                    if requester
-                    else None
-                ),
+                "requester": loader_service.user_summary(requester),
                 "owner": (
                     {
                         "id": item_owner_id,
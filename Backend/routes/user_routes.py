@@ -1,14 +1,24 @@
 """User-related routes (profile get/update with auth)"""
 
-from fastapi import APIRouter, HTTPException, status, Request, UploadFile, File, Depends
+import asyncio
+import hashlib
+import json
+
+from fastapi import APIRouter, HTTPException, status, Request, Response, UploadFile, File, Depends
 from typing import Optional, List
 from fastapi import Query
-from services import storage_service
+from fastapi.encoders import jsonable_encoder
 from services import user_service, auth_service, image_service
-from models.user_model import UserOut
+from models.user_model import PublicProfileOut, PublicUserOut, UserOut
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+# Seconds browsers and shared caches may reuse a public profile
+PROFILE_CACHE_SECONDS = 30
+
+# Newest listings included in a public profile
+PROFILE_LISTINGS_LIMIT = 50
+
 
 def get_authenticated_user_id(request: Request) -> str:
     """FastAPI dependency to extract and verify user ID from token.
@@ -64,53 +74,29 @@ async def search_users(
         )
     
     try:
-        # Get all users from storage
-        all_users = await storage_service.list_users()
-        
-        if not all_users:
-            return {"users": [], "total": 0}
-        
-        # Filter users by username or full name (case-insensitive)
-        matching_users = []
-        for user in all_users:
-            username = user.get("username", "").lower()
-            full_name = user.get("full_name", "").lower()
-            
-            if search_query in username or search_query in full_name:
-                matching_users.append(user)
-        
-        # Sort by relevance
-        def relevance_score(user):
-            username = user.get("username", "").lower()
-            full_name = user.get("full_name", "").lower()
-            
-            if username == search_query:
-                return 0
-            if search_query in username:
-                return 1
-            if search_query in full_name:
-                return 2
-            return 3
+        # Indexed prefix search, capped at `limit` before anything else is loaded
+        matching_users = await user_service.search_users(search_query, limit)
         
-        matching_users.sort(key=relevance_score)
-        matching_users = matching_users[:limit]
-        
-        # Format response with rating stats
+        # Rating stats for every result in one query
         from services import rating_service
         
+        rating_stats = await rating_service.get_rating_stats_for_users(
+            [user["id"] for user in matching_users]
+        )
+        
         formatted_users = []
         for user in matching_users:
-            rating_stats = await rating_service.get_user_rating_stats(user.get("id"))
+            user_rating = rating_stats.get(user["id"], {})
             
             formatted_users.append({
                 "id": user.get("id"),
                 "username": user.get("username", ""),
                 "full_name": user.get("full_name", ""),
                 "avatar": user.get("profile_pic", ""),
-                "initials": (user.get("full_name") or user.get("username", "U"))[0].upper(),
+                "initials": (user.get("full_name") or user.get("username") or "U")[0].upper(),
                 "location": user.get("location", ""),
-                "averageRating": rating_stats.get("average_rating", 0.0),
-                "totalRatings": rating_stats.get("total_ratings", 0),
+                "averageRating": user_rating.get("average_rating", 0.0),
+                "totalRatings": user_rating.get("total_ratings", 0),
                 "totalSwaps": user.get("stats", {}).get("totalSwaps", 0) if "stats" in user else 0,
             })
         
@@ -146,7 +132,7 @@ async def get_user_by_username(username: str):
     # Get rating stats
     from services import rating_service
 
-    rating_stats = await rating_service.get_user_rating_stats(user.get("id"))
+    rating_stats = await rating_service.get_user_rating_stats(user.get("id"), user=user)
 
     # Return public fields only
     return UserOut(
@@ -170,6 +156,75 @@ async def get_user_by_username(username: str):
     )
 
 
+@router.get("/username/{username}/profile", response_model=PublicProfileOut)
+async def get_public_profile(username: str, request: Request):
+    """Everything a public profile page shows, in one response.
+
+    The user is resolved once; listings, rating stats, item counts per status
+    and the completed swap count are then loaded concurrently, from
+    secondaries where available. The response
+    may be cached for PROFILE_CACHE_SECONDS and carries an ETag, so
+    revalidation returns 304 Not Modified when nothing changed.
+
+    Users viewing their own profile read the primary and get an uncached
+    response, so edits they just made are always shown.
+    """
+    from services import rating_service, storage_service, swap_service
+
+    user = await user_service.get_user_by_username(
+        username, projection=user_service.PROFILE_PROJECTION, stale_reads=True
+    )
+    requester_id = auth_service.get_optional_user_id(request)
+    if requester_id and (not user or user["id"] == requester_id):
+        # Secondaries may not have the user's latest edits (or a new username) yet
+        user = await user_service.get_user_by_username(
+            username, projection=user_service.PROFILE_PROJECTION
+        )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    user_id = user["id"]
+    own_profile = user_id == requester_id
+    listings, rating_stats, item_counts, swap_count = await asyncio.gather(
+        storage_service.list_owner_listings(
+            user_id, PROFILE_LISTINGS_LIMIT, stale_reads=not own_profile
+        ),
+        rating_service.get_user_rating_stats(user_id, user=user),
+        storage_service.count_items_by_status(user_id, stale_reads=not own_profile),
+        swap_service.count_approved_swaps_for_user(user_id, stale_reads=not own_profile),
+    )
+
+    profile = PublicProfileOut(
+        user=PublicUserOut(
+            **{field: user.get(field) for field in user_service.PROFILE_PROJECTION
+               if field != "rating_stats" and user.get(field) is not None},
+            id=user_id,
+            average_rating=rating_stats.get("average_rating"),
+            total_ratings=rating_stats.get("total_ratings", 0),
+        ),
+        listings=listings,
+        item_counts=item_counts,
+        swap_count=swap_count,
+    )
+
+    # jsonable_encoder works with pydantic v1 and v2 alike
+    body = json.dumps(jsonable_encoder(profile), separators=(",", ":"))
+    headers = {
+        "Cache-Control": (
+            "private, no-cache" if own_profile
+            else f"public, max-age={PROFILE_CACHE_SECONDS}"
+        ),
+        # The owner gets a different, uncached copy; shared caches must not mix them
+        "Vary": "Authorization",
+        "ETag": f'W/"{hashlib.sha1(body.encode()).hexdigest()}"',
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/{user_id}", response_model=UserOut)
 async def get_user(user_id: str, request: Request):
     """Get user by ID. Credits are only visible to the user themselves."""
@@ -182,7 +237,7 @@ async def get_user(user_id: str, request: Request):
     # Get rating stats
     from services import rating_service
 
-    rating_stats = await rating_service.get_user_rating_stats(user_id)
+    rating_stats = await rating_service.get_user_rating_stats(user_id, user=user)
 
     # Check if requesting user is the same as the requested user
     # to determine if we should show credits
@@ -326,7 +381,7 @@ async def patch_user(user_id: str, request: Request):
         # Get rating stats
         from services import rating_service
 
-        rating_stats = await rating_service.get_user_rating_stats(user_id)
+        rating_stats = await rating_service.get_user_rating_stats(user_id, user=updated_user)
 
         return UserOut(
             id=updated_user.get("id"),
@@ -420,7 +475,7 @@ async def upload_profile_picture(
         # Get rating stats
         from services import rating_service
 
-        rating_stats = await rating_service.get_user_rating_stats(user_id)
+        rating_stats = await rating_service.get_user_rating_stats(user_id, user=updated_user)
 
         return UserOut(
             id=updated_user.get("id"),
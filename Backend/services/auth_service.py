@@ -10,7 +10,7 @@ from fastapi import HTTPException, Request
 from hashlib import sha256
 import hmac
 import uuid
-from typing import Tuple
+from typing import Optional, Tuple
 
 from config_defaults.settings import settings
 
@@ -77,3 +77,11 @@ def get_user_id_from_request(request: Request) -> str:
         return user_id
     except Exception:
         raise HTTPException(status_code=401, detail="invalid token format")
+
+
+def get_optional_user_id(request: Request) -> Optional[str]:
+    """Return the authenticated user's ID, or None for anonymous or invalid auth."""
+    try:
+        return get_user_id_from_request(request)
+    except HTTPException:
+        return None
@@ -10,15 +10,19 @@ Key features:
 - Transactional operations: Ensures both user credits and transaction records
   are updated atomically using MongoDB transactions
 - Transaction history: Maintains a complete audit trail of all credit changes
+- Balance checkpoints: Ledger verification only aggregates rows written after
+  the user's latest checkpoint instead of the whole history
 
 This implementation follows #cs110-CodeReadability by using clear function names,
 meaningful comments, and consistent error messages.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 # Import transaction type constants to avoid typos and ensure consistency
 from utils.constants import (
@@ -28,7 +32,9 @@ from utils.constants import (
     TRANSACTION_TYPE_SWAP_CREDIT,
     TRANSACTION_TYPE_SWAP_DEBIT,
 )
-from database.connection import get_db
+from database.connection import get_db, run_in_transaction
+from services import event_bus
+from utils.pagination import decode_cursor, encode_cursor
 
 
 def _get_db_optional():
@@ -108,12 +114,154 @@ async def refund_credits(
     )
 
 
+# Transaction types that increase a balance; every other type decreases it
+CREDIT_TRANSACTION_TYPES = [
+    TRANSACTION_TYPE_CREDIT_ADD,
+    TRANSACTION_TYPE_SWAP_CREDIT,
+    TRANSACTION_TYPE_ITEM_UPLOAD,
+]
+
+# Aggregation expression for a ledger row's signed effect on the balance
+SIGNED_AMOUNT = {
+    "$cond": [
+        {"$in": ["$type", CREDIT_TRANSACTION_TYPES]},
+        "$amount",
+        {"$multiply": ["$amount", -1]},
+    ]
+}
+
+# A new checkpoint is written once this many ledger rows follow the latest one
+CHECKPOINT_INTERVAL = 100
+
+# Rows younger than this are never folded into a checkpoint, so ObjectIds
+# generated concurrently by other app instances cannot land behind it
+CHECKPOINT_LAG_SECONDS = 300
+
+# Largest credits/ledger difference still considered in sync (float rounding)
+BALANCE_TOLERANCE = 1e-6
+
+# Ledger rows are read per user in _id order (balance checks) or newest
+# first (history pages and exports)
+TRANSACTION_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_asc"),
+    IndexModel(
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_created_desc",
+    ),
+]
+
+# Newest-first history order; _id breaks ties between equal timestamps
+TRANSACTION_HISTORY_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# One checkpoint document per user: balance as of `last_transaction_id`
+CHECKPOINT_INDEXES = [
+    IndexModel([("user_id", ASCENDING)], name="user_unique", unique=True),
+]
+
+
+async def ensure_credit_indexes():
+    """Create the ledger and balance checkpoint indexes (idempotent)."""
+    db = get_db()
+    await db["transactions"].create_indexes(TRANSACTION_INDEXES)
+    await db["balance_checkpoints"].create_indexes(CHECKPOINT_INDEXES)
+
+
+async def _sum_ledger(
+    db,
+    user_id: str,
+    after_id: Optional[ObjectId] = None,
+    before_id: Optional[ObjectId] = None,
+) -> Dict[str, Any]:
+    """Sum a user's ledger rows with `after_id < _id < before_id`.
+
+    Returns:
+        Dict with the signed `balance`, row `count` and `last_id` of the range
+    """
+    match: Dict[str, Any] = {"user_id": user_id}
+    id_range: Dict[str, Any] = {}
+    if after_id is not None:
+        id_range["$gt"] = after_id
+    if before_id is not None:
+        id_range["$lt"] = before_id
+    if id_range:
+        match["_id"] = id_range
+
+    pipeline = [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": None,
+                "balance": {"$sum": SIGNED_AMOUNT},
+                "count": {"$sum": 1},
+                "last_id": {"$max": "$_id"},
+            }
+        },
+    ]
+    result = await db["transactions"].aggregate(pipeline).to_list(length=1)
+    if not result:
+        return {"balance": 0.0, "count": 0, "last_id": None}
+    return {
+        "balance": float(result[0].get("balance") or 0.0),
+        "count": result[0]["count"],
+        "last_id": result[0]["last_id"],
+    }
+
+
+async def checkpoint_user_balance(
+    user_id: str, checkpoint: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Fold settled ledger rows into the user's balance checkpoint.
+
+    Only rows older than CHECKPOINT_LAG_SECONDS are folded in, and only the
+    rows after the current checkpoint are aggregated. Concurrent
+    checkpointers cannot move a checkpoint backwards: the write is guarded on
+    the previous `last_transaction_id`, and a lost race is simply ignored.
+
+    Args:
+        user_id: The ID of the user to checkpoint
+        checkpoint: The current checkpoint, if the caller already loaded it
+
+    Returns:
+        The latest checkpoint document (None if the user has no settled rows)
+    """
+    db = get_db()
+    checkpoints_collection = db["balance_checkpoints"]
+    if checkpoint is None:
+        checkpoint = await checkpoints_collection.find_one({"user_id": user_id})
+
+    after_id = checkpoint["last_transaction_id"] if checkpoint else None
+    cutoff = ObjectId.from_datetime(
+        datetime.now(timezone.utc) - timedelta(seconds=CHECKPOINT_LAG_SECONDS)
+    )
+    delta = await _sum_ledger(db, user_id, after_id=after_id, before_id=cutoff)
+    if delta["count"] == 0:
+        return checkpoint
+
+    updated = {
+        "user_id": user_id,
+        "balance": (checkpoint["balance"] if checkpoint else 0.0) + delta["balance"],
+        "last_transaction_id": delta["last_id"],
+        "transaction_count": (checkpoint.get("transaction_count", 0) if checkpoint else 0)
+        + delta["count"],
+        "updated_at": datetime.now().isoformat(),
+    }
+    guard = {"user_id": user_id, "last_transaction_id": after_id}
+    try:
+        await checkpoints_collection.update_one(guard, {"$set": updated}, upsert=True)
+    except DuplicateKeyError:
+        # Another request advanced the checkpoint first; theirs is as good
+        pass
+    return updated
+
+
 async def get_user_balance(user_id: str) -> float:
     """Calculate user's current balance from transaction history.
 
-    This function recalculates the balance by summing all transactions
-    for the user. It's useful for integrity checks, but for performance,
-    the user's credits field should be used as the source of truth.
+    The balance is the user's latest checkpoint plus the ledger rows written
+    after it, so only the delta is aggregated. Once the delta grows past
+    CHECKPOINT_INTERVAL rows a fresh checkpoint is written. It's useful for
+    integrity checks, but the user's credits field remains the source of
+    truth for display.
 
     Args:
         user_id: The ID of the user whose balance to calculate
@@ -131,43 +279,163 @@ async def get_user_balance(user_id: str) -> float:
     if not user:
         raise ValueError(f"User {user_id} not found")
 
-    # Calculate balance from transactions using MongoDB aggregation
+    return await _ledger_balance(get_db(), user_id)
+
+
+async def _ledger_balance(db, user_id: str) -> float:
+    """Checkpoint balance plus the signed sum of later ledger rows."""
+    checkpoint = await db["balance_checkpoints"].find_one({"user_id": user_id})
+    after_id = checkpoint["last_transaction_id"] if checkpoint else None
+    delta = await _sum_ledger(db, user_id, after_id=after_id)
+
+    if delta["count"] >= CHECKPOINT_INTERVAL:
+        await checkpoint_user_balance(user_id, checkpoint)
+
+    base = float(checkpoint["balance"]) if checkpoint else 0.0
+    return base + delta["balance"]
+
+
+async def get_balance_summary(user_id: str) -> Dict[str, Any]:
+    """Return the maintained balance together with an incremental integrity check.
+
+    The balance served to clients is the user's `credits` field (one point
+    read). The ledger balance is checkpoint + delta, so the check stays cheap
+    however long the user's history is.
+
+    Args:
+        user_id: The ID of the user
+
+    Returns:
+        Dict with `user_id`, `balance`, `ledger_balance` and `in_sync`
+
+    Raises:
+        ValueError: If the user doesn't exist
+    """
     db = get_db()
-    transactions_collection = db["transactions"]
+    user = await db["users"].find_one(_user_filter(user_id), {"credits": 1})
+    if not user:
+        raise ValueError(f"User {user_id} not found")
 
-    pipeline = [
-        {"$match": {"user_id": user_id}},
-        {
-            "$group": {
-                "_id": None,
-                "balance": {
-                    "$sum": {
-                        "$cond": [
-                            {
-                                "$in": [
-                                    "$type",
-                                    [
-                                        TRANSACTION_TYPE_CREDIT_ADD,
-                                        TRANSACTION_TYPE_SWAP_CREDIT,
-                                        TRANSACTION_TYPE_ITEM_UPLOAD,
-                                    ],
-                                ]
-                            },
-                            "$amount",
-                            {"$multiply": ["$amount", -1]},
-                        ]
-                    }
-                },
-            }
-        },
-    ]
+    balance = float(user.get("credits", 0.0))
+    ledger_balance = await _ledger_balance(db, user_id)
+    in_sync = abs(balance - ledger_balance) <= BALANCE_TOLERANCE
+    if not in_sync:
+        print(
+            f"WARNING: Credit drift for user {user_id}: credits={balance}, ledger={ledger_balance}"
+        )
+    return {
+        "user_id": user_id,
+        "balance": balance,
+        "ledger_balance": ledger_balance,
+        "in_sync": in_sync,
+    }
+
+
+def _user_filter(user_id: str) -> Dict[str, Any]:
+    """Build the users-collection filter for an ID (ObjectId or legacy string)."""
+    if ObjectId.is_valid(user_id):
+        return {"_id": ObjectId(user_id)}
+    return {"id": user_id}
+
+
+async def _apply_credit_change(
+    db,
+    user_id: str,
+    amount: float,
+    transaction_type: str,
+    description: str,
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> float:
+    """Apply a signed credit change and record it in the ledger.
+
+    The balance check and the update are a single conditional
+    `find_one_and_update`: deductions only match while `credits >= amount`,
+    so concurrent writers can never overdraw an account or lose an update.
+    The new balance comes back from the same round trip.
+
+    Args:
+        db: Database handle
+        user_id: The ID of the user whose balance changes
+        amount: Signed change (positive adds credits, negative deducts)
+        transaction_type: Type of transaction (use constants from utils.constants)
+        description: Description stored on the ledger entry
+        session: Optional MongoDB session for transactions
+
+    Returns:
+        The user's balance after the change
+
+    Raises:
+        ValueError: If the user doesn't exist or has insufficient credits
+    """
+    users_collection = db["users"]
+    user_filter = _user_filter(user_id)
+    if amount < 0:
+        user_filter["credits"] = {"$gte": -amount}
+
+    user = await users_collection.find_one_and_update(
+        user_filter,
+        {"$inc": {"credits": amount}},
+        projection={"credits": 1},
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+    if user is None:
+        # Only the failure path pays for a second read, to explain why
+        existing = await users_collection.find_one(
+            _user_filter(user_id), {"credits": 1}, session=session
+        )
+        if existing is None:
+            raise ValueError(f"User {user_id} not found")
+        raise ValueError(
+            f"Insufficient credits. Current balance: {existing.get('credits', 0.0)}, required: {-amount}"
+        )
+
+    await _record_transaction(
+        user_id=user_id,
+        amount=abs(amount),
+        transaction_type=transaction_type,
+        description=description,
+        session=session,
+    )
+    return float(user.get("credits", 0.0))
+
+
+async def _apply_credit_changes(
+    db, changes: List[Tuple[str, float, str, str]]
+) -> List[float]:
+    """Apply several credit changes atomically and return the new balances.
+
+    The changes run inside one MongoDB transaction when the deployment
+    supports it (detected once at connect time). Standalone instances apply
+    them in order without a transaction; each change is still individually
+    atomic thanks to the conditional update.
+
+    Args:
+        db: Database handle
+        changes: (user_id, signed amount, transaction_type, description) tuples
+
+    Returns:
+        The new balance for each change, in order
+
+    Raises:
+        ValueError: If a user doesn't exist or has insufficient credits
+    """
 
-    cursor = transactions_collection.aggregate(pipeline)
-    result = await cursor.to_list(length=1)
+    async def run(session: Optional[AsyncIOMotorClientSession]) -> List[float]:
+        return [
+            await _apply_credit_change(db, user_id, amount, tx_type, desc, session)
+            for user_id, amount, tx_type, desc in changes
+        ]
 
-    if result and result[0].get("balance") is not None:
-        return float(result[0]["balance"])
-    return 0.0
+    balances = await run_in_transaction(run, client=db.client)
+    # Announce only after the transaction committed
+    for (user_id, _, tx_type, _), balance in zip(changes, balances):
+        event_bus.publish(event_bus.CREDITS_CHANGED, {
+            "user_id": user_id,
+            "balance": balance,
+            "transaction_type": tx_type,
+        })
+    return balances
 
 
 async def add_credits(
@@ -178,11 +446,8 @@ async def add_credits(
 ) -> float:
     """Add credits to user account and return new balance.
 
-    This function atomically:
-    1. Records the transaction (for audit trail)
-    2. Updates the user's credits field directly (for performance)
-
-    Uses MongoDB transactions to ensure data integrity.
+    The user's credits field is incremented and the transaction recorded
+    (for audit trail) in the same MongoDB transaction.
 
     Args:
         user_id: The ID of the user receiving credits
@@ -196,9 +461,6 @@ async def add_credits(
     Raises:
         ValueError: If the user doesn't exist
     """
-    from services.user_service import get_user_by_id, update_user
-    from motor.motor_asyncio import AsyncIOMotorClient
-
     # Use default description if not provided
     if description is None:
         description = f"Added {amount} credits to account"
@@ -207,91 +469,11 @@ async def add_credits(
     if db is None:
         # Graceful fallback for test environments without a live DB
         return amount
-    client: AsyncIOMotorClient = db.client
-
-    # Check if MongoDB supports transactions (requires replica set or sharded cluster)
-    # For standalone instances, we'll do operations without transactions
-    try:
-        # Try to use MongoDB transaction for atomicity
-        async with client.start_session() as session:
-            try:
-                async with session.start_transaction():
-                    print(
-                        f"DEBUG: Starting transaction to add {amount} credits to user {user_id}"
-                    )
-                    # Get fresh user data within transaction
-                    user = await get_user_by_id(user_id, session=session)
-                    if not user:
-                        raise ValueError(f"User {user_id} not found")
-
-                    # Record the transaction first (for audit trail)
-                    print(f"DEBUG: Recording transaction for user {user_id}")
-                    await _record_transaction(
-                        user_id=user_id,
-                        amount=amount,
-                        transaction_type=transaction_type,
-                        description=description,
-                        session=session,
-                    )
-
-                    # Update user's credits field directly (for performance - O(1) instead of O(n))
-                    current_credits = user.get("credits", 0.0)
-                    new_credits = current_credits + amount
-                    print(
-                        f"DEBUG: Updating user credits from {current_credits} to {new_credits}"
-                    )
-                    await update_user(
-                        user_id, {"credits": new_credits}, session=session
-                    )
-                    print(f"DEBUG: Transaction completed successfully")
-
-                # Transaction commits automatically when exiting the context manager
-                print(
-                    f"DEBUG: Transaction committed, returning new_credits: {new_credits}"
-                )
-                return new_credits
-            except Exception as e:
-                # Transaction will be aborted automatically
-                import traceback
-
-                print(f"ERROR: Transaction failed in add_credits: {str(e)}")
-                print(traceback.format_exc())
-                raise
-    except Exception as e:
-        # If transactions aren't supported (standalone MongoDB), fall back to non-transactional
-        import traceback
-
-        print(
-            f"WARNING: MongoDB transactions not available ({str(e)}). Using non-transactional operations."
-        )
-        print(traceback.format_exc())
-
-        # Get fresh user data
-        user = await get_user_by_id(user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
 
-        # Record the transaction first (for audit trail)
-        print(f"DEBUG: Recording transaction (non-transactional) for user {user_id}")
-        await _record_transaction(
-            user_id=user_id,
-            amount=amount,
-            transaction_type=transaction_type,
-            description=description,
-            session=None,  # No session for standalone
-        )
-
-        # Update user's credits field directly
-        current_credits = user.get("credits", 0.0)
-        new_credits = current_credits + amount
-        print(
-            f"DEBUG: Updating user credits (non-transactional) from {current_credits} to {new_credits}"
-        )
-        await update_user(user_id, {"credits": new_credits}, session=None)
-        print(
-            f"DEBUG: Non-transactional operation completed, returning new_credits: {new_credits}"
-        )
-        return new_credits
+    [new_credits] = await _apply_credit_changes(
+        db, [(user_id, amount, transaction_type, description)]
+    )
+    return new_credits
 
 
 async def deduct_credits(
@@ -302,12 +484,9 @@ async def deduct_credits(
 ) -> float:
     """Deduct credits from user account and return new balance.
 
-    This function atomically:
-    1. Checks if user has sufficient credits
-    2. Records the transaction (for audit trail)
-    3. Updates the user's credits field directly (for performance)
-
-    Uses MongoDB transactions to ensure data integrity.
+    The sufficiency check and the decrement are one conditional update, and
+    the transaction is recorded (for audit trail) in the same MongoDB
+    transaction.
 
     Args:
         user_id: The ID of the user whose credits are being deducted
@@ -321,9 +500,6 @@ async def deduct_credits(
     Raises:
         ValueError: If the user doesn't exist or has insufficient credits
     """
-    from services.user_service import get_user_by_id, update_user
-    from motor.motor_asyncio import AsyncIOMotorClient
-
     # Use default description if not provided
     if description is None:
         description = f"Deducted {amount} credits from account"
@@ -332,82 +508,60 @@ async def deduct_credits(
     if db is None:
         # Graceful fallback for test environments without a live DB
         return 0.0
-    client: AsyncIOMotorClient = db.client
 
-    # Check if MongoDB supports transactions (requires replica set or sharded cluster)
-    # For standalone instances, we'll do operations without transactions
-    try:
-        # Try to use MongoDB transaction for atomicity
-        async with client.start_session() as session:
-            try:
-                async with session.start_transaction():
-                    # Get fresh user data within transaction
-                    user = await get_user_by_id(user_id, session=session)
-                    if not user:
-                        raise ValueError(f"User {user_id} not found")
-
-                    current_balance = user.get("credits", 0.0)
-
-                    # Check if user has sufficient credits before proceeding
-                    if current_balance < amount:
-                        raise ValueError(
-                            f"Insufficient credits. Current balance: {current_balance}, required: {amount}"
-                        )
-
-                    # Record the transaction first (for audit trail)
-                    await _record_transaction(
-                        user_id=user_id,
-                        amount=amount,
-                        transaction_type=transaction_type,
-                        description=description,
-                        session=session,
-                    )
-
-                    # Update user's credits field directly (for performance - O(1) instead of O(n))
-                    new_credits = current_balance - amount
-                    await update_user(
-                        user_id, {"credits": new_credits}, session=session
-                    )
-
-                # Transaction commits automatically when exiting the context manager
-                return new_credits
-            except Exception as e:
-                # Transaction will be aborted automatically
-                print(f"Transaction failed in deduct_credits: {str(e)}")
-                raise
-    except Exception as e:
-        # If transactions aren't supported (standalone MongoDB), fall back to non-transactional
-        print(
-            f"Warning: MongoDB transactions not available ({str(e)}). Using non-transactional operations."
-        )
+    [new_credits] = await _apply_credit_changes(
+        db, [(user_id, -amount, transaction_type, description)]
+    )
+    return new_credits
 
-        # Get fresh user data
-        user = await get_user_by_id(user_id)
-        if not user:
-            raise ValueError(f"User {user_id} not found")
 
-        current_balance = user.get("credits", 0.0)
-
-        # Check if user has sufficient credits before proceeding
-        if current_balance < amount:
-            raise ValueError(
-                f"Insufficient credits. Current balance: {current_balance}, required: {amount}"
-            )
-
-        # Record the transaction first (for audit trail)
-        await _record_transaction(
-            user_id=user_id,
-            amount=amount,
-            transaction_type=transaction_type,
-            description=description,
-            session=None,  # No session for standalone
-        )
+async def transfer_credits(
+    from_user_id: str,
+    to_user_id: str,
+    amount: float,
+    debit_type: str = TRANSACTION_TYPE_SWAP_DEBIT,
+    credit_type: str = TRANSACTION_TYPE_SWAP_CREDIT,
+    debit_description: str = None,
+    credit_description: str = None,
+) -> Tuple[float, float]:
+    """Move credits between two users and return both new balances.
+
+    The debit, the credit and both ledger entries commit together, so a
+    failure can never leave one side of a swap applied without the other.
+
+    Args:
+        from_user_id: The ID of the user paying
+        to_user_id: The ID of the user receiving
+        amount: The amount of credits to move (must be positive)
+        debit_type: Transaction type recorded for the payer
+        credit_type: Transaction type recorded for the receiver
+        debit_description: Optional description for the payer's entry
+        credit_description: Optional description for the receiver's entry
 
-        # Update user's credits field directly
-        new_credits = current_balance - amount
-        await update_user(user_id, {"credits": new_credits}, session=None)
+    Returns:
+        (payer's new balance, receiver's new balance)
 
-        return new_credits
+    Raises:
+        ValueError: If a user doesn't exist or the payer has insufficient credits
+    """
+    if debit_description is None:
+        debit_description = f"Deducted {amount} credits from account"
+    if credit_description is None:
+        credit_description = f"Added {amount} credits to account"
+
+    db = _get_db_optional()
+    if db is None:
+        # Graceful fallback for test environments without a live DB
+        return 0.0, amount
+
+    from_balance, to_balance = await _apply_credit_changes(
+        db,
+        [
+            (from_user_id, -amount, debit_type, debit_description),
+            (to_user_id, amount, credit_type, credit_description),
+        ],
+    )
+    return from_balance, to_balance
 
 
 async def get_user_transactions(user_id: str) -> List[Dict[str, Any]]:
@@ -428,6 +582,73 @@ async def get_user_transactions(user_id: str) -> List[Dict[str, Any]]:
     return [_convert_id(t) for t in transactions]
 
 
+async def get_user_transactions_page(
+    user_id: str, limit: int = 50, cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get one page of a user's transactions, newest first.
+
+    Uses keyset pagination on (user_id, created_at, _id), so every page is an
+    index range scan no matter how deep into the history it is.
+
+    Args:
+        user_id: The ID of the user whose transactions to retrieve
+        limit: Maximum number of transactions to return
+        cursor: Opaque cursor from the previous page's `next_cursor`
+
+    Returns:
+        Dict with `transactions`, `next_cursor` and `has_more`
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    db = get_db()
+    transactions_collection = db["transactions"]
+
+    query: Dict[str, Any] = {"user_id": user_id}
+    if cursor:
+        after = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": after.get("k")}},
+            {"created_at": after.get("k"), "_id": {"$lt": after["id"]}},
+        ]
+
+    # Fetch one extra row to know whether another page exists
+    docs = (
+        await transactions_collection.find(query)
+        .sort(TRANSACTION_HISTORY_SORT)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1], "created_at") if has_more else None
+
+    return {
+        "transactions": [_convert_id(t) for t in docs],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+async def iter_user_transactions(
+    user_id: str, batch_size: int = 500
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield all of a user's transactions, newest first, without buffering them.
+
+    Args:
+        user_id: The ID of the user whose transactions to stream
+        batch_size: Documents fetched from the server per round trip
+    """
+    db = get_db()
+    cursor = (
+        db["transactions"]
+        .find({"user_id": user_id}, batch_size=batch_size)
+        .sort(TRANSACTION_HISTORY_SORT)
+    )
+    async for transaction in cursor:
+        yield _convert_id(transaction)
+
+
 async def sync_user_credits_from_transactions(user_id: str) -> float:
     """Recalculate and update user's credits from all transactions.
 
@@ -0,0 +1,253 @@
+"""Publish/subscribe bus for domain events.
+
+Services announce changes with `publish(event_type, payload)`; per-process
+caches and push channels react to them with `subscribe(event_type, handler)`.
+Publishing never waits on subscribers: synchronous handlers run inline and
+coroutine handlers are scheduled as tasks.
+
+Events and their payloads:
+    item.updated               {"item_id", "status", "deleted"}
+    swap.status_changed        {"request_id", "item_id", "status", "previous_status", ...}
+    credits.changed            {"user_id", "balance", "transaction_type"}
+    rating.changed             {"rated_user_id", "rater_user_id"}
+    notification.created       {"user_id", "notification", "unread_count"}
+    notification.unread_count  {"user_id", "unread_count"}
+
+Backends (chosen with EVENT_BUS_BACKEND):
+    local  Subscribers in this process only (default).
+    mongo  Events are also appended to the capped `event_bus` collection,
+           which every process tails, so subscribers in other uvicorn workers
+           see them too. A tailable cursor on a capped collection works on
+           standalone servers as well, unlike change streams.
+
+With `mongo`, each process writes its events one at a time, in publish
+order, and the server stamps every event with a `ts` timestamp. Client-made
+ObjectIds don't follow insertion order across (or even within) processes,
+so a tailer whose cursor died resumes by `ts` instead. It resumes
+TAIL_RESUME_OVERLAP_SECONDS early and skips the events it already
+dispatched, because a write can become visible slightly after a later-stamped
+one. An event that becomes visible more than that long after its stamp is
+missed by tailers that were reconnecting at the time.
+
+Before `start()` is called (scripts, tests) the bus behaves like `local`.
+"""
+
+import asyncio
+import inspect
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+from uuid import uuid4
+
+from bson.timestamp import Timestamp
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from config_defaults.constants import EVENT_BUS_BACKEND
+from database.connection import get_db
+
+
+ITEM_UPDATED = "item.updated"
+SWAP_STATUS_CHANGED = "swap.status_changed"
+CREDITS_CHANGED = "credits.changed"
+RATING_CHANGED = "rating.changed"
+NOTIFICATION_CREATED = "notification.created"
+NOTIFICATION_UNREAD_COUNT = "notification.unread_count"
+
+# Size of the capped collection relaying events between processes
+EVENT_LOG_SIZE_BYTES = 8 * 1024 * 1024
+
+# Seconds to wait before re-opening a tailable cursor that died
+TAIL_RETRY_SECONDS = 1
+
+# How far before the last seen `ts` a re-opened cursor starts
+TAIL_RESUME_OVERLAP_SECONDS = 5
+
+# Recently dispatched event IDs remembered to skip the resume overlap
+TAIL_SEEN_LIMIT = 10000
+
+# An empty top-level timestamp is replaced by the server's current one on insert
+SERVER_TIMESTAMP = Timestamp(0, 0)
+
+# Identifies events this process published, so they aren't dispatched twice
+PROCESS_ID = uuid4().hex
+
+Handler = Callable[[Dict[str, Any]], Optional[Awaitable[None]]]
+
+_handlers: Dict[str, List[Handler]] = {}
+_tasks: Set[asyncio.Future] = set()
+
+
+def subscribe(event_type: str, handler: Handler) -> None:
+    """Call `handler(payload)` for every event of the given type."""
+    _handlers.setdefault(event_type, []).append(handler)
+
+
+def unsubscribe(event_type: str, handler: Handler) -> None:
+    """Remove a handler (safe to call more than once)."""
+    handlers = _handlers.get(event_type)
+    if handlers and handler in handlers:
+        handlers.remove(handler)
+
+
+def _track(future: asyncio.Future, what: str) -> None:
+    """Keep a background task alive until done and log its failure."""
+    def done(task: asyncio.Future) -> None:
+        _tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"WARNING: {what} failed: {task.exception()}")
+
+    _tasks.add(future)
+    future.add_done_callback(done)
+
+
+def _dispatch(event_type: str, payload: Dict[str, Any]) -> None:
+    """Hand an event to this process's subscribers."""
+    for handler in list(_handlers.get(event_type, ())):
+        try:
+            result = handler(payload)
+        except Exception as e:
+            print(f"WARNING: {event_type} handler failed: {e}")
+            continue
+        if inspect.isawaitable(result):
+            _track(asyncio.ensure_future(result), f"{event_type} handler")
+
+
+class LocalBackend:
+    """Delivers events to subscribers in this process only."""
+
+    async def start(self) -> None:
+        pass
+
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class MongoBackend(LocalBackend):
+    """Relays events between processes through a capped collection."""
+
+    def __init__(self, collection_name: str = "event_bus"):
+        self.collection_name = collection_name
+        self._collection = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._write_task: Optional[asyncio.Task] = None
+        self._tail_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        db = get_db()
+        try:
+            await db.create_collection(
+                self.collection_name, capped=True, size=EVENT_LOG_SIZE_BYTES
+            )
+        except CollectionInvalid:
+            pass  # Already exists
+        self._collection = db[self.collection_name]
+        self._outbox = asyncio.Queue()
+        self._write_task = asyncio.create_task(self._write())
+        # Only relay events published from now on
+        latest = await self._collection.find_one(sort=[("$natural", -1)])
+        # Events written before `ts` existed: no stamped event is older than now
+        last_ts = latest.get("ts", SERVER_TIMESTAMP) if latest else None
+        self._tail_task = asyncio.create_task(self._tail(last_ts))
+
+    def publish(self, event_type: str, payload: Dict[str, Any]) -> None:
+        if self._outbox is None:
+            return
+        self._outbox.put_nowait({
+            "type": event_type,
+            "payload": payload,
+            "origin": PROCESS_ID,
+            "ts": SERVER_TIMESTAMP,
+        })
+
+    async def _write(self) -> None:
+        """Append queued events one at a time so they keep publish order."""
+        while True:
+            event = await self._outbox.get()
+            try:
+                await self._collection.insert_one(event)
+            except Exception as e:
+                print(f"WARNING: Event relay failed: {e}")
+            finally:
+                self._outbox.task_done()
+
+    async def _tail(self, last_ts: Optional[Timestamp]) -> None:
+        """Dispatch events other processes append to the collection."""
+        seen: Deque[Any] = deque(maxlen=TAIL_SEEN_LIMIT)
+        seen_ids: Set[Any] = set()
+        resuming = False
+        while True:
+            if last_ts is None:
+                query = {}
+            elif resuming:
+                start = max(last_ts.time - TAIL_RESUME_OVERLAP_SECONDS, 0)
+                query = {"ts": {"$gte": Timestamp(start, 0)}}
+            else:
+                query = {"ts": {"$gt": last_ts}}
+            resuming = True
+            try:
+                async for event in self._collection.find(
+                    query, cursor_type=CursorType.TAILABLE_AWAIT
+                ):
+                    if event["_id"] in seen_ids:
+                        continue
+                    if len(seen) == seen.maxlen:
+                        seen_ids.discard(seen[0])
+                    seen.append(event["_id"])
+                    seen_ids.add(event["_id"])
+                    ts = event.get("ts")
+                    if ts is not None and (last_ts is None or ts > last_ts):
+                        last_ts = ts
+                    if event.get("origin") != PROCESS_ID:
+                        _dispatch(event["type"], event["payload"])
+            except Exception as e:
+                print(f"WARNING: Event bus cursor failed: {e}")
+            # Tailable cursors end on an empty collection or after errors
+            await asyncio.sleep(TAIL_RETRY_SECONDS)
+
+    async def stop(self) -> None:
+        if self._outbox is not None:
+            # Give events published just before shutdown a moment to be written
+            try:
+                await asyncio.wait_for(self._outbox.join(), TAIL_RETRY_SECONDS)
+            except asyncio.TimeoutError:
+                print(f"WARNING: {self._outbox.qsize()} events were not relayed")
+        for task in (self._write_task, self._tail_task):
+            if task is not None:
+                task.cancel()
+        self._write_task = self._tail_task = None
+        self._outbox = None
+        self._collection = None
+
+
+BACKENDS = {"local": LocalBackend, "mongo": MongoBackend}
+
+_backend: LocalBackend = LocalBackend()
+
+
+def publish(event_type: str, payload: Dict[str, Any]) -> None:
+    """Announce an event to subscribers in this and (with `mongo`) other processes."""
+    _dispatch(event_type, payload)
+    _backend.publish(event_type, payload)
+
+
+async def start(backend: str = EVENT_BUS_BACKEND) -> None:
+    """Start the configured backend for this process.
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown event bus backend: {backend}")
+    _backend = BACKENDS[backend]()
+    await _backend.start()
+
+
+async def stop() -> None:
+    """Stop the backend and fall back to in-process delivery."""
+    global _backend
+    await _backend.stop()
+    _backend = LocalBackend()
@@ -0,0 +1,200 @@
+"""Request-scoped batch loaders for hydrating items and users.
+
+Routes that enrich a list of rows (swap requests, swap history, ...) used to
+await one `get_item`/`get_user_by_id` call per row. The loaders here collect
+the IDs a response needs, drop duplicates, and resolve them with a single
+`$in` query per collection. Results are cached for the lifetime of the
+request, so asking for the same item or user twice costs nothing. Keys that
+are already being fetched are awaited rather than fetched again, so
+concurrent `load_many` calls on one loader share queries.
+
+Only the fields listed in the projections are fetched; in particular user
+documents never include `password_hash` or `salt`.
+
+Usage:
+    loaders = loader_service.get_loaders(request)
+    items = await loaders.items.load_many(ids)   # {id: item or None}
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from database.connection import get_db
+
+
+# Item fields used by swap request/history responses
+ITEM_SUMMARY_FIELDS: Tuple[str, ...] = (
+    "id",
+    "title",
+    "images",
+    "owner_id",
+    "status",
+    "credits",
+    "category",
+    "size",
+    "condition",
+    "location",
+)
+
+# Public user fields used when showing the other party of a swap
+USER_SUMMARY_FIELDS: Tuple[str, ...] = ("id", "username", "full_name", "profile_pic")
+
+
+def _get_db_optional():
+    """Return database handle or None if not connected (test-friendly)."""
+    try:
+        return get_db()
+    except RuntimeError:
+        return None
+
+
+def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Convert MongoDB _id to id for API compatibility."""
+    if doc is None:
+        return None
+    if "_id" in doc:
+        doc["id"] = str(doc["_id"])
+        del doc["_id"]
+    return doc
+
+
+class BatchLoader:
+    """Deduplicating, caching loader for one collection.
+
+    Args:
+        collection_name: MongoDB collection to read from
+        fields: Fields to project (``_id`` is always included)
+    """
+
+    def __init__(self, collection_name: str, fields: Iterable[str]):
+        self.collection_name = collection_name
+        self.projection = {field: 1 for field in fields}
+        self._cache: Dict[str, Optional[Dict[str, Any]]] = {}
+        # Keys whose query is still running
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def prime(self, key: str, doc: Optional[Dict[str, Any]]) -> None:
+        """Seed the cache with a document the caller already has."""
+        if key:
+            self._cache[key] = doc
+
+    async def load(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Load a single document by id (None if it does not exist)."""
+        if not key:
+            return None
+        return (await self.load_many([key])).get(key)
+
+    async def load_many(
+        self, keys: Iterable[Optional[str]]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Load documents for all keys with at most one query.
+
+        Returns:
+            Mapping of each requested key to its document, or None if missing
+        """
+        wanted: List[str] = []
+        for key in keys:
+            if key and key not in wanted:
+                wanted.append(key)
+
+        # Taken before our own query so a failed one is not mistaken for missing
+        in_flight = [self._pending[key] for key in wanted if key in self._pending]
+        missing = [
+            key for key in wanted if key not in self._cache and key not in self._pending
+        ]
+        if missing:
+            await self._fetch(missing)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+        return {key: self._cache.get(key) for key in wanted}
+
+    async def _fetch(self, keys: List[str]) -> None:
+        """Resolve keys with one `$in` query and cache the results.
+
+        Each key has a future in `_pending` while the query runs; it is
+        resolved with the document (or None), or with the query's exception.
+        """
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        self._pending.update(futures)
+        try:
+            found = await self._query(keys)
+        except Exception as e:
+            for future in futures.values():
+                future.set_exception(e)
+                # Raised to whoever awaits it; don't also log it as unretrieved
+                future.exception()
+            raise
+        finally:
+            for key in keys:
+                self._pending.pop(key, None)
+
+        for key, future in futures.items():
+            self._cache[key] = found.get(key)
+            future.set_result(self._cache[key])
+
+    async def _query(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch the documents for keys with one `$in` query, keyed by requested key."""
+        db = _get_db_optional()
+        if db is None:
+            return {}
+
+        object_ids = [ObjectId(key) for key in keys if ObjectId.is_valid(key)]
+        string_ids = [key for key in keys if not ObjectId.is_valid(key)]
+        clauses = []
+        if object_ids:
+            clauses.append({"_id": {"$in": object_ids}})
+        if string_ids:
+            # Legacy documents identified by a string `id` field
+            clauses.append({"id": {"$in": string_ids}})
+        query = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+        cursor = db[self.collection_name].find(query, self.projection)
+        docs = await cursor.to_list(length=None)
+        requested = set(keys)
+        found: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            legacy_id = doc.get("id")
+            object_key = str(doc["_id"])
+            doc = _convert_id(doc)
+            if object_key in requested:
+                found[object_key] = doc
+            if legacy_id and legacy_id in requested:
+                found[legacy_id] = doc
+        return found
+
+
+class RequestLoaders:
+    """The set of loaders shared by everything handling one request."""
+
+    def __init__(self):
+        self.items = BatchLoader("items", ITEM_SUMMARY_FIELDS)
+        self.users = BatchLoader("users", USER_SUMMARY_FIELDS)
+
+
+def get_loaders(request: Any = None) -> RequestLoaders:
+    """Return the loaders attached to a request, creating them on first use.
+
+    Requests without a `state` attribute (e.g. test doubles) get a fresh set
+    of loaders that is not shared.
+    """
+    state = getattr(request, "state", None)
+    if state is None:
+        return RequestLoaders()
+    loaders = getattr(state, "loaders", None)
+    if loaders is None:
+        loaders = RequestLoaders()
+        state.loaders = loaders
+    return loaders
+
+
+def user_summary(user: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Public id/username/full_name shape used in swap responses."""
+    if not user:
+        return None
+    return {
+        "id": user.get("id"),
+        "username": user.get("username", "Unknown"),
+        "full_name": user.get("full_name"),
+    }
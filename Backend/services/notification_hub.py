@@ -0,0 +1,92 @@
+"""In-process fan-out of notification events to connected clients.
+
+Every open `/notifications/stream` connection registers a bounded queue for
+its user. `publish` pushes an event onto each of that user's queues without
+waiting, so writers never block on slow clients. A client that falls too far
+behind has its queue replaced by a single OVERFLOW event, which ends its
+stream; EventSource then reconnects with `Last-Event-ID` and the missed
+notifications are replayed.
+
+Events arrive through the event bus (`notification.created` and
+`notification.unread_count`), so with a cross-process bus backend a stream
+served by one worker also sees notifications created by another.
+
+Event shapes:
+    {"type": "notification", "notification": {...}, "unread_count": int}
+    {"type": "unread_count", "unread_count": int}
+    {"type": "overflow"}
+"""
+
+import asyncio
+from typing import Any, Dict, Set
+
+from services import event_bus
+
+
+# Events buffered per connection before its stream is closed
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Last event a connection that fell behind receives; its stream should end
+OVERFLOW = {"type": "overflow"}
+
+_subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+
+def subscribe(user_id: str) -> asyncio.Queue:
+    """Register a new connection for a user and return its event queue."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    _subscribers.setdefault(user_id, set()).add(queue)
+    return queue
+
+
+def unsubscribe(user_id: str, queue: asyncio.Queue) -> None:
+    """Remove a connection's queue (safe to call more than once)."""
+    queues = _subscribers.get(user_id)
+    if not queues:
+        return
+    queues.discard(queue)
+    if not queues:
+        del _subscribers[user_id]
+
+
+def has_subscribers(user_id: str) -> bool:
+    """Return True if the user has at least one open stream in this process."""
+    return bool(_subscribers.get(user_id))
+
+
+def publish(user_id: str, event: Dict[str, Any]) -> None:
+    """Deliver an event to every open stream of a user.
+
+    A full queue is emptied and left holding only OVERFLOW, and stops
+    receiving events, so its stream closes and the client replays the gap
+    when it reconnects.
+    """
+    for queue in list(_subscribers.get(user_id, ())):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(OVERFLOW)
+            unsubscribe(user_id, queue)
+            continue
+        queue.put_nowait(event)
+
+
+def _on_notification_created(payload: Dict[str, Any]) -> None:
+    """Forward a `notification.created` bus event to the recipient's streams."""
+    publish(payload["user_id"], {
+        "type": "notification",
+        "notification": payload["notification"],
+        "unread_count": payload["unread_count"],
+    })
+
+
+def _on_unread_count(payload: Dict[str, Any]) -> None:
+    """Forward a `notification.unread_count` bus event to the user's streams."""
+    publish(payload["user_id"], {
+        "type": "unread_count",
+        "unread_count": payload["unread_count"],
+    })
+
+
+event_bus.subscribe(event_bus.NOTIFICATION_CREATED, _on_notification_created)
+event_bus.subscribe(event_bus.NOTIFICATION_UNREAD_COUNT, _on_unread_count)
@@ -0,0 +1,148 @@
+"""Background delivery of notifications through a durable outbox.
+
+Swap actions used to await `notification_service.create_notification`
+before responding: message lookups, the notification insert, the unread
+counter update and the push to open streams. Instead, `enqueue_notification`
+now writes one small entry to the `notification_outbox` collection and hands
+it to an in-process worker, so the response only waits for that insert.
+
+The worker delivers each entry with `create_notification`, passing the
+outbox entry's `_id` as the notification ID, and then deletes the entry.
+Delivering the same entry twice is therefore harmless. Entries left behind
+by a crash, or by a failed delivery, are retried by the recovery sweep once
+they are older than OUTBOX_RECOVERY_SECONDS.
+
+When no worker runs in this process (scripts, tests), notifications are
+delivered inline.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+
+from database.connection import get_db
+from services import notification_service
+
+
+# Outbox entries older than this are presumed orphaned and redelivered
+OUTBOX_RECOVERY_SECONDS = 60
+
+# Seconds the worker waits for pending deliveries on shutdown
+OUTBOX_DRAIN_SECONDS = 5
+
+_queue: Optional[asyncio.Queue] = None
+
+
+async def enqueue_notification(
+    user_id: str,
+    event_type: str,
+    request_id: str,
+    item_id: str,
+    message: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Queue a notification for background delivery.
+
+    Takes the same arguments as `notification_service.create_notification`.
+    Pass `item_title`/`other_user_name` in metadata when you have them so the
+    worker doesn't have to look them up.
+    """
+    entry = {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "event_type": event_type,
+        "request_id": request_id,
+        "item_id": item_id,
+        "message": message,
+        "metadata": metadata or {},
+        "created_at": datetime.now().isoformat(),
+    }
+
+    if _queue is None:
+        # No background worker in this process: deliver inline
+        await _deliver(entry, from_outbox=False)
+        return
+
+    db = get_db()
+    await db["notification_outbox"].insert_one(entry)
+    _queue.put_nowait(entry)
+
+
+async def _deliver(entry: Dict[str, Any], from_outbox: bool = True) -> None:
+    """Create the notification for an outbox entry, then remove the entry."""
+    await notification_service.create_notification(
+        user_id=entry["user_id"],
+        event_type=entry["event_type"],
+        request_id=entry["request_id"],
+        item_id=entry["item_id"],
+        message=entry.get("message"),
+        metadata=entry.get("metadata"),
+        notification_id=entry["_id"] if from_outbox else None,
+    )
+    if from_outbox:
+        db = get_db()
+        await db["notification_outbox"].delete_one({"_id": entry["_id"]})
+
+
+async def recover_outbox() -> int:
+    """Redeliver outbox entries older than OUTBOX_RECOVERY_SECONDS.
+
+    Returns:
+        Number of entries delivered
+    """
+    db = get_db()
+    cutoff = ObjectId.from_datetime(
+        datetime.now(timezone.utc) - timedelta(seconds=OUTBOX_RECOVERY_SECONDS)
+    )
+    delivered = 0
+    async for entry in db["notification_outbox"].find({"_id": {"$lt": cutoff}}):
+        try:
+            await _deliver(entry)
+            delivered += 1
+        except Exception as e:
+            print(f"WARNING: Redelivery of notification {entry['_id']} failed: {e}")
+    return delivered
+
+
+async def _run_worker(queue: asyncio.Queue) -> None:
+    """Deliver queued entries, sweeping the outbox whenever the queue is idle."""
+    while True:
+        try:
+            entry = await asyncio.wait_for(queue.get(), OUTBOX_RECOVERY_SECONDS)
+        except asyncio.TimeoutError:
+            try:
+                await recover_outbox()
+            except Exception as e:
+                print(f"WARNING: Notification outbox recovery failed: {e}")
+            continue
+        try:
+            await _deliver(entry)
+        except Exception as e:
+            # Left in the outbox; the recovery sweep retries it
+            print(f"WARNING: Delivery of notification {entry['_id']} failed: {e}")
+        finally:
+            queue.task_done()
+
+
+def start_worker() -> asyncio.Task:
+    """Start the background delivery worker for this process."""
+    global _queue
+    _queue = asyncio.Queue()
+    return asyncio.create_task(_run_worker(_queue))
+
+
+async def stop_worker(task: asyncio.Task) -> None:
+    """Give queued deliveries a moment to finish, then stop the worker.
+
+    Anything still queued stays in the outbox and is recovered later.
+    """
+    global _queue
+    queue, _queue = _queue, None
+    if queue is not None:
+        try:
+            await asyncio.wait_for(queue.join(), OUTBOX_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    task.cancel()
@@ -0,0 +1,306 @@
+"""Retention for the `notifications` collection.
+
+Keeps the hot collection small so listing, sync and streaming only ever
+touch recent notifications:
+
+1. Read notifications expire through a TTL index on `read_date`, a BSON
+   date set when a notification is marked as read (`read_at` is an ISO
+   string, which TTL indexes ignore). The age comes from
+   NOTIFICATION_READ_TTL_DAYS.
+2. Unread notifications older than NOTIFICATION_ARCHIVE_AFTER_DAYS are
+   moved by `compact_notifications` into per-user archive documents in
+   `notification_archives` and no longer count towards the unread badge.
+   Each user's archive is split into buckets of at most ARCHIVE_BUCKET_SIZE
+   notifications so no single document approaches the 16MB limit.
+
+Archived notifications are read back, newest first, with
+`get_archived_notifications`.
+
+Run compaction from the Backend directory:
+    python -m services.notification_retention
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from config_defaults.constants import NOTIFICATION_ARCHIVE_AFTER_DAYS, NOTIFICATION_READ_TTL_DAYS
+from database.connection import get_db, run_in_transaction
+from services import event_bus, notification_service
+from utils.pagination import decode_cursor, encode_cursor
+
+
+# Maximum notifications stored in one archive document
+ARCHIVE_BUCKET_SIZE = 200
+
+# Old unread notifications read from the hot collection per round trip
+COMPACTION_BATCH_SIZE = 1000
+
+# Server error code for an existing index with different options
+INDEX_OPTIONS_CONFLICT = 85
+
+READ_TTL_INDEX = "read_ttl"
+
+RETENTION_INDEXES = [
+    IndexModel(
+        [("read_date", ASCENDING)],
+        name=READ_TTL_INDEX,
+        expireAfterSeconds=NOTIFICATION_READ_TTL_DAYS * 86400,
+    ),
+    # Lets compaction find old unread notifications without a collection scan
+    IndexModel(
+        [("created_at", ASCENDING)],
+        name="unread_created",
+        partialFilterExpression={"read": False},
+    ),
+]
+
+ARCHIVE_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("oldest_created_at", DESCENDING)], name="user_oldest"),
+]
+
+
+async def ensure_retention_indexes() -> None:
+    """Create the TTL, compaction and archive indexes (idempotent).
+
+    If NOTIFICATION_READ_TTL_DAYS changed since the TTL index was built, the
+    index is updated in place with `collMod` instead of being rebuilt.
+    """
+    db = get_db()
+    try:
+        await db["notifications"].create_indexes(RETENTION_INDEXES)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        await db.command(
+            "collMod",
+            "notifications",
+            index={"name": READ_TTL_INDEX, "expireAfterSeconds": NOTIFICATION_READ_TTL_DAYS * 86400},
+        )
+        await db["notifications"].create_indexes(RETENTION_INDEXES[1:])
+    await db["notification_archives"].create_indexes(ARCHIVE_INDEXES)
+
+
+def _convert_id(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert MongoDB _id to id for API compatibility."""
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+async def backfill_notification_read_dates() -> int:
+    """Set `read_date` on notifications read before it existed, so they can expire.
+
+    Returns:
+        Number of notifications updated
+    """
+    db = get_db()
+    result = await db["notifications"].update_many(
+        {"read": True, "read_date": {"$exists": False}},
+        [{"$set": {"read_date": {"$dateFromString": {
+            "dateString": "$read_at", "onError": "$$NOW", "onNull": "$$NOW"
+        }}}}],
+    )
+    return result.modified_count
+
+
+async def _archive_user_notifications(
+    db, user_id: str, notifications: List[Dict[str, Any]]
+) -> int:
+    """Move one user's notifications into their archive buckets.
+
+    Returns:
+        Number of notifications removed from the hot collection
+    """
+    async def operation(session):
+        for start in range(0, len(notifications), ARCHIVE_BUCKET_SIZE):
+            chunk = notifications[start:start + ARCHIVE_BUCKET_SIZE]
+            # Append to a bucket with room for the whole chunk, or start a new one
+            await db["notification_archives"].update_one(
+                {"user_id": user_id, "count": {"$lte": ARCHIVE_BUCKET_SIZE - len(chunk)}},
+                {
+                    "$push": {"notifications": {"$each": chunk}},
+                    "$inc": {"count": len(chunk)},
+                    "$min": {"oldest_created_at": chunk[0]["created_at"]},
+                    "$max": {"newest_created_at": chunk[-1]["created_at"]},
+                },
+                upsert=True,
+                session=session,
+            )
+        result = await db["notifications"].delete_many(
+            {"_id": {"$in": [n["_id"] for n in notifications]}, "read": False},
+            session=session,
+        )
+        return result.deleted_count
+
+    return await run_in_transaction(operation, client=db.client)
+
+
+async def compact_notifications(
+    older_than_days: int = NOTIFICATION_ARCHIVE_AFTER_DAYS,
+    batch_size: int = COMPACTION_BATCH_SIZE,
+) -> Dict[str, int]:
+    """Move unread notifications older than `older_than_days` into the archive.
+
+    Archive writes and the matching deletes run in one transaction per user
+    where the deployment supports it. Affected users get their unread
+    counter recounted afterwards.
+
+    Args:
+        older_than_days: Age after which unread notifications are archived
+        batch_size: Notifications read from the hot collection per round trip
+
+    Returns:
+        Summary with `archived` notifications and `users` affected
+    """
+    db = get_db()
+    cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+    summary = {"archived": 0, "users": 0}
+
+    while True:
+        batch = await (
+            db["notifications"]
+            .find({"read": False, "created_at": {"$lt": cutoff}})
+            .sort("created_at", ASCENDING)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for notification in batch:
+            by_user.setdefault(notification["user_id"], []).append(notification)
+
+        archived = 0
+        for user_id, notifications in by_user.items():
+            archived += await _archive_user_notifications(db, user_id, notifications)
+            unread_count = await notification_service.repair_unread_count(user_id)
+            event_bus.publish(event_bus.NOTIFICATION_UNREAD_COUNT, {
+                "user_id": user_id,
+                "unread_count": unread_count or 0,
+            })
+        summary["archived"] += archived
+        summary["users"] += len(by_user)
+        if archived == 0 or len(batch) < batch_size:
+            # Nothing left to move (or every row was read in the meantime)
+            break
+
+    return summary
+
+
+async def _archive_page_floor(
+    db, bucket_match: Dict[str, Any], after: Optional[str], needed: int
+) -> Optional[str]:
+    """Return the oldest `created_at` a page of `needed` archived notifications can reach.
+
+    Walks the user's bucket headers (without their notifications), newest
+    bucket first, until the buckets entirely older than the cursor hold
+    `needed` notifications. Every notification on the page is at least as
+    new as the last of those buckets' `oldest_created_at`.
+
+    Returns:
+        The floor, or None if the whole archive is needed
+    """
+    headers = (
+        db["notification_archives"]
+        .find(bucket_match, {"count": 1, "oldest_created_at": 1, "newest_created_at": 1})
+        .sort("oldest_created_at", DESCENDING)
+    )
+    found = 0
+    async for bucket in headers:
+        # A bucket straddling the cursor may hold rows already served
+        if after is None or bucket["newest_created_at"] < after:
+            found += bucket["count"]
+        if found >= needed:
+            return bucket["oldest_created_at"]
+    return None
+
+
+async def get_archived_notifications(
+    user_id: str, limit: int = 50, cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get one page of a user's archived notifications, newest first.
+
+    Only the buckets that can hold the page are unwound: the newest buckets
+    by `oldest_created_at` that together cover the page, plus any older
+    bucket whose range overlaps theirs (a bucket with room can be appended
+    to after a newer one was started).
+
+    Args:
+        user_id: The user ID to get archived notifications for
+        limit: Maximum number of notifications to return
+        cursor: Opaque cursor from the previous page's `next_cursor`
+
+    Returns:
+        Dict with `notifications`, `next_cursor` and `has_more`
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    db = get_db()
+
+    bucket_match: Dict[str, Any] = {"user_id": user_id}
+    entry_match: Dict[str, Any] = {}
+    after = None
+    if cursor:
+        after_row = decode_cursor(cursor)
+        after = after_row.get("k")
+        # Buckets that start after the cursor hold nothing older than it
+        bucket_match["oldest_created_at"] = {"$lte": after}
+        entry_match = {"$or": [
+            {"created_at": {"$lt": after}},
+            {"created_at": after, "_id": {"$lt": after_row["id"]}},
+        ]}
+
+    # Fetch one extra row to know whether another page exists
+    floor = await _archive_page_floor(db, bucket_match, after, limit + 1)
+    if floor is not None:
+        bucket_match = {**bucket_match, "newest_created_at": {"$gte": floor}}
+        entry_match = {"$and": [entry_match, {"created_at": {"$gte": floor}}]} if entry_match else {
+            "created_at": {"$gte": floor}
+        }
+
+    pipeline = [
+        {"$match": bucket_match},
+        {"$unwind": "$notifications"},
+        {"$replaceRoot": {"newRoot": "$notifications"}},
+    ]
+    if entry_match:
+        pipeline.append({"$match": entry_match})
+    pipeline += [
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$limit": limit + 1},
+    ]
+    docs = await db["notification_archives"].aggregate(pipeline).to_list(length=limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1], "created_at") if has_more else None
+
+    return {
+        "notifications": [_convert_id(n) for n in docs],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+async def _main():
+    """Connect, compact and print the run summary."""
+    from database.connection import connect_db, close_db
+
+    await connect_db()
+    try:
+        await ensure_retention_indexes()
+        summary = await compact_notifications()
+        print(
+            f"Archived {summary['archived']} notification(s) "
+            f"for {summary['users']} user(s)"
+        )
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -3,12 +3,51 @@
 This service creates, retrieves, and manages notification records stored in the database.
 """
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from database.connection import get_db
+from services import event_bus
 from services.storage_service import get_item
 from services.user_service import get_user_by_id
 
+from utils.pagination import decode_cursor, encode_cursor
+
+# Maximum number of missed notifications replayed when a stream resumes
+RESUME_BATCH_LIMIT = 100
+
+# Maximum number of notifications returned by one sync call
+SYNC_BATCH_LIMIT = 100
+
+# Writers stamp `updated_at` before their write commits, so a change can
+# become visible after a later-stamped one. Each sync re-scans this far
+# behind its cursor to pick such changes up.
+SYNC_OVERLAP_SECONDS = 30
+
+# Changes inside the overlap window a cursor remembers as already delivered.
+# Cursors travel in a query string, so this keeps them to a few KB; past it
+# the cursor keeps a keyset floor instead (see _sync_cursor).
+SYNC_SEEN_LIMIT = 50
+
+# Event types whose message names the other user (see _build_message)
+NAMED_EVENT_TYPES = {"new_request", "request_cancelled"}
+
+# Notifications are listed newest first and synced by last change
+NOTIFICATION_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_desc"),
+    IndexModel(
+        [("user_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)],
+        name="user_updated",
+    ),
+]
+
+
+async def ensure_notification_indexes() -> None:
+    """Create the notification indexes (idempotent)."""
+    db = get_db()
+    await db["notifications"].create_indexes(NOTIFICATION_INDEXES)
+
 
 def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     """Convert MongoDB _id to id for API compatibility."""
@@ -20,45 +59,94 @@ def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     return doc
 
 
+async def backfill_notification_updated_at() -> int:
+    """Set `updated_at` on notifications created before it existed.
+
+    Uses `read_at` for notifications already read, otherwise `created_at`.
+
+    Returns:
+        Number of notifications updated
+    """
+    db = get_db()
+    result = await db["notifications"].update_many(
+        {"updated_at": {"$exists": False}},
+        [{"$set": {"updated_at": {"$ifNull": ["$read_at", "$created_at"]}}}],
+    )
+    return result.modified_count
+
+
+async def _fill_display_fields(
+    event_type: str,
+    item_id: str,
+    metadata: Dict[str, Any]
+) -> None:
+    """Look up item_title/other_user_name only when the caller didn't pass them.
+
+    The other user's name is only looked up for messages that show it.
+    """
+    if "item_title" not in metadata:
+        item = await get_item(item_id)
+        metadata["item_title"] = item.get("title", "Unknown Item") if item else "Unknown Item"
+    if (
+        event_type in NAMED_EVENT_TYPES
+        and "other_user_name" not in metadata
+        and metadata.get("other_user_id")
+    ):
+        other_user = await get_user_by_id(metadata["other_user_id"])
+        metadata["other_user_name"] = (
+            other_user.get("username", "Someone") if other_user else "Someone"
+        )
+
+
+def _build_message(event_type: str, metadata: Dict[str, Any]) -> str:
+    """Generate the notification text for a swap event."""
+    item_title = metadata.get("item_title", "Unknown Item")
+    other_user_name = metadata.get("other_user_name", "Someone")
+    if event_type == "new_request":
+        return f'New swap request for "{item_title}" from {other_user_name}'
+    if event_type == "approved":
+        return f'Your swap request for "{item_title}" was approved!'
+    if event_type == "rejected":
+        return f'Your swap request for "{item_title}" was rejected'
+    if event_type == "request_cancelled":
+        return f'{other_user_name} cancelled their swap request for "{item_title}"'
+    return f"Swap event: {event_type}"
+
+
 async def create_notification(
     user_id: str,
     event_type: str,
     request_id: str,
     item_id: str,
     message: Optional[str] = None,
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None,
+    notification_id: Optional[ObjectId] = None
 ) -> Dict[str, Any]:
     """Create a new notification record.
     
+    Pass `item_title` and `other_user_name` in metadata when you already have
+    them; they are only looked up when missing.
+    
     Args:
         user_id: The user who should receive this notification
-        event_type: Type of event ("new_request", "approved", "rejected")
+        event_type: Type of event ("new_request", "approved", "rejected", "request_cancelled")
         request_id: The swap request ID associated with this notification
         item_id: The item ID associated with this notification
         message: Optional custom message (will be generated if not provided)
         metadata: Optional additional metadata (item_title, other_user_id, etc.)
+        notification_id: Optional fixed ID; creating the same ID twice is a no-op
     
     Returns:
         The created notification document
     """
     db = get_db()
     notifications_collection = db["notifications"]
+    metadata = dict(metadata or {})
     
     # Generate message if not provided
     if not message:
-        item = await get_item(item_id)
-        item_title = item.get("title", "Unknown Item") if item else "Unknown Item"
-        
-        if event_type == "new_request":
-            requester = await get_user_by_id(metadata.get("other_user_id") if metadata else None)
-            requester_name = requester.get("username", "Someone") if requester else "Someone"
-            message = f'New swap request for "{item_title}" from {requester_name}'
-        elif event_type == "approved":
-            message = f'Your swap request for "{item_title}" was approved!'
-        elif event_type == "rejected":
-            message = f'Your swap request for "{item_title}" was rejected'
-        else:
-            message = f"Swap event: {event_type}"
+        await _fill_display_fields(event_type, item_id, metadata)
+        message = _build_message(event_type, metadata)
     
     notification = {
         "user_id": user_id,
@@ -67,13 +155,177 @@ async def create_notification(
         "item_id": item_id,
         "message": message,
         "read": False,
-        "created_at": datetime.now().isoformat(),
-        **(metadata or {})
+        **metadata
     }
+    # Every change bumps updated_at so /notifications/sync can find it
+    notification["created_at"] = notification["updated_at"] = datetime.now().isoformat()
+    if notification_id is not None:
+        notification["_id"] = notification_id
     
-    result = await notifications_collection.insert_one(notification)
+    try:
+        result = await notifications_collection.insert_one(notification)
+    except DuplicateKeyError:
+        # Already inserted (e.g. an outbox entry replayed after a crash). The
+        # crash may have come before the counter update, so recount instead
+        # of incrementing; the recount is right either way.
+        existing = _convert_id(
+            await notifications_collection.find_one({"_id": notification_id})
+        )
+        if existing is not None and not existing.get("read"):
+            _publish_notification(existing, await repair_unread_count(user_id))
+        return existing
     notification["_id"] = result.inserted_id
-    return _convert_id(notification)
+    notification = _convert_id(notification)
+    unread_count = await _adjust_unread_count(user_id, 1)
+    _publish_notification(notification, unread_count)
+    return notification
+
+
+def _user_query(user_id: str) -> Dict[str, Any]:
+    """Build the users-collection filter for an ID (ObjectId or legacy string)."""
+    if ObjectId.is_valid(user_id):
+        return {"_id": ObjectId(user_id)}
+    return {"id": user_id}
+
+
+async def _adjust_unread_count(user_id: str, delta: int) -> Optional[int]:
+    """Atomically add `delta` to the user's unread counter (never below zero).
+
+    Users created before the counter existed are initialised from a count
+    of their unread notifications instead.
+
+    Returns:
+        The new unread count, or None if the user document doesn't exist
+    """
+    db = get_db()
+    users_collection = db["users"]
+
+    user = await users_collection.find_one_and_update(
+        {**_user_query(user_id), "unread_notifications": {"$exists": True}},
+        [{"$set": {"unread_notifications": {"$max": [
+            0, {"$add": ["$unread_notifications", delta]}
+        ]}}}],
+        projection={"unread_notifications": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if user is not None:
+        return user["unread_notifications"]
+    return await repair_unread_count(user_id)
+
+
+async def repair_unread_count(user_id: str) -> Optional[int]:
+    """Recount a user's unread notifications and store the counter.
+
+    Returns:
+        The recounted unread count, or None if the user document doesn't exist
+    """
+    db = get_db()
+    count = await db["notifications"].count_documents({
+        "user_id": user_id,
+        "read": False
+    })
+    result = await db["users"].update_one(
+        _user_query(user_id),
+        {"$set": {"unread_notifications": count}}
+    )
+    return count if result.matched_count else None
+
+
+async def sync_unread_notification_counts() -> int:
+    """Rebuild every user's `unread_notifications` counter from notifications.
+
+    Counts unread notifications per user with one aggregation and writes the
+    counters back with a single bulk write. Use this to repair drift, e.g.
+    after a crash between a notification write and its counter update.
+
+    Returns:
+        Number of user documents whose counter was changed
+    """
+    db = get_db()
+    pipeline = [
+        {"$match": {"read": False}},
+        {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+    ]
+    counts = await db["notifications"].aggregate(pipeline).to_list(length=None)
+
+    operations = []
+    object_ids, string_ids = [], []
+    for row in counts:
+        user_id = row["_id"]
+        if not user_id:
+            continue
+        if ObjectId.is_valid(user_id):
+            object_ids.append(ObjectId(user_id))
+        else:
+            string_ids.append(user_id)
+        operations.append(
+            UpdateOne(_user_query(user_id), {"$set": {"unread_notifications": row["count"]}})
+        )
+
+    # Users with no unread notifications left get their counter reset to zero
+    operations.append(
+        UpdateMany(
+            {
+                "unread_notifications": {"$ne": 0},
+                "_id": {"$nin": object_ids},
+                "id": {"$nin": string_ids},
+            },
+            {"$set": {"unread_notifications": 0}},
+        )
+    )
+
+    result = await db["users"].bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+def _publish_notification(notification: Dict[str, Any], unread_count: Optional[int]) -> None:
+    """Announce a new notification (pushed to the recipient's open streams)."""
+    event_bus.publish(event_bus.NOTIFICATION_CREATED, {
+        "user_id": notification["user_id"],
+        "notification": notification,
+        "unread_count": unread_count or 0,
+    })
+
+
+def _publish_unread_count(user_id: str, unread_count: Optional[int]) -> None:
+    """Announce the user's current unread count (pushed to their open streams)."""
+    event_bus.publish(event_bus.NOTIFICATION_UNREAD_COUNT, {
+        "user_id": user_id,
+        "unread_count": unread_count or 0,
+    })
+
+
+async def get_notifications_after(
+    user_id: str,
+    last_id: str,
+    limit: int = RESUME_BATCH_LIMIT
+) -> List[Dict[str, Any]]:
+    """Get notifications created after the given notification ID (oldest first).
+
+    Used to replay what a client missed while its stream was disconnected.
+    Notification IDs are ObjectIds, so they increase with creation time.
+
+    Args:
+        user_id: The user ID to get notifications for
+        last_id: ID of the last notification the client has seen
+        limit: Maximum number of notifications to replay
+
+    Returns:
+        List of notification documents, oldest first (empty if last_id is invalid)
+    """
+    if not ObjectId.is_valid(last_id):
+        return []
+
+    db = get_db()
+    notifications_collection = db["notifications"]
+
+    cursor = notifications_collection.find({
+        "user_id": user_id,
+        "_id": {"$gt": ObjectId(last_id)}
+    }).sort("_id", 1).limit(limit)
+    notifications = await cursor.to_list(length=limit)
+
+    return [_convert_id(n) for n in notifications]
 
 
 async def get_user_notifications(
@@ -105,16 +357,175 @@ async def get_user_notifications(
 
 
 async def get_unread_count(user_id: str) -> int:
-    """Get the count of unread notifications for a user."""
+    """Get the count of unread notifications for a user.
+
+    Reads the `unread_notifications` counter from the user document (one
+    point read). Users without the counter yet get it initialised.
+    """
     db = get_db()
-    notifications_collection = db["notifications"]
+    users_collection = db["users"]
     
-    count = await notifications_collection.count_documents({
+    user = await users_collection.find_one(
+        _user_query(user_id),
+        {"unread_notifications": 1}
+    )
+    if user is None:
+        return 0
+    if "unread_notifications" not in user:
+        return await repair_unread_count(user_id) or 0
+    return user["unread_notifications"]
+
+
+def _read_update() -> Dict[str, Any]:
+    """Fields set when a notification is marked as read.
+
+    `read_date` is a BSON date for the retention TTL index.
+    """
+    now = datetime.now().isoformat()
+    return {
+        "read": True,
+        "read_at": now,
+        "updated_at": now,
+        "read_date": datetime.now(timezone.utc),
+    }
+
+
+def _sync_window_start(high_water: str) -> str:
+    """`updated_at` value SYNC_OVERLAP_SECONDS before a cursor's high-water mark."""
+    try:
+        start = datetime.fromisoformat(high_water) - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    return start.isoformat()
+
+
+def _sync_cursor(
+    latest: Dict[str, Any],
+    delivered: List[List[str]],
+    floor: Optional[List[str]] = None,
+) -> str:
+    """Cursor at `latest` that remembers the changes delivered in its overlap window.
+
+    Only the newest SYNC_SEEN_LIMIT `[id, updated_at]` pairs are kept. When
+    more were delivered inside the window (e.g. a mark-all-read), the cursor
+    stores the newest dropped pair as a keyset `floor` and later syncs start
+    after it, so nothing is delivered twice; a change stamped at or below the
+    floor that commits late is then missed.
+    """
+    window_start = _sync_window_start(latest["updated_at"])
+    in_window = sorted(
+        (pair for pair in delivered if pair[1] >= window_start),
+        key=lambda pair: (pair[1], pair[0]),
+    )
+    if len(in_window) > SYNC_SEEN_LIMIT:
+        dropped = in_window[-SYNC_SEEN_LIMIT - 1]
+        if floor is None or (dropped[1], dropped[0]) > (floor[1], floor[0]):
+            floor = dropped
+    if floor is not None and floor[1] < window_start:
+        floor = None
+    extra: Dict[str, Any] = {"seen": in_window[-SYNC_SEEN_LIMIT:]}
+    if floor is not None:
+        extra["floor"] = floor
+    return encode_cursor(latest, "updated_at", **extra)
+
+
+def _sync_query(user_id: str, high_water: str, floor: Optional[List[str]]) -> Dict[str, Any]:
+    """Changes in a cursor's overlap window that sort after its keyset floor."""
+    query: Dict[str, Any] = {
         "user_id": user_id,
-        "read": False
-    })
-    
-    return count
+        "updated_at": {"$gte": _sync_window_start(high_water)},
+    }
+    if floor:
+        floor_id = ObjectId(floor[0]) if ObjectId.is_valid(floor[0]) else floor[0]
+        query["$or"] = [
+            {"updated_at": {"$gt": floor[1]}},
+            {"updated_at": floor[1], "_id": {"$gt": floor_id}},
+        ]
+    return query
+
+
+async def sync_notifications(
+    user_id: str,
+    since: Optional[str] = None,
+    limit: int = SYNC_BATCH_LIMIT
+) -> Dict[str, Any]:
+    """Get notifications created or changed since a sync cursor.
+
+    Without a cursor this returns the newest `limit` notifications and a
+    cursor positioned at the user's most recent change. With a cursor it
+    returns notifications changed after the cursor's position (oldest change
+    first). `updated_at` is stamped before a write commits, so the query
+    starts SYNC_OVERLAP_SECONDS before that position and skips the changes
+    the cursor records as delivered; a change that commits late is still
+    returned by the next sync (unless a burst of changes pushed the cursor's
+    floor past it, see _sync_cursor). Deletions are not reported; clients
+    drop deleted notifications locally.
+
+    Args:
+        user_id: The user ID to sync notifications for
+        since: Opaque cursor returned by the previous sync
+        limit: Maximum number of notifications to return
+
+    Returns:
+        Dict with `notifications`, `unread_count`, `cursor` and `has_more`
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    db = get_db()
+    notifications_collection = db["notifications"]
+
+    if since:
+        after = decode_cursor(since)
+        high_water = after.get("k")
+        seen = [list(pair) for pair in after.get("seen", [])]
+        floor = after.get("floor")
+        if floor is not None and (not isinstance(floor, list) or len(floor) != 2):
+            raise ValueError("Invalid cursor")
+        delivered = {tuple(pair) for pair in seen}
+        query = _sync_query(user_id, high_water, floor)
+        # Enough rows to find `limit` undelivered changes past the seen ones
+        fetch = limit + len(delivered) + 1
+        cursor = notifications_collection.find(query).sort(
+            [("updated_at", 1), ("_id", 1)]
+        ).limit(fetch)
+        candidates = await cursor.to_list(length=fetch)
+        changed = [
+            n for n in candidates if (str(n["_id"]), n.get("updated_at")) not in delivered
+        ]
+        has_more = len(changed) > limit
+        notifications = changed[:limit]
+        if notifications:
+            latest = max(
+                [notifications[-1], {"_id": after["id"], "updated_at": high_water}],
+                key=lambda n: n["updated_at"],
+            )
+            seen += [[str(n["_id"]), n["updated_at"]] for n in notifications]
+            next_cursor = _sync_cursor(latest, seen, floor)
+        else:
+            next_cursor = since
+    else:
+        cursor = notifications_collection.find({"user_id": user_id}).sort(
+            "created_at", -1
+        ).limit(limit)
+        notifications = await cursor.to_list(length=limit)
+        latest = await notifications_collection.find_one(
+            {"user_id": user_id, "updated_at": {"$exists": True}},
+            sort=[("updated_at", -1), ("_id", -1)],
+        )
+        has_more = False
+        delivered = sorted(
+            ([str(n["_id"]), n["updated_at"]] for n in notifications if n.get("updated_at")),
+            key=lambda pair: pair[1],
+        )
+        next_cursor = _sync_cursor(latest, delivered) if latest else None
+
+    return {
+        "notifications": [_convert_id(n) for n in notifications],
+        "unread_count": await get_unread_count(user_id),
+        "cursor": next_cursor,
+        "has_more": has_more,
+    }
 
 
 async def mark_notification_as_read(notification_id: str, user_id: str) -> bool:
@@ -130,25 +541,24 @@ async def mark_notification_as_read(notification_id: str, user_id: str) -> bool:
     db = get_db()
     notifications_collection = db["notifications"]
     
-    try:
-        result = await notifications_collection.update_one(
-            {
-                "_id": ObjectId(notification_id),
-                "user_id": user_id  # Security: ensure user can only mark their own notifications
-            },
-            {"$set": {"read": True, "read_at": datetime.now().isoformat()}}
-        )
-        return result.matched_count > 0
-    except Exception:
-        # If ObjectId conversion fails, try with string id
-        result = await notifications_collection.update_one(
-            {
-                "id": notification_id,
-                "user_id": user_id
-            },
-            {"$set": {"read": True, "read_at": datetime.now().isoformat()}}
-        )
-        return result.matched_count > 0
+    if ObjectId.is_valid(notification_id):
+        query = {"_id": ObjectId(notification_id)}
+    else:
+        # Legacy notifications keyed by a string id
+        query = {"id": notification_id}
+    query["user_id"] = user_id  # Security: ensure user can only mark their own notifications
+    
+    previous = await notifications_collection.find_one_and_update(
+        query,
+        {"$set": _read_update()},
+        projection={"read": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        return False
+    if not previous.get("read"):
+        _publish_unread_count(user_id, await _adjust_unread_count(user_id, -1))
+    return True
 
 
 async def mark_all_as_read(user_id: str) -> int:
@@ -165,8 +575,11 @@ async def mark_all_as_read(user_id: str) -> int:
     
     result = await notifications_collection.update_many(
         {"user_id": user_id, "read": False},
-        {"$set": {"read": True, "read_at": datetime.now().isoformat()}}
+        {"$set": _read_update()}
     )
+    if result.modified_count:
+        unread_count = await _adjust_unread_count(user_id, -result.modified_count)
+        _publish_unread_count(user_id, unread_count)
     
     return result.modified_count
 
@@ -184,18 +597,21 @@ async def delete_notification(notification_id: str, user_id: str) -> bool:
     db = get_db()
     notifications_collection = db["notifications"]
     
-    try:
-        result = await notifications_collection.delete_one({
-            "_id": ObjectId(notification_id),
-            "user_id": user_id
-        })
-        return result.deleted_count > 0
-    except Exception:
-        result = await notifications_collection.delete_one({
-            "id": notification_id,
-            "user_id": user_id
-        })
-        return result.deleted_count > 0
+    if ObjectId.is_valid(notification_id):
+        query = {"_id": ObjectId(notification_id)}
+    else:
+        query = {"id": notification_id}
+    query["user_id"] = user_id
+    
+    deleted = await notifications_collection.find_one_and_delete(
+        query,
+        projection={"read": 1}
+    )
+    if deleted is None:
+        return False
+    if not deleted.get("read"):
+        _publish_unread_count(user_id, await _adjust_unread_count(user_id, -1))
+    return True
 
 
 # Legacy function for backward compatibility - now creates notifications from swap events
@@ -1,11 +1,52 @@
 """Rating service using MongoDB.
 
 Stores ratings in MongoDB `ratings` collection with support for async operations.
+
+Each rated user's document carries `rating_stats` counters (`sum`, `count`
+and a per-star `histogram`), kept up to date whenever a rating is created,
+changed or deleted, so reading a user's stats is a single point read.
+`rebuild_rating_stats` recomputes them from the ratings collection.
+
+A unique index on (rater_user_id, rated_user_id) keeps one rating per pair,
+so a rating is created or changed with a single upsert.
+
+Rebuild every user's counters from the Backend directory:
+    python -m services.rating_service
 """
-from typing import Dict, Any, List, Optional
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from bson import ObjectId
 from datetime import datetime
-from database.connection import get_db
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from database.connection import get_db, run_in_transaction
+from services import event_bus
+
+
+STAR_VALUES = (1, 2, 3, 4, 5)
+
+# Server error code for a unique index that existing documents violate
+DUPLICATE_KEY = 11000
+
+RATING_INDEXES = [
+    # One rating per pair; also serves get_rating and the upsert filter
+    IndexModel(
+        [("rater_user_id", ASCENDING), ("rated_user_id", ASCENDING)],
+        name="rater_rated_unique",
+        unique=True,
+    ),
+    # Per-star counts of one user's ratings (recounts and batch stats)
+    IndexModel([("rated_user_id", ASCENDING), ("stars", ASCENDING)], name="rated_stars"),
+]
+
+# Seconds batch rating stats are served from this process's cache
+RATING_STATS_CACHE_SECONDS = 30
+
+# Entries kept in the cache before expired ones are dropped
+RATING_STATS_CACHE_SIZE = 10000
+
+_stats_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
 
 
 def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
@@ -18,6 +59,133 @@ def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     return doc
 
 
+async def _remove_duplicate_ratings(db) -> int:
+    """Keep only the latest rating of each (rater, rated) pair.
+    
+    The old read-then-insert path could store a pair twice under concurrent
+    submits. Affected users get their counters recounted.
+    
+    Returns:
+        Number of ratings removed
+    """
+    pipeline = [
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$group": {
+            "_id": {"rater": "$rater_user_id", "rated": "$rated_user_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    removed = 0
+    async for group in db["ratings"].aggregate(pipeline, allowDiskUse=True):
+        result = await db["ratings"].delete_many({"_id": {"$in": group["ids"][1:]}})
+        removed += result.deleted_count
+        await repair_rating_stats(group["_id"]["rated"])
+    return removed
+
+
+async def ensure_rating_indexes() -> None:
+    """Create the ratings indexes (idempotent).
+    
+    If duplicate ratings stop the unique index from being built, they are
+    removed first.
+    """
+    db = get_db()
+    try:
+        await db["ratings"].create_indexes(RATING_INDEXES)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        removed = await _remove_duplicate_ratings(db)
+        print(f"Removed {removed} duplicate rating(s)")
+        await db["ratings"].create_indexes(RATING_INDEXES)
+
+
+def _user_query(user_id: str) -> Dict[str, Any]:
+    """Build the users-collection filter for an ID (ObjectId or legacy string)."""
+    if ObjectId.is_valid(user_id):
+        return {"_id": ObjectId(user_id)}
+    return {"id": user_id}
+
+
+def _empty_counters() -> Dict[str, Any]:
+    """Rating counters for a user with no ratings."""
+    return {"sum": 0, "count": 0, "histogram": {str(star): 0 for star in STAR_VALUES}}
+
+
+def _stats_from_counters(counters: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn stored `rating_stats` counters into the public stats shape."""
+    histogram = counters.get("histogram") or {}
+    total_ratings = counters.get("count", 0)
+    return {
+        "average_rating": round(counters.get("sum", 0) / total_ratings, 2) if total_ratings else 0.0,
+        "total_ratings": total_ratings,
+        "rating_breakdown": {star: histogram.get(str(star), 0) for star in STAR_VALUES}
+    }
+
+
+async def repair_rating_stats(rated_user_id: str, session=None) -> Dict[str, Any]:
+    """Recount a user's ratings and store the `rating_stats` counters.
+    
+    Returns:
+        The recounted counters (also when the user document doesn't exist)
+    """
+    db = get_db()
+    pipeline = [
+        {"$match": {"rated_user_id": rated_user_id}},
+        {"$group": {"_id": "$stars", "count": {"$sum": 1}}}
+    ]
+    rows = await db["ratings"].aggregate(pipeline, session=session).to_list(length=None)
+    
+    counters = _empty_counters()
+    for row in rows:
+        counters["sum"] += row["_id"] * row["count"]
+        counters["count"] += row["count"]
+        if row["_id"] in STAR_VALUES:
+            counters["histogram"][str(row["_id"])] = row["count"]
+    
+    await db["users"].update_one(
+        _user_query(rated_user_id),
+        {"$set": {"rating_stats": counters}},
+        session=session
+    )
+    return counters
+
+
+async def _adjust_rating_stats(
+    db,
+    rated_user_id: str,
+    added_stars: Optional[int] = None,
+    removed_stars: Optional[int] = None,
+    session=None
+) -> None:
+    """Apply one rating's change to the rated user's counters.
+    
+    Pass `added_stars` for a new rating, `removed_stars` for a deleted one
+    and both for a changed one. Users without counters yet are recounted
+    instead.
+    """
+    inc: Dict[str, int] = {}
+    if added_stars is not None:
+        inc["rating_stats.sum"] = added_stars
+        inc["rating_stats.count"] = 1
+        inc[f"rating_stats.histogram.{added_stars}"] = 1
+    if removed_stars is not None:
+        inc["rating_stats.sum"] = inc.get("rating_stats.sum", 0) - removed_stars
+        inc["rating_stats.count"] = inc.get("rating_stats.count", 0) - 1
+        key = f"rating_stats.histogram.{removed_stars}"
+        inc[key] = inc.get(key, 0) - 1
+    
+    result = await db["users"].update_one(
+        {**_user_query(rated_user_id), "rating_stats": {"$exists": True}},
+        {"$inc": inc},
+        session=session
+    )
+    if result.matched_count == 0:
+        await repair_rating_stats(rated_user_id, session=session)
+
+
 async def create_or_update_rating(
     rater_user_id: str,
     rated_user_id: str,
@@ -42,39 +210,49 @@ async def create_or_update_rating(
     db = get_db()
     ratings_collection = db["ratings"]
     
-    # Check if rating already exists
-    existing_rating = await ratings_collection.find_one({
-        "rater_user_id": rater_user_id,
-        "rated_user_id": rated_user_id
-    })
-    
-    now = datetime.utcnow()
-    
-    if existing_rating:
-        # Update existing rating
-        await ratings_collection.update_one(
-            {"_id": existing_rating["_id"]},
+    async def operation(session):
+        now = datetime.utcnow()
+        new_id = ObjectId()
+        # One round trip: returns the previous rating, or None if this inserted it
+        previous = await ratings_collection.find_one_and_update(
+            {"rater_user_id": rater_user_id, "rated_user_id": rated_user_id},
             {
-                "$set": {
-                    "stars": stars,
-                    "updated_at": now
-                }
-            }
+                "$set": {"stars": stars, "updated_at": now},
+                "$setOnInsert": {"_id": new_id, "created_at": now}
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+            session=session
         )
-        updated_rating = await ratings_collection.find_one({"_id": existing_rating["_id"]})
-        return _convert_id(updated_rating)
-    else:
-        # Create new rating
-        rating_doc = {
-            "rater_user_id": rater_user_id,
-            "rated_user_id": rated_user_id,
-            "stars": stars,
-            "created_at": now,
-            "updated_at": now
-        }
-        result = await ratings_collection.insert_one(rating_doc)
-        rating_doc["_id"] = result.inserted_id
-        return _convert_id(rating_doc)
+        
+        if previous is None:
+            await _adjust_rating_stats(db, rated_user_id, added_stars=stars, session=session)
+            return {
+                "_id": new_id,
+                "rater_user_id": rater_user_id,
+                "rated_user_id": rated_user_id,
+                "stars": stars,
+                "created_at": now,
+                "updated_at": now
+            }
+        
+        if previous.get("stars") != stars:
+            await _adjust_rating_stats(
+                db, rated_user_id,
+                added_stars=stars,
+                removed_stars=previous.get("stars"),
+                session=session
+            )
+        return {**previous, "stars": stars, "updated_at": now}
+    
+    # The rating and the rated user's counters change together
+    try:
+        rating = await run_in_transaction(operation, client=db.client)
+    except DuplicateKeyError:
+        # A concurrent submit inserted the pair first; this one now updates it
+        rating = await run_in_transaction(operation, client=db.client)
+    _publish_rating_changed(rater_user_id, rated_user_id)
+    return _convert_id(rating)
 
 
 async def get_rating(
@@ -115,76 +293,141 @@ async def get_user_ratings(rated_user_id: str) -> List[Dict[str, Any]]:
     return [_convert_id(rating) for rating in ratings]
 
 
-async def get_user_rating_stats(rated_user_id: str) -> Dict[str, Any]:
-    """Calculate and return rating statistics for a user using MongoDB aggregation.
+async def get_user_rating_stats(
+    rated_user_id: str,
+    user: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Return rating statistics for a user from the counters on their document.
     
-    Uses aggregation pipeline for scalability - doesn't load all ratings into memory.
+    Pass the user document when the caller has already loaded it to skip the
+    read. Users without counters yet get them recounted and stored.
     
     Args:
-        rated_user_id: ID of the user whose stats to calculate
+        rated_user_id: ID of the user whose stats to return
+        user: Optional already-loaded user document
     
     Returns:
         Dictionary with average_rating, total_ratings, and rating_breakdown
     """
-    db = get_db()
-    ratings_collection = db["ratings"]
+    if user is None or "rating_stats" not in user:
+        db = get_db(stale_reads=True)
+        user = await db["users"].find_one(
+            _user_query(rated_user_id),
+            {"rating_stats": 1}
+        )
+    if user is not None and "rating_stats" in user:
+        return _stats_from_counters(user["rating_stats"])
+    return _stats_from_counters(await repair_rating_stats(rated_user_id))
+
+
+async def get_rating_stats_for_users(
+    rated_user_ids: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Rating statistics for many users with one `$in` query.
     
-    # Use MongoDB aggregation pipeline for efficient calculation
-    pipeline = [
-        {"$match": {"rated_user_id": rated_user_id}},
-        {
-            "$group": {
-                "_id": None,
-                "total_ratings": {"$sum": 1},
-                "total_stars": {"$sum": "$stars"},
-                "avg_rating": {"$avg": "$stars"},
-                "breakdown": {
-                    "$push": "$stars"
-                }
-            }
-        }
-    ]
+    Reads the counters stored on the user documents; users without counters
+    yet are counted from the ratings collection with a single aggregation.
     
-    cursor = ratings_collection.aggregate(pipeline)
-    result = await cursor.to_list(length=1)
+    Args:
+        rated_user_ids: IDs of the users whose stats to return
     
-    if not result or result[0].get("total_ratings", 0) == 0:
-        return {
-            "average_rating": 0.0,
-            "total_ratings": 0,
-            "rating_breakdown": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        }
+    Returns:
+        Dictionary mapping every requested user ID to the same shape
+        get_user_rating_stats returns (users without ratings get zeros)
+    """
+    stats = {
+        user_id: _stats_from_counters(_empty_counters())
+        for user_id in rated_user_ids
+    }
+    if not stats:
+        return stats
     
-    stats = result[0]
-    total_ratings = stats["total_ratings"]
-    average_rating = round(stats["avg_rating"], 2)
+    db = get_db(stale_reads=True)
+    object_ids = [ObjectId(uid) for uid in stats if ObjectId.is_valid(uid)]
+    string_ids = [uid for uid in stats if not ObjectId.is_valid(uid)]
+    users = await db["users"].find(
+        {"$or": [{"_id": {"$in": object_ids}}, {"id": {"$in": string_ids}}]},
+        {"rating_stats": 1, "id": 1}
+    ).to_list(length=None)
     
-    # Calculate breakdown using a second aggregation stage for efficiency
-    breakdown_pipeline = [
-        {"$match": {"rated_user_id": rated_user_id}},
+    missing = set(stats)
+    for user in users:
+        user_id = user.get("id") or str(user["_id"])
+        if user_id in stats and "rating_stats" in user:
+            stats[user_id] = _stats_from_counters(user["rating_stats"])
+            missing.discard(user_id)
+    if not missing:
+        return stats
+    
+    # Group by (user, stars) once; averages and totals are derived from the breakdown
+    pipeline = [
+        {"$match": {"rated_user_id": {"$in": list(missing)}}},
         {
             "$group": {
-                "_id": "$stars",
+                "_id": {"user": "$rated_user_id", "stars": "$stars"},
                 "count": {"$sum": 1}
             }
         }
     ]
+    counters = {user_id: _empty_counters() for user_id in missing}
+    cursor = db["ratings"].aggregate(pipeline)
+    for row in await cursor.to_list(length=None):
+        stars = row["_id"]["stars"]
+        user_counters = counters[row["_id"]["user"]]
+        user_counters["sum"] += stars * row["count"]
+        user_counters["count"] += row["count"]
+        if stars in STAR_VALUES:
+            user_counters["histogram"][str(stars)] = row["count"]
+    for user_id, user_counters in counters.items():
+        stats[user_id] = _stats_from_counters(user_counters)
+    return stats
+
+
+async def get_cached_rating_stats_for_users(
+    rated_user_ids: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Like get_rating_stats_for_users, but served from a short-lived cache.
     
-    breakdown_cursor = ratings_collection.aggregate(breakdown_pipeline)
-    breakdown_results = await breakdown_cursor.to_list(length=None)
-    
-    # Initialize breakdown with zeros
-    breakdown = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    for item in breakdown_results:
-        stars = item["_id"]
-        if 1 <= stars <= 5:
-            breakdown[stars] = item["count"]
+    Entries live for RATING_STATS_CACHE_SECONDS and are evicted as soon as a
+    `rating.changed` event for the user arrives, so a user sees their own
+    rating reflected immediately.
+    """
+    now = time.monotonic()
+    stats: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for user_id in dict.fromkeys(rated_user_ids):
+        cached = _stats_cache.get(user_id)
+        if cached and cached[0] > now:
+            stats[user_id] = cached[1]
+        else:
+            missing.append(user_id)
     
-    return {
-        "average_rating": average_rating,
-        "total_ratings": total_ratings,
-        "rating_breakdown": breakdown
-    }
+    if missing:
+        fetched = await get_rating_stats_for_users(missing)
+        if len(_stats_cache) + len(fetched) > RATING_STATS_CACHE_SIZE:
+            for user_id in [k for k, (expires, _) in _stats_cache.items() if expires <= now]:
+                del _stats_cache[user_id]
+        if len(_stats_cache) + len(fetched) <= RATING_STATS_CACHE_SIZE:
+            expires = now + RATING_STATS_CACHE_SECONDS
+            _stats_cache.update((uid, (expires, s)) for uid, s in fetched.items())
+        stats.update(fetched)
+    return stats
+
+
+def _publish_rating_changed(rater_user_id: str, rated_user_id: str) -> None:
+    """Announce a rating change (see services.event_bus)."""
+    event_bus.publish(event_bus.RATING_CHANGED, {
+        "rated_user_id": rated_user_id,
+        "rater_user_id": rater_user_id
+    })
+
+
+def _evict_cached_stats(payload: Dict[str, Any]) -> None:
+    """Drop a user's cached stats when one of their ratings changes."""
+    _stats_cache.pop(payload["rated_user_id"], None)
+
+
+event_bus.subscribe(event_bus.RATING_CHANGED, _evict_cached_stats)
 
 
 async def delete_rating(
@@ -202,9 +445,90 @@ async def delete_rating(
     """
     db = get_db()
     ratings_collection = db["ratings"]
-    result = await ratings_collection.delete_one({
-        "rater_user_id": rater_user_id,
-        "rated_user_id": rated_user_id
-    })
-    return result.deleted_count > 0
+    
+    async def operation(session):
+        deleted = await ratings_collection.find_one_and_delete({
+            "rater_user_id": rater_user_id,
+            "rated_user_id": rated_user_id
+        }, projection={"stars": 1}, session=session)
+        if deleted is None:
+            return False
+        await _adjust_rating_stats(
+            db, rated_user_id, removed_stars=deleted.get("stars"), session=session
+        )
+        return True
+    
+    deleted = await run_in_transaction(operation, client=db.client)
+    if deleted:
+        _publish_rating_changed(rater_user_id, rated_user_id)
+    return deleted
+
+
+async def rebuild_rating_stats() -> int:
+    """Rebuild every user's `rating_stats` counters from the ratings collection.
+    
+    Counts ratings per (user, stars) with one aggregation and writes the
+    counters back with a single bulk write. Use this to repair drift.
+    
+    Returns:
+        Number of user documents whose counters were changed
+    """
+    db = get_db()
+    pipeline = [
+        {"$group": {
+            "_id": {"user": "$rated_user_id", "stars": "$stars"},
+            "count": {"$sum": 1}
+        }}
+    ]
+    counters: Dict[str, Dict[str, Any]] = {}
+    async for row in db["ratings"].aggregate(pipeline, allowDiskUse=True):
+        user_id, stars = row["_id"]["user"], row["_id"]["stars"]
+        if not user_id:
+            continue
+        user_counters = counters.setdefault(user_id, _empty_counters())
+        user_counters["sum"] += stars * row["count"]
+        user_counters["count"] += row["count"]
+        if stars in STAR_VALUES:
+            user_counters["histogram"][str(stars)] = row["count"]
+    
+    operations = []
+    object_ids, string_ids = [], []
+    for user_id, user_counters in counters.items():
+        if ObjectId.is_valid(user_id):
+            object_ids.append(ObjectId(user_id))
+        else:
+            string_ids.append(user_id)
+        operations.append(
+            UpdateOne(_user_query(user_id), {"$set": {"rating_stats": user_counters}})
+        )
+    
+    # Users without any ratings get empty counters
+    operations.append(
+        UpdateMany(
+            {
+                "rating_stats.count": {"$ne": 0},
+                "_id": {"$nin": object_ids},
+                "id": {"$nin": string_ids},
+            },
+            {"$set": {"rating_stats": _empty_counters()}},
+        )
+    )
+    
+    result = await db["users"].bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def _main():
+    """Connect, rebuild every user's rating counters and print the result."""
+    from database.connection import connect_db, close_db
+    
+    await connect_db()
+    try:
+        updated = await rebuild_rating_stats()
+        print(f"Rebuilt rating stats on {updated} user(s)")
+    finally:
+        await close_db()
+
 
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,283 @@
+"""Fleet-wide credit reconciliation.
+
+Checks that every user's `credits` field matches the balance implied by
+their ledger (`transactions` collection) without one round trip per user:
+
+1. A single aggregation groups the whole ledger by `user_id` and streams
+   the per-user balances back.
+2. Balances are compared against `users.credits` in chunks, fetching each
+   chunk of users with one `$in` query.
+3. Users holding credits without any ledger rows are found with one
+   streaming pass over `users`.
+
+The totals from step 1 can be minutes old by the time a user is read, so
+every apparent mismatch is re-checked against a fresh ledger total for just
+that chunk's drifted users (one `$match` + `$group`), taken after their
+credits were read. Users whose fresh total matches were only caught
+mid-change and are not reported.
+
+Every remaining mismatch is written to the `credit_drift_reports` collection
+under the run's `run_id`. With `repair=True` the credits field is reset to
+the fresh ledger total using chunked `bulk_write` calls. Each update is
+guarded on the credits value that was compared, so a balance that changes
+after the re-check is left alone.
+
+On standalone deployments credits and ledger rows are not written in one
+transaction, so a change caught between its two writes looks like drift;
+run repairs there during a quiet period.
+
+Run from the Backend directory:
+    python -m services.reconciliation_service [--repair]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+from database.connection import get_db
+from services.credit_service import BALANCE_TOLERANCE, SIGNED_AMOUNT
+
+
+# Users compared (and repaired) per round trip
+RECONCILE_CHUNK_SIZE = 1000
+
+DRIFT_REPORT_INDEXES = [
+    IndexModel([("run_id", ASCENDING), ("user_id", ASCENDING)], name="run_user"),
+    IndexModel([("created_at", ASCENDING)], name="created_at"),
+]
+
+
+async def ensure_drift_report_indexes():
+    """Create the drift report indexes (idempotent)."""
+    db = get_db()
+    await db["credit_drift_reports"].create_indexes(DRIFT_REPORT_INDEXES)
+
+
+def _user_key(user: Dict[str, Any]) -> str:
+    """Return the ID ledger rows use for a user (legacy `id` or stringified `_id`)."""
+    return user.get("id") or str(user["_id"])
+
+
+def _drift_entry(
+    run_id: str,
+    user_id: str,
+    credits: Optional[float],
+    ledger_balance: float,
+    transaction_count: int,
+) -> Dict[str, Any]:
+    """Build one drift report row."""
+    return {
+        "run_id": run_id,
+        "user_id": user_id,
+        "credits": credits,
+        "ledger_balance": ledger_balance,
+        "drift": None if credits is None else credits - ledger_balance,
+        "transaction_count": transaction_count,
+        "orphaned": credits is None,
+        "repair_issued": False,
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+async def _load_users(db, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch `credits` for a chunk of users with one query, keyed by user ID."""
+    object_ids = [ObjectId(uid) for uid in user_ids if ObjectId.is_valid(uid)]
+    string_ids = [uid for uid in user_ids if not ObjectId.is_valid(uid)]
+    clauses = []
+    if object_ids:
+        clauses.append({"_id": {"$in": object_ids}})
+    if string_ids:
+        clauses.append({"id": {"$in": string_ids}})
+    query = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+    users = await db["users"].find(query, {"credits": 1, "id": 1}).to_list(length=None)
+    return {_user_key(user): user for user in users}
+
+
+async def _ledger_totals(db, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Total the ledger for a few users with one aggregation, keyed by user ID."""
+    pipeline = [
+        {"$match": {"user_id": {"$in": user_ids}}},
+        {"$group": {"_id": "$user_id", "balance": {"$sum": SIGNED_AMOUNT}, "count": {"$sum": 1}}},
+    ]
+    rows = await db["transactions"].aggregate(pipeline).to_list(length=None)
+    return {row["_id"]: row for row in rows}
+
+
+async def _flush(
+    db, entries: List[Dict[str, Any]], repairs: List[UpdateOne], repair: bool
+) -> int:
+    """Apply pending repairs and write the chunk's drift entries.
+
+    Both lists are emptied afterwards so the caller can keep filling them.
+    An entry is only marked `repair_issued` if its guarded update matched;
+    when some of the chunk's updates did not, the chunk's users are re-read
+    to tell which ones were reset.
+
+    Returns:
+        Number of user documents actually repaired
+    """
+    repaired = 0
+    if repair and repairs:
+        result = await db["users"].bulk_write(list(repairs), ordered=False)
+        repaired = result.modified_count
+        drifted = [entry for entry in entries if not entry["orphaned"]]
+        if repaired >= len(drifted):
+            for entry in drifted:
+                entry["repair_issued"] = True
+        elif repaired:
+            users = await _load_users(db, [entry["user_id"] for entry in drifted])
+            for entry in drifted:
+                user = users.get(entry["user_id"])
+                entry["repair_issued"] = user is not None and abs(
+                    float(user.get("credits", 0.0)) - entry["ledger_balance"]
+                ) <= BALANCE_TOLERANCE
+    if entries:
+        await db["credit_drift_reports"].insert_many(list(entries))
+    entries.clear()
+    repairs.clear()
+    return repaired
+
+
+async def reconcile_credits(
+    repair: bool = False, chunk_size: int = RECONCILE_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """Compare every user's credits field with their ledger balance.
+
+    Args:
+        repair: If True, reset drifted credits fields to the ledger balance
+        chunk_size: Users compared and repaired per round trip
+
+    Returns:
+        Summary with `run_id`, `users_checked`, `drifted`, `orphaned`,
+        `repaired` and the absolute `total_drift`
+    """
+    db = get_db()
+    run_id = uuid4().hex
+    summary = {
+        "run_id": run_id,
+        "started_at": datetime.now().isoformat(),
+        "users_checked": 0,
+        "drifted": 0,
+        "orphaned": 0,
+        "repaired": 0,
+        "total_drift": 0.0,
+    }
+    seen: Set[str] = set()
+    entries: List[Dict[str, Any]] = []
+    repairs: List[UpdateOne] = []
+
+    async def confirm_drift(suspects: List[Tuple[str, Dict[str, Any]]]):
+        """Re-total the ledger for users that looked drifted and record real drift."""
+        if not suspects:
+            return
+        totals = await _ledger_totals(db, [user_id for user_id, _ in suspects])
+        for user_id, user in suspects:
+            row = totals.get(user_id, {})
+            ledger_balance = float(row.get("balance") or 0.0)
+            credits = float(user.get("credits", 0.0))
+            if abs(credits - ledger_balance) <= BALANCE_TOLERANCE:
+                # A transaction landed after the first total; nothing to fix
+                continue
+            summary["drifted"] += 1
+            summary["total_drift"] += abs(credits - ledger_balance)
+            entries.append(_drift_entry(run_id, user_id, credits, ledger_balance, row.get("count", 0)))
+            repairs.append(
+                UpdateOne(
+                    {"_id": user["_id"], "credits": user.get("credits", 0.0)},
+                    {"$set": {"credits": ledger_balance}},
+                )
+            )
+
+    async def check_chunk(rows: List[Dict[str, Any]]):
+        users = await _load_users(db, [row["_id"] for row in rows])
+        suspects = []
+        for row in rows:
+            user_id = row["_id"]
+            ledger_balance = float(row["balance"] or 0.0)
+            user = users.get(user_id)
+            if user is None:
+                # Ledger rows for a user that no longer exists
+                summary["orphaned"] += 1
+                entries.append(_drift_entry(run_id, user_id, None, ledger_balance, row["count"]))
+                continue
+
+            seen.add(user_id)
+            summary["users_checked"] += 1
+            credits = float(user.get("credits", 0.0))
+            if abs(credits - ledger_balance) > BALANCE_TOLERANCE:
+                suspects.append((user_id, user))
+        await confirm_drift(suspects)
+        summary["repaired"] += await _flush(db, entries, repairs, repair)
+
+    # Pass 1: one streaming aggregation over the whole ledger
+    pipeline = [
+        {"$group": {"_id": "$user_id", "balance": {"$sum": SIGNED_AMOUNT}, "count": {"$sum": 1}}},
+    ]
+    chunk: List[Dict[str, Any]] = []
+    async for row in db["transactions"].aggregate(
+        pipeline, allowDiskUse=True, batchSize=chunk_size
+    ):
+        if not row["_id"]:
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            await check_chunk(chunk)
+            chunk = []
+    if chunk:
+        await check_chunk(chunk)
+
+    # Pass 2: users holding credits without a single ledger row
+    cursor = db["users"].find(
+        {"credits": {"$nin": [0, None]}}, {"credits": 1, "id": 1}, batch_size=chunk_size
+    )
+    suspects = []
+    async for user in cursor:
+        user_id = _user_key(user)
+        if user_id in seen:
+            continue
+        summary["users_checked"] += 1
+        credits = float(user.get("credits", 0.0))
+        if abs(credits) <= BALANCE_TOLERANCE:
+            continue
+        # Their first ledger rows may have been written after pass 1
+        suspects.append((user_id, user))
+        if len(suspects) >= chunk_size:
+            await confirm_drift(suspects)
+            suspects = []
+            summary["repaired"] += await _flush(db, entries, repairs, repair)
+    await confirm_drift(suspects)
+    summary["repaired"] += await _flush(db, entries, repairs, repair)
+
+    summary["finished_at"] = datetime.now().isoformat()
+    return summary
+
+
+async def _main(repair: bool):
+    """Connect, reconcile and print the run summary."""
+    from database.connection import connect_db, close_db
+
+    await connect_db()
+    try:
+        await ensure_drift_report_indexes()
+        summary = await reconcile_credits(repair=repair)
+        print(
+            f"Reconciliation {summary['run_id']}: checked {summary['users_checked']} users, "
+            f"{summary['drifted']} drifted (total {summary['total_drift']}), "
+            f"{summary['orphaned']} orphaned ledgers, {summary['repaired']} repaired"
+        )
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile users.credits with the ledger")
+    parser.add_argument(
+        "--repair", action="store_true", help="Reset drifted balances to the ledger balance"
+    )
+    asyncio.run(_main(parser.parse_args().repair))
@@ -0,0 +1,227 @@
+"""Recording and ranking of slow MongoDB queries.
+
+While started, every query the listener in database/slow_query_monitor.py
+flags as slow is written to the capped `slow_queries` collection with its
+redacted shape, duration and originating route. The first time a shape is
+seen (and then at most once per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS) the
+query is re-run with `explain` at "executionStats" verbosity and a summary
+of the plan is stored with it, e.g. whether it scanned the collection.
+
+Recording runs as background tasks on the event loop, never on the request
+path. When the database is struggling and too many records queue up, new
+ones are dropped rather than adding more load.
+
+`get_slow_query_shapes` ranks shapes by the total time spent in them, which
+is what the admin endpoint reports.
+"""
+
+import asyncio
+import contextvars
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from pymongo import DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid
+
+from config_defaults.constants import SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS
+from database import connection
+from database.connection import get_db
+
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Size of the capped collection; the oldest records are overwritten first
+SLOW_QUERY_LOG_SIZE_BYTES = 16 * 1024 * 1024
+
+# Records being stored at once before new ones are dropped
+MAX_PENDING_RECORDS = 50
+
+# Command fields that belong to the session or transaction, not the query
+SESSION_FIELDS = {
+    "lsid", "txnNumber", "startTransaction", "autocommit", "$clusterTime", "$db",
+    "$readPreference", "readConcern", "writeConcern", "apiVersion", "apiStrict",
+    "apiDeprecationErrors",
+}
+
+SLOW_QUERY_INDEXES = [
+    IndexModel([("at", DESCENDING)], name="at_desc"),
+]
+
+_tasks: Set[asyncio.Future] = set()
+_last_explained: Dict[str, float] = {}
+_dropped = 0
+
+
+async def ensure_slow_query_indexes():
+    """Create the capped `slow_queries` collection and its indexes (idempotent)."""
+    db = get_db()
+    try:
+        await db.create_collection(
+            SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_LOG_SIZE_BYTES
+        )
+    except CollectionInvalid:
+        pass  # Already exists
+    await db[SLOW_QUERY_COLLECTION].create_indexes(SLOW_QUERY_INDEXES)
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Stages of a winning plan from the root down, e.g. ["FETCH", "IXSCAN status_1"]."""
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage} {plan['indexName']}"
+        stages.append(stage)
+        inputs = plan.get("inputStages") or []
+        plan = plan.get("inputStage") or (inputs[0] if inputs else None)
+    return stages
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of an executionStats explain worth keeping.
+
+    Aggregations report the plan of their initial query under the first
+    stage's `$cursor`; pipelines that don't read a collection have none.
+    """
+    if "queryPlanner" not in explain:
+        stages = explain.get("stages") or [{}]
+        explain = stages[0].get("$cursor", {})
+    winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+    # Slot-based engine plans nest the classic plan tree under `queryPlan`
+    winning = winning.get("queryPlan", winning)
+    stats = explain.get("executionStats", {})
+    stages = _plan_stages(winning)
+    return {
+        "plan": stages,
+        "collection_scan": any(stage.startswith("COLLSCAN") for stage in stages),
+        "n_returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+async def _explain(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Explain a recorded query, or None if it can't be explained."""
+    command = {
+        key: value for key, value in record["command_doc"].items() if key not in SESSION_FIELDS
+    }
+    if "updates" in command:
+        # The server only explains single-statement write batches
+        command["updates"] = command["updates"][:1]
+    try:
+        explain = await get_db().client[record["database"]].command(
+            {"explain": command, "verbosity": "executionStats"}
+        )
+    except Exception as e:
+        print(f"WARNING: explain of slow {record['command']} on {record['collection']} failed: {e}")
+        return None
+    return summarize_explain(explain)
+
+
+async def _store(record: Dict[str, Any]) -> None:
+    """Explain a slow query if its shape is due and append it to `slow_queries`."""
+    doc = {key: value for key, value in record.items() if key != "command_doc"}
+    # Stored as JSON: operator names aren't valid field names on every server
+    doc["shape"] = json.dumps(record["shape"], sort_keys=True, default=str)
+    doc["explain"] = None
+    now = time.monotonic()
+    last = _last_explained.get(record["shape_key"])
+    if last is None or now - last >= SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+        _last_explained[record["shape_key"]] = now
+        doc["explain"] = await _explain(record)
+    # Capped collections can't grow documents, so the record is written once
+    await get_db()[SLOW_QUERY_COLLECTION].insert_one(doc)
+
+
+def _schedule(record: Dict[str, Any]) -> None:
+    """Start storing a record unless too many are already in flight."""
+    global _dropped
+    if len(_tasks) >= MAX_PENDING_RECORDS:
+        _dropped += 1
+        return
+    task = asyncio.ensure_future(_store(record))
+    _tasks.add(task)
+
+    def done(task: asyncio.Future) -> None:
+        _tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"WARNING: recording a slow query failed: {task.exception()}")
+
+    task.add_done_callback(done)
+
+
+def start() -> None:
+    """Start recording slow queries in this process."""
+    loop = asyncio.get_running_loop()
+
+    def sink(record: Dict[str, Any]) -> None:
+        # Called from driver threads. An empty context keeps the explain and
+        # insert from being counted against the request that ran the query.
+        loop.call_soon_threadsafe(_schedule, record, context=contextvars.Context())
+
+    connection.slow_query_listener.attach(sink)
+
+
+async def stop() -> None:
+    """Stop recording and cancel records still being stored."""
+    connection.slow_query_listener.detach()
+    for task in list(_tasks):
+        task.cancel()
+    _tasks.clear()
+    if _dropped:
+        print(f"WARNING: {_dropped} slow query record(s) dropped under load")
+
+
+async def get_slow_query_shapes(
+    limit: int = 20, since: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Rank recorded query shapes by the total time spent in them.
+
+    Args:
+        limit: Number of shapes to return
+        since: Only count queries recorded after this time
+
+    Returns:
+        Shapes with their collection, count, total/avg/max duration, the
+        routes that ran them and the most recent explain summary
+    """
+    pipeline: List[Dict[str, Any]] = []
+    if since is not None:
+        pipeline.append({"$match": {"at": {"$gte": since}}})
+    pipeline += [
+        {"$group": {
+            "_id": "$shape_key",
+            "command": {"$first": "$command"},
+            "collection": {"$first": "$collection"},
+            "shape": {"$first": "$shape"},
+            "count": {"$sum": 1},
+            "total_ms": {"$sum": "$duration_ms"},
+            "avg_ms": {"$avg": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "failures": {"$sum": {"$cond": ["$failed", 1, 0]}},
+            "routes": {"$addToSet": "$route"},
+            "last_seen": {"$max": "$at"},
+            # $max skips nulls and compares `at` first: the latest explain
+            "latest_explain": {"$max": {
+                "$cond": ["$explain", {"at": "$at", "explain": "$explain"}, None]
+            }},
+        }},
+        {"$sort": {"total_ms": -1}},
+        {"$limit": limit},
+    ]
+    shapes = []
+    cursor = get_db()[SLOW_QUERY_COLLECTION].aggregate(pipeline)
+    async for group in cursor:
+        latest = group.pop("latest_explain")
+        group["shape_key"] = group.pop("_id")
+        group["shape"] = json.loads(group["shape"])
+        group["routes"] = sorted(route for route in group["routes"] if route)
+        group["total_ms"] = round(group["total_ms"], 3)
+        group["avg_ms"] = round(group["avg_ms"], 3)
+        group["explain"] = latest["explain"] if latest else None
+        shapes.append(group)
+    return shapes
+
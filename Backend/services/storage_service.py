@@ -3,9 +3,72 @@
 Stores items in MongoDB `items` collection with support for async operations.
 """
 
+import re
 from typing import Dict, Any, List, Optional
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
 from database.connection import get_db
+from services import event_bus
+from utils.pagination import decode_cursor, encode_cursor
+
+
+# Sort orders supported by the paginated catalogue. Every order ends with `_id`
+# as a tiebreaker so the (sort key, _id) pair is unique and can be used as a
+# keyset cursor. `_id` is an ObjectId, so it also encodes creation time.
+ITEM_SORTS = {
+    "newest": [("_id", DESCENDING)],
+    "oldest": [("_id", ASCENDING)],
+    "credits-asc": [("credits", ASCENDING), ("_id", ASCENDING)],
+    "credits-desc": [("credits", DESCENDING), ("_id", DESCENDING)],
+    "title-asc": [("title", ASCENDING), ("_id", ASCENDING)],
+    "title-desc": [("title", DESCENDING), ("_id", DESCENDING)],
+}
+
+# Compound indexes backing list_items_page: the equality filter (status/owner)
+# comes first, followed by the sort key and the _id tiebreaker.
+ITEM_INDEXES = [
+    IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_newest"),
+    IndexModel(
+        [("status", ASCENDING), ("category", ASCENDING), ("_id", DESCENDING)],
+        name="status_category_newest",
+    ),
+    IndexModel(
+        [("status", ASCENDING), ("credits", ASCENDING), ("_id", ASCENDING)],
+        name="status_credits",
+    ),
+    IndexModel(
+        [("status", ASCENDING), ("title", ASCENDING), ("_id", ASCENDING)],
+        name="status_title",
+    ),
+    # Search matches title, category or brand; with the status filter pushed
+    # into each branch, the regexes run over these index keys
+    IndexModel(
+        [("status", ASCENDING), ("brand", ASCENDING)],
+        name="status_brand",
+        sparse=True,
+    ),
+    IndexModel([("owner_id", ASCENDING), ("_id", DESCENDING)], name="owner_newest"),
+    # Items created before ObjectIds carry a string `id`
+    IndexModel([("id", ASCENDING)], name="legacy_id", sparse=True),
+]
+
+
+# Fields a listing card needs; older items still keep their metadata in the
+# description
+LISTING_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "category": 1,
+    "size": 1,
+    "location": 1,
+    "condition": 1,
+    "branded": 1,
+    "credits": 1,
+    "owner_id": 1,
+    "status": 1,
+    "pending_requests": 1,
+    "images": 1,
+}
 
 
 def _get_db_optional():
@@ -44,9 +107,258 @@ async def list_items(
     return [_convert_id(item) for item in items]
 
 
-async def get_item(item_id: str) -> Optional[Dict[str, Any]]:
-    """Get item by ID."""
-    db = get_db()
+async def list_owner_listings(
+    owner_id: str, limit: int, stale_reads: bool = True
+) -> List[Dict[str, Any]]:
+    """An owner's newest items, projected to LISTING_PROJECTION.
+
+    Reads the `owner_newest` index; statuses are already effective statuses.
+    Pass `stale_reads=False` when the owner is the one reading.
+    """
+    db = get_db(stale_reads=stale_reads)
+    cursor = (
+        db["items"]
+        .find({"owner_id": owner_id}, LISTING_PROJECTION)
+        .sort("_id", DESCENDING)
+        .limit(limit)
+    )
+    items = await cursor.to_list(length=limit)
+    for item in items:
+        item["status"] = effective_status(item)
+    return [_convert_id(item) for item in items]
+
+
+async def count_items_by_status(owner_id: str, stale_reads: bool = True) -> Dict[str, int]:
+    """Count an owner's items per effective status (see effective_status)."""
+    db = get_db(stale_reads=stale_reads)
+    pipeline = [
+        {"$match": {"owner_id": owner_id}},
+        {"$group": {
+            "_id": {"$cond": [
+                {"$and": [
+                    {"$eq": ["$status", "available"]},
+                    {"$gt": [{"$ifNull": ["$pending_requests", 0]}, 0]},
+                ]},
+                "pending",
+                {"$ifNull": ["$status", "available"]},
+            ]},
+            "count": {"$sum": 1},
+        }},
+    ]
+    rows = await db["items"].aggregate(pipeline).to_list(length=None)
+    return {row["_id"]: row["count"] for row in rows}
+
+
+def _id_query(item_id: str) -> Dict[str, Any]:
+    """Build a lookup filter for an item id (ObjectId or legacy string id)."""
+    if ObjectId.is_valid(item_id):
+        return {"_id": ObjectId(item_id)}
+    return {"id": item_id}
+
+
+def effective_status(item: Dict[str, Any]) -> Optional[str]:
+    """Return the status clients should see for an item.
+
+    An 'available' item that still has pending swap requests is reported as
+    'pending'. The count comes from the denormalized `pending_requests` counter
+    on the item document, so no swap_requests query is needed.
+    """
+    status = item.get("status")
+    if status == "available" and (item.get("pending_requests") or 0) > 0:
+        return "pending"
+    return status
+
+
+# Fields the catalogue search matches (as the browse page did client-side)
+SEARCH_FIELDS = ("title", "category", "brand")
+
+
+def _status_filter(statuses: List[str]) -> Dict[str, Any]:
+    """Filter for items whose effective status (see effective_status) is one of these.
+
+    Uses the same rule as count_items_by_status: an 'available' item with
+    pending requests counts as 'pending', not 'available'.
+    """
+    stored = [s for s in statuses if s not in ("available", "pending")]
+    clauses: List[Dict[str, Any]] = []
+    if stored:
+        clauses.append({"status": stored[0] if len(stored) == 1 else {"$in": stored}})
+    if "available" in statuses:
+        clauses.append({"status": "available", "pending_requests": {"$not": {"$gt": 0}}})
+    if "pending" in statuses:
+        clauses.append({"status": "pending"})
+        clauses.append({"status": "available", "pending_requests": {"$gt": 0}})
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def _pending_requests_after(delta: int) -> Dict[str, Any]:
+    """Aggregation expression for the pending counter plus delta, floored at 0."""
+    return {
+        "$max": [0, {"$add": [{"$ifNull": ["$pending_requests", 0]}, delta]}]
+    }
+
+
+async def adjust_pending_requests(item_id: str, delta: int) -> None:
+    """Atomically add `delta` to an item's pending swap request counter.
+
+    The counter never drops below zero, so a decrement for a request that was
+    created before the counter existed is harmless.
+    """
+    db = _get_db_optional()
+    if db is None or not item_id or not delta:
+        return
+    await db["items"].update_one(
+        _id_query(item_id),
+        [{"$set": {"pending_requests": _pending_requests_after(delta)}}],
+    )
+
+
+def _publish_item_updated(item_id: str, status: Optional[str], deleted: bool = False) -> None:
+    """Announce that an item changed (see services.event_bus)."""
+    event_bus.publish(event_bus.ITEM_UPDATED, {
+        "item_id": item_id,
+        "status": status,
+        "deleted": deleted,
+    })
+
+
+def _keyset_filter(sort: List[tuple], cursor: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a filter matching documents that come after the cursor.
+
+    MongoDB sorts null/missing values before everything else, so a null sort key
+    needs its own branch in each direction.
+    """
+    field, direction = sort[0]
+    op = "$gt" if direction == ASCENDING else "$lt"
+    last_id = cursor["id"]
+    if field == "_id":
+        return {"_id": {op: last_id}}
+
+    value = cursor.get("k")
+    same_key = {field: value, "_id": {op: last_id}}
+    if value is None:
+        if direction == ASCENDING:
+            return {"$or": [same_key, {field: {"$ne": None}}]}
+        return same_key
+    branches = [{field: {op: value}}, same_key]
+    if direction == DESCENDING:
+        branches.append({field: None})
+    return {"$or": branches}
+
+
+async def list_items_page(
+    owner_id: Optional[str] = None,
+    exclude_owner_id: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+    categories: Optional[List[str]] = None,
+    sizes: Optional[List[str]] = None,
+    conditions: Optional[List[str]] = None,
+    locations: Optional[List[str]] = None,
+    min_credits: Optional[float] = None,
+    max_credits: Optional[float] = None,
+    search: Optional[str] = None,
+    sort: str = "newest",
+    limit: int = 24,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Return one page of items filtered, sorted and paginated in MongoDB.
+
+    Pagination is keyset based: the returned `next_cursor` encodes the sort key
+    and `_id` of the last item, so fetching the next page is an index seek rather
+    than a skip over everything before it.
+
+    Args:
+        owner_id: Only include items owned by this user
+        exclude_owner_id: Leave out items owned by this user (e.g. the viewer)
+        statuses: Only include items whose effective status is one of these
+        categories: Only include items in one of these categories
+        sizes: Only include items with one of these sizes
+        conditions: Only include items in one of these conditions
+        locations: Only include items at one of these locations
+        min_credits: Minimum credit price (inclusive)
+        max_credits: Maximum credit price (inclusive)
+        search: Case-insensitive substring matched against the title,
+            category or brand
+        sort: One of the keys of ITEM_SORTS
+        limit: Maximum number of items to return
+        cursor: Cursor returned by the previous page, if any
+
+    Returns:
+        Dictionary with "items", "next_cursor" and "has_more"
+
+    Raises:
+        ValueError: If the sort order or cursor is invalid
+    """
+    if sort not in ITEM_SORTS:
+        raise ValueError(f"Invalid sort order: {sort}")
+    sort_spec = ITEM_SORTS[sort]
+
+    # Browsing tolerates results a few seconds old
+    db = get_db(stale_reads=True)
+    items_collection = db["items"]
+
+    query: Dict[str, Any] = {}
+    if owner_id:
+        query["owner_id"] = owner_id
+    elif exclude_owner_id:
+        query["owner_id"] = {"$ne": exclude_owner_id}
+    for field, values in (
+        ("category", categories),
+        ("size", sizes),
+        ("condition", conditions),
+        ("location", locations),
+    ):
+        if values:
+            query[field] = values[0] if len(values) == 1 else {"$in": values}
+    if min_credits is not None or max_credits is not None:
+        credits_range = {}
+        if min_credits is not None:
+            credits_range["$gte"] = min_credits
+        if max_credits is not None:
+            credits_range["$lte"] = max_credits
+        query["credits"] = credits_range
+    clauses = [query] if query else []
+    if statuses:
+        clauses.append(_status_filter(statuses))
+    if search:
+        pattern = {"$regex": re.escape(search), "$options": "i"}
+        clauses.append({"$or": [{field: pattern} for field in SEARCH_FIELDS]})
+    if cursor:
+        clauses.append(_keyset_filter(sort_spec, decode_cursor(cursor)))
+    if len(clauses) > 1:
+        query = {"$and": clauses}
+    elif clauses:
+        query = clauses[0]
+
+    # Fetch one extra row to learn whether another page exists
+    cursor_obj = items_collection.find(query).sort(sort_spec).limit(limit + 1)
+    docs = await cursor_obj.to_list(length=limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    next_cursor = encode_cursor(docs[-1], sort_spec[0][0]) if has_more else None
+    return {
+        "items": [_convert_id(doc) for doc in docs],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+async def ensure_item_indexes() -> None:
+    """Create the catalogue indexes if they do not exist yet (idempotent)."""
+    db = _get_db_optional()
+    if db is None:
+        return
+    await db["items"].create_indexes(ITEM_INDEXES)
+
+
+async def get_item(item_id: str, stale_reads: bool = False) -> Optional[Dict[str, Any]]:
+    """Get item by ID.
+
+    Pass `stale_reads=True` only for display (see database.connection); swap
+    and ownership checks must read the primary.
+    """
+    db = get_db(stale_reads=stale_reads)
     items_collection = db["items"]
     try:
         item = await items_collection.find_one({"_id": ObjectId(item_id)})
@@ -59,6 +371,8 @@ async def get_item(item_id: str) -> Optional[Dict[str, Any]]:
 async def reserve_item_for_request(item_id: str) -> Optional[Dict[str, Any]]:
     """Atomically reserve an item for a swap request by setting status to pending.
 
+    Also increments the item's `pending_requests` counter in the same update.
+
     Returns the updated item if reservation succeeded, otherwise None (meaning the
     item was not available anymore).
     """
@@ -68,30 +382,48 @@ async def reserve_item_for_request(item_id: str) -> Optional[Dict[str, Any]]:
         return {"id": item_id, "status": "pending"}
     items_collection = db["items"]
 
-    # First try with ObjectId
-    try:
-        result = await items_collection.update_one(
-            {"_id": ObjectId(item_id), "status": "available"},
-            {"$set": {"status": "pending"}},
-        )
-        if result.matched_count > 0:
-            item = await items_collection.find_one({"_id": ObjectId(item_id)})
-            return _convert_id(item)
-    except Exception:
-        # Fall back to string id
-        result = await items_collection.update_one(
-            {"id": item_id, "status": "available"},
-            {"$set": {"status": "pending"}},
-        )
-        if result.matched_count > 0:
-            item = await items_collection.find_one({"id": item_id})
-            return _convert_id(item)
+    item = await items_collection.find_one_and_update(
+        {**_id_query(item_id), "status": "available"},
+        {"$set": {"status": "pending"}, "$inc": {"pending_requests": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if item is not None:
+        _publish_item_updated(item_id, "pending")
+    return _convert_id(item)
+
 
-    return None
+async def release_item_reservation(item_id: str) -> None:
+    """Undo reserve_item_for_request after a failed swap request.
+
+    Marks the item available again and decrements its pending request counter.
+    """
+    db = _get_db_optional()
+    if db is None:
+        return
+    await db["items"].update_one(
+        _id_query(item_id),
+        [
+            {
+                "$set": {
+                    "status": "available",
+                    "pending_requests": _pending_requests_after(-1),
+                }
+            }
+        ],
+    )
+    _publish_item_updated(item_id, "available")
 
 
 async def upsert_item(item: Dict[str, Any]) -> Dict[str, Any]:
-    """Insert or update an item."""
+    """Insert or update an item and announce the change."""
+    saved = await _save_item(item)
+    if saved is not None:
+        _publish_item_updated(saved["id"], saved.get("status"))
+    return saved
+
+
+async def _save_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Write an item, updating it in place when it already exists."""
     db = get_db()
     items_collection = db["items"]
 
@@ -103,6 +435,9 @@ async def upsert_item(item: Dict[str, Any]) -> Dict[str, Any]:
             item_copy = item.copy()
             if "id" in item_copy:
                 del item_copy["id"]
+            # The pending request counter is only changed with atomic $inc
+            # updates; writing back a stale copy here would corrupt it.
+            item_copy.pop("pending_requests", None)
 
             result = await items_collection.update_one(
                 {"_id": ObjectId(item_id)}, {"$set": item_copy}, upsert=False
@@ -118,6 +453,7 @@ async def upsert_item(item: Dict[str, Any]) -> Dict[str, Any]:
             item_copy = item.copy()
             if "id" in item_copy:
                 del item_copy["id"]
+            item_copy.pop("pending_requests", None)
 
             result = await items_collection.update_one(
                 {"id": item_id}, {"$set": item_copy}, upsert=False
@@ -130,6 +466,7 @@ async def upsert_item(item: Dict[str, Any]) -> Dict[str, Any]:
     item_copy = item.copy()
     if "id" in item_copy:
         del item_copy["id"]
+    item_copy.setdefault("pending_requests", 0)
 
     result = await items_collection.insert_one(item_copy)
     item_copy["_id"] = result.inserted_id
@@ -142,11 +479,13 @@ async def delete_item(item_id: str) -> bool:
     items_collection = db["items"]
     try:
         result = await items_collection.delete_one({"_id": ObjectId(item_id)})
-        return result.deleted_count > 0
     except Exception:
         # If ObjectId conversion fails, try with string id
         result = await items_collection.delete_one({"id": item_id})
-        return result.deleted_count > 0
+    if result.deleted_count == 0:
+        return False
+    _publish_item_updated(item_id, None, deleted=True)
+    return True
 
 # ============ USER FUNCTIONS ============
 
@@ -6,7 +6,25 @@ Stores swap requests in MongoDB `swap_requests` collection with support for asyn
 from typing import Dict, Any, List, Optional
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateMany, UpdateOne
 from database.connection import get_db
+from services import event_bus
+
+
+# Indexed lookups for the per-user swap views. `owner_id` and `participants`
+# are denormalized onto each request at creation time.
+SWAP_REQUEST_INDEXES = [
+    IndexModel(
+        [("owner_id", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING)],
+        name="owner_status_created",
+    ),
+    IndexModel(
+        [("participants", ASCENDING), ("status", ASCENDING)],
+        name="participants_status",
+    ),
+    IndexModel([("item_id", ASCENDING), ("status", ASCENDING)], name="item_status"),
+    IndexModel([("requester_id", ASCENDING), ("status", ASCENDING)], name="requester_status"),
+]
 
 
 def _get_db_optional():
@@ -17,6 +35,18 @@ def _get_db_optional():
         return None
 
 
+def _publish_status_changed(request: Dict[str, Any], previous_status: Optional[str]) -> None:
+    """Announce a swap request status change (see services.event_bus)."""
+    event_bus.publish(event_bus.SWAP_STATUS_CHANGED, {
+        "request_id": request.get("id"),
+        "item_id": request.get("item_id"),
+        "requester_id": request.get("requester_id"),
+        "owner_id": request.get("owner_id"),
+        "status": request.get("status"),
+        "previous_status": previous_status,
+    })
+
+
 def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     """Convert MongoDB _id to id for API compatibility."""
     if doc is None:
@@ -28,15 +58,32 @@ def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
 
 
 async def create_swap_request(
-    item_id: str, requester_id: str, credits_required: float
+    item_id: str,
+    requester_id: str,
+    credits_required: float,
+    owner_id: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Create a new swap request."""
+    """Create a new swap request.
+
+    The item owner is stored on the request (as `owner_id` and in the
+    `participants` array) so per-user lookups don't need to load the item.
+    Pass `owner_id` when the caller already has the item; otherwise it is
+    looked up.
+    """
     db = get_db()
     swap_requests_collection = db["swap_requests"]
 
+    if owner_id is None:
+        from services.storage_service import get_item
+
+        item = await get_item(item_id)
+        owner_id = item.get("owner_id") if item else None
+
     request = {
         "item_id": item_id,
         "requester_id": requester_id,
+        "owner_id": owner_id,
+        "participants": [requester_id, owner_id] if owner_id else [requester_id],
         "credits_required": credits_required,
         "status": "pending",  # pending, approved, rejected, cancelled
         "created_at": datetime.now().isoformat(),
@@ -45,7 +92,9 @@ async def create_swap_request(
 
     result = await swap_requests_collection.insert_one(request)
     request["_id"] = result.inserted_id
-    return _convert_id(request)
+    request = _convert_id(request)
+    _publish_status_changed(request, None)
+    return request
 
 
 async def get_swap_request(request_id: str) -> Optional[Dict[str, Any]]:
@@ -71,20 +120,13 @@ async def get_pending_requests_for_item(item_id: str) -> List[Dict[str, Any]]:
 
 async def get_pending_requests_for_owner(owner_id: str) -> List[Dict[str, Any]]:
     """Get all pending swap requests for items owned by a user."""
-    from services.storage_service import get_item
-
     db = get_db()
     swap_requests_collection = db["swap_requests"]
-    cursor = swap_requests_collection.find({"status": "pending"})
-    all_pending = await cursor.to_list(length=None)
-
-    owner_requests = []
-    for req in all_pending:
-        item = await get_item(req.get("item_id"))
-        if item and item.get("owner_id") == owner_id:
-            owner_requests.append(_convert_id(req))
-
-    return owner_requests
+    cursor = swap_requests_collection.find(
+        {"owner_id": owner_id, "status": "pending"}
+    ).sort("created_at", ASCENDING)
+    requests = await cursor.to_list(length=None)
+    return [_convert_id(req) for req in requests]
 
 
 async def get_requests_for_requester(requester_id: str) -> List[Dict[str, Any]]:
@@ -121,51 +163,55 @@ async def get_pending_requests_count_for_user(requester_id: str) -> int:
 
 async def get_approved_swaps_for_user(user_id: str) -> List[Dict[str, Any]]:
     """Get all approved swap requests where user is either owner or requester."""
-    from services.storage_service import get_item
-
     db = get_db()
     swap_requests_collection = db["swap_requests"]
-    cursor = swap_requests_collection.find({"status": "approved"})
-    approved_swaps_list = await cursor.to_list(length=None)
-
-    approved_swaps = []
-    for req in approved_swaps_list:
-        item = await get_item(req.get("item_id"))
-        item_owner_id = item.get("owner_id") if item else None
-        requester_id = req.get("requester_id")
+    cursor = swap_requests_collection.find(
+        {"participants": user_id, "status": "approved"}
+    )
+    approved_swaps = await cursor.to_list(length=None)
+    return [_convert_id(req) for req in approved_swaps]
 
-        # Include if user is the owner or the requester
-        if item_owner_id == user_id or requester_id == user_id:
-            approved_swaps.append(_convert_id(req))
 
-    return approved_swaps
+async def count_approved_swaps_for_user(user_id: str, stale_reads: bool = True) -> int:
+    """Count approved swap requests where user is either owner or requester."""
+    db = get_db(stale_reads=stale_reads)
+    return await db["swap_requests"].count_documents(
+        {"participants": user_id, "status": "approved"}
+    )
 
 
 async def update_swap_request(request_id: str, status: str) -> Optional[Dict[str, Any]]:
-    """Update swap request status (approved, rejected, cancelled)."""
+    """Update swap request status (approved, rejected, cancelled).
+
+    When a pending request leaves the pending state, the pending request counter
+    on its item is decremented so item listings stay accurate.
+    """
+    from services.storage_service import adjust_pending_requests
+
     db = get_db()
     swap_requests_collection = db["swap_requests"]
 
     update_data = {"status": status, "updated_at": datetime.now().isoformat()}
 
     try:
-        result = await swap_requests_collection.update_one(
-            {"_id": ObjectId(request_id)}, {"$set": update_data}
-        )
-        if result.matched_count == 0:
-            return None
-        # Fetch updated request
-        request = await swap_requests_collection.find_one({"_id": ObjectId(request_id)})
-        return _convert_id(request)
+        query = {"_id": ObjectId(request_id)}
     except Exception:
         # If ObjectId conversion fails, try with string id
-        result = await swap_requests_collection.update_one(
-            {"id": request_id}, {"$set": update_data}
-        )
-        if result.matched_count == 0:
-            return None
-        request = await swap_requests_collection.find_one({"id": request_id})
-        return _convert_id(request)
+        query = {"id": request_id}
+
+    # Return the previous version so we know whether the request was pending
+    previous = await swap_requests_collection.find_one_and_update(
+        query, {"$set": update_data}, return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        return None
+
+    if previous.get("status") == "pending" and status != "pending":
+        await adjust_pending_requests(previous.get("item_id"), -1)
+
+    updated = _convert_id({**previous, **update_data})
+    _publish_status_changed(updated, previous.get("status"))
+    return updated
 
 
 async def cancel_swap_request(request_id: str) -> Optional[Dict[str, Any]]:
@@ -182,6 +228,8 @@ async def cancel_other_pending_requests(item_id: str, exclude_request_id: str =
     This is used when a swap request is approved to automatically cancel any other
     pending requests for the same item.
     """
+    from services.storage_service import adjust_pending_requests
+
     db = get_db()
     swap_requests_collection = db["swap_requests"]
 
@@ -194,4 +242,145 @@ async def cancel_other_pending_requests(item_id: str, exclude_request_id: str =
 
     update_data = {"status": "cancelled", "updated_at": datetime.now().isoformat()}
 
-    await swap_requests_collection.update_many(query, {"$set": update_data})
+    result = await swap_requests_collection.update_many(query, {"$set": update_data})
+    if result.modified_count:
+        await adjust_pending_requests(item_id, -result.modified_count)
+        # One event for the whole batch; request_id is None
+        _publish_status_changed(
+            {"item_id": item_id, "status": "cancelled"}, previous_status="pending"
+        )
+
+
+async def sync_pending_request_counts(missing_only: bool = False) -> int:
+    """Rebuild items' `pending_requests` counters from swap_requests.
+
+    Counts pending requests per item with one aggregation and writes the
+    counters back with a single bulk write. Use this to repair drift.
+
+    Args:
+        missing_only: Only set the counter on items that don't have one yet.
+            This is the startup backfill for items created before the counter
+            existed; counters kept up to date since are left alone.
+
+    Returns:
+        Number of item documents whose counter was changed
+    """
+    db = get_db()
+    items_collection = db["items"]
+    # Counters other writers already maintain are not overwritten by a backfill
+    guard = {"pending_requests": {"$exists": False}} if missing_only else {}
+    pipeline = [
+        {"$match": {"status": "pending"}},
+        {"$group": {"_id": "$item_id", "count": {"$sum": 1}}},
+    ]
+    counts = await db["swap_requests"].aggregate(pipeline).to_list(length=None)
+
+    operations = []
+    object_ids, string_ids = [], []
+    for row in counts:
+        item_id = row["_id"]
+        if not item_id:
+            continue
+        if ObjectId.is_valid(item_id):
+            object_ids.append(ObjectId(item_id))
+            item_query = {"_id": object_ids[-1]}
+        else:
+            string_ids.append(item_id)
+            item_query = {"id": item_id}
+        operations.append(
+            UpdateOne({**item_query, **guard}, {"$set": {"pending_requests": row["count"]}})
+        )
+
+    # Items with no pending requests left get their counter reset to zero
+    operations.append(
+        UpdateMany(
+            {
+                "pending_requests": guard["pending_requests"] if missing_only else {"$gt": 0},
+                "_id": {"$nin": object_ids},
+                "id": {"$nin": string_ids},
+            },
+            {"$set": {"pending_requests": 0}},
+        )
+    )
+
+    result = await items_collection.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def ensure_swap_request_indexes() -> None:
+    """Create the swap request indexes if they do not exist yet (idempotent)."""
+    db = _get_db_optional()
+    if db is None:
+        return
+    await db["swap_requests"].create_indexes(SWAP_REQUEST_INDEXES)
+
+
+async def backfill_swap_request_owners(batch_size: int = 500) -> int:
+    """Add `owner_id` and `participants` to swap requests created without them.
+
+    Works through the collection in `_id` order, resolving each batch's items
+    with a single `$in` query and writing the batch with one bulk write. Only
+    documents still missing `owner_id` are selected, so the backfill can be
+    interrupted and rerun safely; it picks up where it left off.
+
+    Requests whose item no longer exists get `owner_id: None` so they are not
+    selected again.
+
+    Args:
+        batch_size: Number of swap requests to process per round trip
+
+    Returns:
+        Number of swap requests updated
+    """
+    db = _get_db_optional()
+    if db is None:
+        return 0
+    swap_requests_collection = db["swap_requests"]
+    items_collection = db["items"]
+
+    updated = 0
+    last_id = None
+    while True:
+        query: Dict[str, Any] = {"owner_id": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = (
+            await swap_requests_collection.find(
+                query, {"item_id": 1, "requester_id": 1}
+            )
+            .sort("_id", ASCENDING)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+
+        item_ids = {req.get("item_id") for req in batch if req.get("item_id")}
+        object_ids = [ObjectId(i) for i in item_ids if ObjectId.is_valid(i)]
+        string_ids = [i for i in item_ids if not ObjectId.is_valid(i)]
+        items = await items_collection.find(
+            {"$or": [{"_id": {"$in": object_ids}}, {"id": {"$in": string_ids}}]},
+            {"owner_id": 1, "id": 1},
+        ).to_list(length=None)
+        owners = {}
+        for item in items:
+            owners[str(item["_id"])] = item.get("owner_id")
+            if item.get("id"):
+                owners[item["id"]] = item.get("owner_id")
+
+        operations = []
+        for req in batch:
+            owner_id = owners.get(req.get("item_id"))
+            requester_id = req.get("requester_id")
+            participants = [p for p in (requester_id, owner_id) if p]
+            operations.append(
+                UpdateOne(
+                    {"_id": req["_id"]},
+                    {"$set": {"owner_id": owner_id, "participants": participants}},
+                )
+            )
+        result = await swap_requests_collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+    return updated
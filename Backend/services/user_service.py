@@ -3,13 +3,51 @@
 Stores users in MongoDB `users` collection with support for async operations.
 """
 
+import re
 from typing import Dict, Any, List, Optional
 from bson import ObjectId
 from bson.errors import InvalidId
-from pymongo import ReturnDocument
+from pymongo import ASCENDING, IndexModel, ReturnDocument
 from database.connection import get_db
 
 
+# Lowercased copies of username/full_name (plus the words of the full name)
+# let search run anchored prefix queries on indexes instead of scanning users
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], name="email"),
+    IndexModel([("username", ASCENDING)], name="username"),
+    # Users created before ObjectIds carry a string `id`
+    IndexModel([("id", ASCENDING)], name="legacy_id", sparse=True),
+    IndexModel([("username_lc", ASCENDING)], name="username_lc"),
+    IndexModel([("full_name_lc", ASCENDING)], name="full_name_lc"),
+    IndexModel([("name_words", ASCENDING)], name="name_words"),
+]
+
+# Fields returned by search; authentication fields are never loaded
+SEARCH_PROJECTION = {
+    "username": 1,
+    "full_name": 1,
+    "profile_pic": 1,
+    "location": 1,
+    "stats": 1,
+}
+
+# Fields shown on a public profile (no email, credits or authentication fields)
+PROFILE_PROJECTION = {
+    "username": 1,
+    "full_name": 1,
+    "bio": 1,
+    "location": 1,
+    "profile_pic": 1,
+    "instagram_handle": 1,
+    "whatsapp_number": 1,
+    "facebook_url": 1,
+    "twitter_handle": 1,
+    "linkedin_url": 1,
+    "rating_stats": 1,
+}
+
+
 def _get_db_optional():
     """Return database handle or None if not connected (test-friendly)."""
     try:
@@ -28,6 +66,89 @@ def _convert_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     return doc
 
 
+async def ensure_user_indexes() -> None:
+    """Create the user search indexes (idempotent)."""
+    db = get_db()
+    await db["users"].create_indexes(USER_INDEXES)
+
+
+def _search_fields(username: Optional[str], full_name: Optional[str]) -> Dict[str, Any]:
+    """Normalized search fields for a username/full name pair."""
+    full_name_lc = (full_name or "").lower()
+    return {
+        "username_lc": (username or "").lower(),
+        "full_name_lc": full_name_lc,
+        "name_words": [word for word in full_name_lc.split(" ") if word],
+    }
+
+
+async def backfill_user_search_fields() -> int:
+    """Set the normalized search fields on users created before they existed.
+
+    Returns:
+        Number of users updated
+    """
+    db = get_db()
+    full_name_lc = {"$toLower": {"$ifNull": ["$full_name", ""]}}
+    result = await db["users"].update_many(
+        {"username_lc": {"$exists": False}},
+        [{"$set": {
+            "username_lc": {"$toLower": {"$ifNull": ["$username", ""]}},
+            "full_name_lc": full_name_lc,
+            "name_words": {"$filter": {
+                "input": {"$split": [full_name_lc, " "]},
+                "cond": {"$ne": ["$$this", ""]},
+            }},
+        }}],
+    )
+    return result.modified_count
+
+
+async def search_users(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Find users whose username, full name or a word of it starts with `query`.
+
+    Results are ranked exact username match first, then username prefix,
+    full name prefix and finally word prefix (e.g. a last name). Each tier is
+    one indexed prefix query capped at the remaining limit, so the work done
+    is bounded by `limit` rather than by the number of users.
+
+    Args:
+        query: Search text (case-insensitive)
+        limit: Maximum number of users to return
+
+    Returns:
+        Users projected to SEARCH_PROJECTION, best match first
+    """
+    db = get_db(stale_reads=True)
+    users_collection = db["users"]
+    query = query.lower().strip()
+    prefix = {"$regex": f"^{re.escape(query)}"}
+    tiers = [
+        ({"username_lc": query}, "username_lc"),
+        ({"username_lc": prefix}, "username_lc"),
+        ({"full_name_lc": prefix}, "full_name_lc"),
+        ({"name_words": prefix}, "full_name_lc"),
+    ]
+
+    results: List[Dict[str, Any]] = []
+    seen = set()
+    for tier_filter, sort_field in tiers:
+        remaining = limit - len(results)
+        if remaining <= 0:
+            break
+        if seen:
+            tier_filter = {**tier_filter, "_id": {"$nin": list(seen)}}
+        cursor = (
+            users_collection.find(tier_filter, SEARCH_PROJECTION)
+            .sort(sort_field, ASCENDING)
+            .limit(remaining)
+        )
+        for user in await cursor.to_list(length=remaining):
+            seen.add(user["_id"])
+            results.append(_convert_id(user))
+    return results
+
+
 async def list_users() -> List[Dict[str, Any]]:
     """List all users."""
     db = get_db()
@@ -66,11 +187,19 @@ async def get_user_by_id(user_id: str, session=None) -> Optional[Dict[str, Any]]
     return _convert_id(user)
 
 
-async def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
-    """Get user by username."""
-    db = get_db()
+async def get_user_by_username(
+    username: str,
+    projection: Optional[Dict[str, Any]] = None,
+    stale_reads: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """Get user by username, optionally loading only the projected fields.
+
+    Pass `stale_reads=True` only for display (see database.connection);
+    uniqueness checks must read the primary.
+    """
+    db = get_db(stale_reads=stale_reads)
     users_collection = db["users"]
-    user = await users_collection.find_one({"username": username})
+    user = await users_collection.find_one({"username": username}, projection)
     return _convert_id(user)
 
 
@@ -88,6 +217,7 @@ async def create_user(
         "email_verified": False,
         "salt": salt,
         "password_hash": password_hash,
+        **_search_fields(username, full_name),
     }
     result = await users_collection.insert_one(user)
     user["_id"] = result.inserted_id
@@ -107,8 +237,6 @@ async def update_user(
         updates: Dictionary of fields to update
         session: Optional MongoDB session for transactions
     """
-    from motor.motor_asyncio import AsyncIOMotorClientSession
-
     allowed = {
         "username",
         "full_name",
@@ -129,6 +257,16 @@ async def update_user(
 
     db = get_db()
     users_collection = db["users"]
+    if "username" in filtered or "full_name" in filtered:
+        # Keep the normalized search fields in step with the originals
+        current = {}
+        if "username" not in filtered or "full_name" not in filtered:
+            current = await get_user_by_id(user_id, session=session) or {}
+        search_fields = _search_fields(
+            filtered.get("username", current.get("username")),
+            filtered.get("full_name", current.get("full_name")),
+        )
+        filtered.update(search_fields)
     try:
         # Try with ObjectId first
         user_oid = ObjectId(user_id)
@@ -0,0 +1,95 @@
+"""Unit tests for per-request MongoDB command accounting."""
+import asyncio
+import contextvars
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from database import connection
+from database.command_monitor import CommandStats, current_commands, track_commands
+
+
+def _started(request_id, name, command):
+    return SimpleNamespace(request_id=request_id, command_name=name, command=command)
+
+
+def _finished(request_id, name, micros):
+    return SimpleNamespace(request_id=request_id, command_name=name, duration_micros=micros)
+
+
+def test_commands_are_counted_inside_the_block():
+    """Test that finished commands add to the active block, by command and collection."""
+    listener = CommandStats()
+    with track_commands() as commands:
+        listener.started(_started(1, "find", {"find": "users", "filter": {}}))
+        listener.succeeded(_finished(1, "find", 1500))
+        listener.started(_started(2, "find", {"find": "users", "filter": {}}))
+        listener.failed(_finished(2, "find", 500))
+        listener.started(_started(3, "getMore", {"getMore": 42, "collection": "items"}))
+        listener.succeeded(_finished(3, "getMore", 1000))
+
+    assert commands.commands == 3
+    assert commands.duration_ms == pytest.approx(3.0)
+    assert commands.by_command == {"find users": 2, "getMore items": 1}
+    assert commands.top_commands() == "find users x2, getMore items x1"
+    assert commands.server_timing() == 'db;dur=3.0;desc="3 MongoDB commands"'
+
+
+def test_commands_outside_a_block_are_ignored():
+    """Test that commands with no active block aren't recorded or retained."""
+    listener = CommandStats()
+    listener.started(_started(1, "ping", {"ping": 1}))
+    listener.succeeded(_finished(1, "ping", 100))
+
+    assert current_commands() is None
+    assert listener._collections == {}
+
+
+@pytest.mark.asyncio
+async def test_commands_from_executor_threads_reach_the_request():
+    """Test that listener calls made in driver threads see the caller's block."""
+    listener = CommandStats()
+    loop = asyncio.get_running_loop()
+
+    def driver_call(request_id):
+        listener.started(_started(request_id, "find", {"find": "items"}))
+        listener.succeeded(_finished(request_id, "find", 200))
+
+    with track_commands() as commands:
+        # Motor runs the driver the same way: in an executor with a copied context
+        await asyncio.gather(*(
+            loop.run_in_executor(None, contextvars.copy_context().run, driver_call, i)
+            for i in range(5)
+        ))
+
+    assert commands.commands == 5
+    assert commands.by_command == {"find items": 5}
+
+
+def test_listener_is_registered_with_the_client():
+    """Test that the client options include the command listener."""
+    assert connection.command_stats in connection._client_options()["event_listeners"]
+
+
+def test_requests_report_server_timing_and_log_over_budget(capsys):
+    """Test that responses carry Server-Timing and requests over budget are logged."""
+    import main
+
+    def chatty_root():
+        commands = current_commands()
+        for _ in range(3):
+            commands.record("find users", 1000)
+        return {"ok": True}
+
+    with patch.object(main, "MONGO_COMMAND_BUDGET", 2):
+        app = main.app
+        app.add_api_route("/__command_budget_test", chatty_root)
+        try:
+            response = TestClient(app).get("/__command_budget_test")
+        finally:
+            app.router.routes.pop()
+
+    assert response.headers["Server-Timing"] == 'db;dur=3.0;desc="3 MongoDB commands"'
+    assert "GET /__command_budget_test sent 3 MongoDB commands (budget 2" in capsys.readouterr().out
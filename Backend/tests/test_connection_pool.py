@@ -0,0 +1,89 @@
+"""Unit tests for MongoDB client tuning, pool warm-up and pool statistics."""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from database import connection
+from database.pool_monitor import PoolStats
+
+
+def test_client_options_follow_settings():
+    """Test that pool, timeout and retry settings reach the client options."""
+    with patch.multiple(
+        connection.settings,
+        mongo_max_pool_size=40,
+        mongo_min_pool_size=8,
+        mongo_max_idle_time_ms=60000,
+        mongo_wait_queue_timeout_ms=2000,
+        mongo_socket_timeout_ms=None,
+        mongo_compressors="zlib",
+        mongo_retry_reads=False,
+    ):
+        options = connection._client_options()
+
+    assert options["maxPoolSize"] == 40
+    assert options["minPoolSize"] == 8
+    assert options["maxIdleTimeMS"] == 60000
+    assert options["waitQueueTimeoutMS"] == 2000
+    assert options["retryReads"] is False
+    assert options["compressors"] == "zlib"
+    # Unset options keep the driver default
+    assert "socketTimeoutMS" not in options
+    assert connection.pool_stats in options["event_listeners"]
+
+
+def test_unavailable_compressors_are_skipped():
+    """Test that compressors without their package (or unknown ones) are dropped."""
+    def find_spec(module):
+        return None if module == "zstandard" else object()
+
+    with patch("database.connection.importlib.util.find_spec", side_effect=find_spec):
+        assert connection._available_compressors("zstd, snappy,lz4,zlib") == ["snappy", "zlib"]
+
+
+@pytest.mark.asyncio
+async def test_warm_pool_opens_min_pool_size_connections():
+    """Test that warm-up runs one concurrent ping per minimum pool connection."""
+    client = MagicMock()
+    client.admin.command = AsyncMock(return_value={"ok": 1})
+
+    with patch.object(connection, "_db_client", client), \
+         patch.multiple(connection.settings, mongo_min_pool_size=4, mongo_max_pool_size=10):
+        await connection._warm_pool()
+
+    assert client.admin.command.await_count == 4
+
+
+def test_pool_stats_track_occupancy_and_waits():
+    """Test that pool events add up to occupancy, queue length and wait times."""
+    stats = PoolStats()
+    event = SimpleNamespace(duration=0.004)
+
+    for _ in range(3):
+        stats.connection_created(event)
+    for _ in range(3):
+        stats.connection_check_out_started(event)
+    stats.connection_checked_out(event)
+    stats.connection_checked_out(SimpleNamespace(duration=0.010))
+    stats.connection_check_out_failed(SimpleNamespace(duration=0.016))
+    stats.connection_check_out_started(event)  # Still waiting
+    stats.connection_checked_in(event)
+
+    snapshot = stats.snapshot()
+    assert snapshot["open_connections"] == 3
+    assert snapshot["checked_out"] == 1
+    assert snapshot["idle"] == 2
+    assert snapshot["wait_queue_length"] == 1
+    assert snapshot["checkouts"] == 2
+    assert snapshot["checkout_failures"] == 1
+    assert snapshot["avg_wait_ms"] == 10.0
+    assert snapshot["max_wait_ms"] == 16.0
+
+
+def test_health_db_reports_pool_stats(client):
+    """Test that /health/db exposes topology and pool statistics."""
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["topology"] == connection.get_topology()
+    assert {"checked_out", "wait_queue_length", "avg_wait_ms", "max_pool_size"} <= set(data["pool"])
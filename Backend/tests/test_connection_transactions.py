@@ -0,0 +1,154 @@
+"""Unit tests for topology detection and the transaction runner."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import OperationFailure
+
+from database import connection
+
+
+def _labelled_error(label):
+    """Build a server error carrying the given error label."""
+    return OperationFailure("conflict", details={"errorLabels": [label]})
+
+
+@pytest.fixture
+def mock_client():
+    """Mock Motor client whose sessions record commits and aborts."""
+    session = MagicMock()
+    session.in_transaction = True
+    session.commit_transaction = AsyncMock()
+    session.abort_transaction = AsyncMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+
+    client = MagicMock()
+    client.start_session = AsyncMock(return_value=session)
+    client.session = session
+    return client
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "hello, topology, supported",
+    [
+        ({"setName": "rs0", "logicalSessionTimeoutMinutes": 30}, "replica_set", True),
+        ({"msg": "isdbgrid", "logicalSessionTimeoutMinutes": 30}, "sharded", True),
+        ({"logicalSessionTimeoutMinutes": 30}, "standalone", False),
+    ],
+)
+async def test_detect_transaction_support(hello, topology, supported):
+    """Test that the hello response determines topology and capability."""
+    client = MagicMock()
+    client.admin.command = AsyncMock(return_value=hello)
+
+    with patch.object(connection, "_db_client", client):
+        await connection._detect_transaction_support()
+        assert connection.get_topology() == topology
+        assert connection.transactions_supported() is supported
+
+    await connection.close_db()
+
+
+@pytest.mark.asyncio
+async def test_run_in_transaction_standalone_passes_no_session(mock_client):
+    """Test that unsupported deployments run the operation once without a session."""
+    operation = AsyncMock(return_value="ok")
+
+    with patch.object(connection, "_transactions_supported", False):
+        result = await connection.run_in_transaction(operation, client=mock_client)
+
+    assert result == "ok"
+    operation.assert_awaited_once_with(None)
+    mock_client.start_session.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_in_transaction_retries_transient_errors(mock_client):
+    """Test that TransientTransactionError aborts and retries the whole transaction."""
+    operation = AsyncMock(side_effect=[_labelled_error("TransientTransactionError"), "ok"])
+
+    with patch.object(connection, "_transactions_supported", True):
+        with patch.object(connection, "_backoff", new_callable=AsyncMock) as mock_backoff:
+            result = await connection.run_in_transaction(operation, client=mock_client)
+
+    assert result == "ok"
+    assert operation.await_count == 2
+    mock_client.session.abort_transaction.assert_awaited_once()
+    mock_client.session.commit_transaction.assert_awaited_once()
+    mock_backoff.assert_awaited_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_run_in_transaction_retries_unknown_commit_result(mock_client):
+    """Test that commits with an unknown outcome are retried without rerunning the work."""
+    mock_client.session.commit_transaction = AsyncMock(
+        side_effect=[_labelled_error("UnknownTransactionCommitResult"), None]
+    )
+    operation = AsyncMock(return_value="ok")
+
+    with patch.object(connection, "_transactions_supported", True):
+        with patch.object(connection, "_backoff", new_callable=AsyncMock):
+            result = await connection.run_in_transaction(operation, client=mock_client)
+
+    assert result == "ok"
+    operation.assert_awaited_once()
+    assert mock_client.session.commit_transaction.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_run_in_transaction_does_not_retry_other_errors(mock_client):
+    """Test that application errors abort the transaction and propagate."""
+    operation = AsyncMock(side_effect=ValueError("Insufficient credits"))
+
+    with patch.object(connection, "_transactions_supported", True):
+        with pytest.raises(ValueError):
+            await connection.run_in_transaction(operation, client=mock_client)
+
+    operation.assert_awaited_once()
+    mock_client.session.abort_transaction.assert_awaited_once()
+
+
+@pytest.mark.parametrize(
+    "topology, secondary_reads, routed",
+    [
+        ("replica_set", True, True),
+        ("replica_set", False, False),
+        ("standalone", True, False),
+    ],
+)
+def test_stale_reads_route_to_secondaries_on_replica_sets(topology, secondary_reads, routed):
+    """Test that only replica sets hand out a secondaryPreferred handle."""
+    database = MagicMock()
+
+    with patch.object(connection, "_database", database), \
+         patch.object(connection, "_topology", topology), \
+         patch.object(connection.settings, "mongo_secondary_reads", secondary_reads), \
+         patch.object(connection, "_stale_read_database", None):
+        connection._configure_read_routing()
+        stale = connection.get_db(stale_reads=True)
+        # Writes and read-after-write paths always get the primary handle
+        assert connection.get_db() is database
+
+    if routed:
+        assert stale is database.with_options.return_value
+        read_preference = database.with_options.call_args.kwargs["read_preference"]
+        assert read_preference.mongos_mode == "secondaryPreferred"
+        assert read_preference.max_staleness == connection.settings.mongo_max_staleness_seconds
+    else:
+        assert stale is database
+
+
+def test_stale_read_staleness_below_driver_minimum_is_clamped(capsys):
+    """Test that a too-low max staleness is raised to 90 at connect, not at the first read."""
+    database = MagicMock()
+
+    with patch.object(connection, "_database", database), \
+         patch.object(connection, "_topology", "replica_set"), \
+         patch.object(connection.settings, "mongo_secondary_reads", True), \
+         patch.object(connection.settings, "mongo_max_staleness_seconds", 30), \
+         patch.object(connection, "_stale_read_database", None):
+        connection._configure_read_routing()
+
+    read_preference = database.with_options.call_args.kwargs["read_preference"]
+    assert read_preference.max_staleness == connection.MIN_MAX_STALENESS_SECONDS
+    assert "WARNING: mongo_max_staleness_seconds=30" in capsys.readouterr().out
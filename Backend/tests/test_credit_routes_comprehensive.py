@@ -22,7 +22,8 @@ class TestGetBalance:
         """Test getting credit balance."""
         app.dependency_overrides[get_current_user_id] = lambda: mock_user["id"]
         try:
-            with patch("services.credit_service.get_user_balance", new_callable=AsyncMock, return_value={"credits": 10.0, "locked_credits": 2.0, "available_credits": 8.0}):
+            summary = {"user_id": mock_user["id"], "balance": 10.0, "ledger_balance": 10.0, "in_sync": True}
+            with patch("services.credit_service.get_balance_summary", new_callable=AsyncMock, return_value=summary):
                 response = client.get(
                     "/credits/balance",
                     headers={"Authorization": f"Bearer {mock_token}"}
@@ -34,6 +35,19 @@ class TestGetBalance:
         finally:
             app.dependency_overrides.clear()
     
+    def test_get_balance_unknown_user(self, client, mock_user, mock_token):
+        """Test getting balance for a user that no longer exists."""
+        app.dependency_overrides[get_current_user_id] = lambda: mock_user["id"]
+        try:
+            with patch("services.credit_service.get_balance_summary", new_callable=AsyncMock, side_effect=ValueError("User user123 not found")):
+                response = client.get(
+                    "/credits/balance",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 404
+        finally:
+            app.dependency_overrides.clear()
+    
     def test_get_balance_no_auth(self, client):
         """Test getting balance without authentication."""
         response = client.get("/credits/balance")
@@ -147,7 +161,8 @@ class TestGetTransactions:
         ]
         app.dependency_overrides[get_current_user_id] = lambda: mock_user["id"]
         try:
-            with patch("services.credit_service.get_user_transactions", new_callable=AsyncMock, return_value=transactions):
+            page = {"transactions": transactions, "next_cursor": None, "has_more": False}
+            with patch("services.credit_service.get_user_transactions_page", new_callable=AsyncMock, return_value=page):
                 response = client.get(
                     "/credits/transactions",
                     headers={"Authorization": f"Bearer {mock_token}"}
@@ -165,3 +180,71 @@ class TestGetTransactions:
         response = client.get("/credits/transactions")
         assert response.status_code == 401
 
+    def test_get_transactions_invalid_cursor(self, client, mock_user, mock_token):
+        """Test that a malformed cursor is rejected."""
+        app.dependency_overrides[get_current_user_id] = lambda: mock_user["id"]
+        try:
+            with patch("services.credit_service.get_user_transactions_page", new_callable=AsyncMock, side_effect=ValueError("Invalid cursor")):
+                response = client.get(
+                    "/credits/transactions?cursor=bogus",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 400
+        finally:
+            app.dependency_overrides.clear()
+
+
+class TestExportTransactions:
+    """Tests for GET /credits/transactions/export endpoint."""
+
+    @staticmethod
+    def _stream(rows):
+        async def gen(user_id, batch_size=500):
+            for row in rows:
+                yield row
+        return gen
+
+    def test_export_csv(self, client, mock_user, mock_token):
+        """Test streaming the history as CSV."""
+        rows = [{"id": "t1", "created_at": "2024-01-02T00:00:00", "type": "credit_add", "amount": 2.0, "description": "Top up", "user_id": mock_user["id"]}]
+        app.dependency_overrides[get_current_user_id] = lambda: mock_user["id"]
+        try:
+            with patch("services.credit_service.iter_user_transactions", self._stream(rows)):
+                response = client.get(
+                    "/credits/transactions/export?format=csv",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 200
+                assert response.headers["content-type"].startswith("text/csv")
+                lines = response.text.strip().splitlines()
+                assert lines[0] == "id,created_at,type,amount,description"
+                assert lines[1] == "t1,2024-01-02T00:00:00,credit_add,2.0,Top up"
+        finally:
+            app.dependency_overrides.clear()
+
+    def test_export_ndjson(self, client, mock_user, mock_token):
+        """Test streaming the history as NDJSON."""
+        rows = [{"id": "t1", "created_at": "2024-01-02T00:00:00", "type": "credit_add", "amount": 2.0, "description": ""}]
+        app.dependency_overrides[get_current_user_id] = lambda: mock_user["id"]
+        try:
+            with patch("services.credit_service.iter_user_transactions", self._stream(rows)):
+                response = client.get(
+                    "/credits/transactions/export?format=ndjson",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 200
+                assert response.json() == {"id": "t1", "created_at": "2024-01-02T00:00:00", "type": "credit_add", "amount": 2.0, "description": ""}
+        finally:
+            app.dependency_overrides.clear()
+
+    def test_export_invalid_format(self, client, mock_user, mock_token):
+        """Test that unsupported export formats are rejected."""
+        app.dependency_overrides[get_current_user_id] = lambda: mock_user["id"]
+        try:
+            response = client.get(
+                "/credits/transactions/export?format=xml",
+                headers={"Authorization": f"Bearer {mock_token}"}
+            )
+            assert response.status_code == 422
+        finally:
+            app.dependency_overrides.clear()
@@ -0,0 +1,222 @@
+"""Unit tests for atomic credit mutations using a mocked database."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services import credit_service
+
+
+@pytest.fixture
+def mock_db():
+    """Mock database with users/transactions collections and session support."""
+    users = MagicMock()
+    transactions = MagicMock()
+    insert_result = MagicMock()
+    insert_result.inserted_id = ObjectId()
+    transactions.insert_one = AsyncMock(return_value=insert_result)
+
+    session = MagicMock()
+    session.in_transaction = True
+    session.commit_transaction = AsyncMock()
+    session.abort_transaction = AsyncMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+
+    db = MagicMock()
+    db.__getitem__.side_effect = {"users": users, "transactions": transactions}.__getitem__
+    db.client.start_session = AsyncMock(return_value=session)
+    db.users, db.transactions, db.session = users, transactions, session
+    return db
+
+
+@pytest.mark.asyncio
+async def test_deduct_credits_is_conditional_increment(mock_db):
+    """Test that deductions are one filtered $inc returning the new balance."""
+    user_id = str(ObjectId())
+    mock_db.users.find_one_and_update = AsyncMock(return_value={"_id": ObjectId(user_id), "credits": 3.0})
+
+    with patch("services.credit_service.get_db", return_value=mock_db):
+        with patch("database.connection._transactions_supported", True):
+            balance = await credit_service.deduct_credits(user_id, 2.0)
+
+    assert balance == 3.0
+    args, kwargs = mock_db.users.find_one_and_update.call_args
+    assert args[0] == {"_id": ObjectId(user_id), "credits": {"$gte": 2.0}}
+    assert args[1] == {"$inc": {"credits": -2.0}}
+    assert kwargs["session"] is mock_db.session
+    mock_db.session.commit_transaction.assert_awaited_once()
+    mock_db.users.find_one.assert_not_called()
+
+    ledger_entry = mock_db.transactions.insert_one.call_args.args[0]
+    assert ledger_entry["amount"] == 2.0
+    assert mock_db.transactions.insert_one.call_args.kwargs["session"] is mock_db.session
+
+
+@pytest.mark.asyncio
+async def test_deduct_credits_insufficient_records_nothing(mock_db):
+    """Test that a failed balance check raises without writing a ledger entry."""
+    user_id = str(ObjectId())
+    mock_db.users.find_one_and_update = AsyncMock(return_value=None)
+    mock_db.users.find_one = AsyncMock(return_value={"_id": ObjectId(user_id), "credits": 1.0})
+
+    with patch("services.credit_service.get_db", return_value=mock_db):
+        with pytest.raises(ValueError, match="Insufficient credits"):
+            await credit_service.deduct_credits(user_id, 2.0)
+
+    mock_db.transactions.insert_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_add_credits_unknown_user(mock_db):
+    """Test that adding credits to a missing user raises ValueError."""
+    mock_db.users.find_one_and_update = AsyncMock(return_value=None)
+    mock_db.users.find_one = AsyncMock(return_value=None)
+
+    with patch("services.credit_service.get_db", return_value=mock_db):
+        with pytest.raises(ValueError, match="not found"):
+            await credit_service.add_credits(str(ObjectId()), 1.0)
+
+
+@pytest.mark.asyncio
+async def test_add_credits_standalone_skips_session(mock_db):
+    """Test that standalone deployments apply the change without opening a session."""
+    user_id = str(ObjectId())
+    mock_db.users.find_one_and_update = AsyncMock(return_value={"_id": ObjectId(user_id), "credits": 6.0})
+
+    with patch("services.credit_service.get_db", return_value=mock_db):
+        with patch("database.connection._transactions_supported", False):
+            balance = await credit_service.add_credits(user_id, 1.0)
+
+    assert balance == 6.0
+    mock_db.client.start_session.assert_not_called()
+    assert mock_db.users.find_one_and_update.call_args.kwargs["session"] is None
+
+
+@pytest.mark.asyncio
+async def test_transfer_credits_applies_both_sides(mock_db):
+    """Test that a transfer debits the payer and credits the receiver."""
+    payer, receiver = str(ObjectId()), str(ObjectId())
+    mock_db.users.find_one_and_update = AsyncMock(
+        side_effect=[{"credits": 4.0}, {"credits": 7.0}]
+    )
+
+    with patch("services.credit_service.get_db", return_value=mock_db):
+        balances = await credit_service.transfer_credits(payer, receiver, 1.0)
+
+    assert balances == (4.0, 7.0)
+    debit, credit = mock_db.users.find_one_and_update.call_args_list
+    assert debit.args[1] == {"$inc": {"credits": -1.0}}
+    assert credit.args[1] == {"$inc": {"credits": 1.0}}
+    assert mock_db.transactions.insert_one.await_count == 2
+
+
+def _mock_aggregate(collection, rows):
+    """Make collection.aggregate return a cursor yielding the given rows."""
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=rows)
+    collection.aggregate = MagicMock(return_value=cursor)
+
+
+@pytest.fixture
+def mock_ledger_db(mock_db):
+    """Extend mock_db with a balance_checkpoints collection."""
+    checkpoints = MagicMock()
+    checkpoints.update_one = AsyncMock()
+    collections = {"users": mock_db.users, "transactions": mock_db.transactions, "balance_checkpoints": checkpoints}
+    mock_db.__getitem__.side_effect = collections.__getitem__
+    mock_db.checkpoints = checkpoints
+    return mock_db
+
+
+@pytest.mark.asyncio
+async def test_balance_summary_aggregates_only_after_checkpoint(mock_ledger_db):
+    """Test that the integrity check sums only rows after the latest checkpoint."""
+    user_id = str(ObjectId())
+    last_id = ObjectId()
+    mock_ledger_db.users.find_one = AsyncMock(return_value={"_id": ObjectId(user_id), "credits": 12.0})
+    mock_ledger_db.checkpoints.find_one = AsyncMock(
+        return_value={"user_id": user_id, "balance": 10.0, "last_transaction_id": last_id}
+    )
+    _mock_aggregate(mock_ledger_db.transactions, [{"balance": 2.0, "count": 3, "last_id": ObjectId()}])
+
+    with patch("services.credit_service.get_db", return_value=mock_ledger_db):
+        summary = await credit_service.get_balance_summary(user_id)
+
+    assert summary == {"user_id": user_id, "balance": 12.0, "ledger_balance": 12.0, "in_sync": True}
+    match = mock_ledger_db.transactions.aggregate.call_args.args[0][0]["$match"]
+    assert match == {"user_id": user_id, "_id": {"$gt": last_id}}
+    mock_ledger_db.checkpoints.update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_balance_summary_reports_drift(mock_ledger_db):
+    """Test that a credits field that disagrees with the ledger is flagged."""
+    user_id = str(ObjectId())
+    mock_ledger_db.users.find_one = AsyncMock(return_value={"_id": ObjectId(user_id), "credits": 5.0})
+    mock_ledger_db.checkpoints.find_one = AsyncMock(return_value=None)
+    _mock_aggregate(mock_ledger_db.transactions, [{"balance": 4.0, "count": 2, "last_id": ObjectId()}])
+
+    with patch("services.credit_service.get_db", return_value=mock_ledger_db):
+        summary = await credit_service.get_balance_summary(user_id)
+
+    assert summary["balance"] == 5.0
+    assert summary["ledger_balance"] == 4.0
+    assert summary["in_sync"] is False
+
+
+@pytest.mark.asyncio
+async def test_long_delta_writes_new_checkpoint(mock_ledger_db):
+    """Test that a delta past CHECKPOINT_INTERVAL folds settled rows into a checkpoint."""
+    user_id = str(ObjectId())
+    settled_id = ObjectId()
+    mock_ledger_db.users.find_one = AsyncMock(return_value={"_id": ObjectId(user_id), "credits": 150.0})
+    mock_ledger_db.checkpoints.find_one = AsyncMock(return_value=None)
+    _mock_aggregate(
+        mock_ledger_db.transactions,
+        [{"balance": 150.0, "count": credit_service.CHECKPOINT_INTERVAL, "last_id": settled_id}],
+    )
+
+    with patch("services.credit_service.get_db", return_value=mock_ledger_db):
+        await credit_service.get_balance_summary(user_id)
+
+    # Second aggregation only covers rows older than the checkpoint lag
+    checkpoint_match = mock_ledger_db.transactions.aggregate.call_args_list[1].args[0][0]["$match"]
+    assert "$lt" in checkpoint_match["_id"]
+    guard, update = mock_ledger_db.checkpoints.update_one.call_args.args
+    assert guard == {"user_id": user_id, "last_transaction_id": None}
+    assert update["$set"]["balance"] == 150.0
+    assert update["$set"]["last_transaction_id"] == settled_id
+
+
+@pytest.mark.asyncio
+async def test_transactions_page_uses_keyset_cursor(mock_db):
+    """Test that history pages seek past the cursor and report the next one."""
+    from utils.pagination import encode_cursor
+
+    user_id = str(ObjectId())
+    rows = [
+        {"_id": ObjectId(), "user_id": user_id, "created_at": f"2024-01-0{day}T00:00:00"}
+        for day in (3, 2, 1)
+    ]
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=rows)
+    mock_db.transactions.find.return_value = cursor
+    after = {"_id": ObjectId(), "created_at": "2024-01-04T00:00:00"}
+    expected_next = encode_cursor(rows[1], "created_at")
+
+    with patch("services.credit_service.get_db", return_value=mock_db):
+        page = await credit_service.get_user_transactions_page(
+            user_id, limit=2, cursor=encode_cursor(after, "created_at")
+        )
+
+    query = mock_db.transactions.find.call_args.args[0]
+    assert query["$or"] == [
+        {"created_at": {"$lt": "2024-01-04T00:00:00"}},
+        {"created_at": "2024-01-04T00:00:00", "_id": {"$lt": after["_id"]}},
+    ]
+    cursor.limit.assert_called_once_with(3)
+    assert len(page["transactions"]) == 2
+    assert page["has_more"] is True
+    assert page["next_cursor"] == expected_next
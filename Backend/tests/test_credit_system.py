@@ -114,8 +114,8 @@ class TestCreditDeductionOnRequest:
                                 ):
                                     with patch(
                                         "routes.swap_routes"
-                                        ".notification_service"
-                                        ".create_notification",
+                                        ".notification_outbox"
+                                        ".enqueue_notification",
                                         return_value=None,
                                     ):
                                         item_id = mock_item["id"]
@@ -203,8 +203,8 @@ class TestCreditRefundOnCancellation:
                                 ):
                                     with patch(
                                         "routes.swap_routes"
-                                        ".notification_service"
-                                        ".create_notification",
+                                        ".notification_outbox"
+                                        ".enqueue_notification",
                                         return_value=None,
                                     ):
                                         with patch(
@@ -265,8 +265,8 @@ class TestCreditRefundOnRejection:
                                 ):
                                     with patch(
                                         "routes.swap_routes"
-                                        ".notification_service"
-                                        ".create_notification",
+                                        ".notification_outbox"
+                                        ".enqueue_notification",
                                         return_value=None,
                                     ):
                                         with patch(
@@ -0,0 +1,202 @@
+"""Unit tests for the domain event bus and the services that publish to it."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services import event_bus
+
+
+@pytest.fixture
+def received():
+    """Subscribe a recording handler to every event type for one test."""
+    events = []
+    types = [
+        event_bus.ITEM_UPDATED, event_bus.SWAP_STATUS_CHANGED,
+        event_bus.CREDITS_CHANGED, event_bus.NOTIFICATION_CREATED,
+    ]
+    handlers = {t: (lambda payload, t=t: events.append((t, payload))) for t in types}
+    for event_type, handler in handlers.items():
+        event_bus.subscribe(event_type, handler)
+    yield events
+    for event_type, handler in handlers.items():
+        event_bus.unsubscribe(event_type, handler)
+
+
+@pytest.mark.asyncio
+async def test_publish_runs_sync_and_async_handlers():
+    """Test that both plain functions and coroutines receive events."""
+    seen = []
+
+    async def async_handler(payload):
+        seen.append(("async", payload))
+
+    def failing_handler(payload):
+        raise RuntimeError("boom")
+
+    for handler in (failing_handler, seen.append, async_handler):
+        event_bus.subscribe("test.event", handler)
+    try:
+        event_bus.publish("test.event", {"n": 1})
+        await asyncio.sleep(0)
+    finally:
+        for handler in (failing_handler, seen.append, async_handler):
+            event_bus.unsubscribe("test.event", handler)
+
+    assert seen == [{"n": 1}, ("async", {"n": 1})]
+
+
+@pytest.mark.asyncio
+async def test_mongo_backend_relays_only_foreign_events():
+    """Test that the tailer dispatches other processes' events, not its own."""
+    events = [
+        {"_id": ObjectId(), "type": "test.event", "payload": {"n": 1}, "origin": event_bus.PROCESS_ID},
+        {"_id": ObjectId(), "type": "test.event", "payload": {"n": 2}, "origin": "other-worker"},
+    ]
+
+    async def tail():
+        for event in events:
+            yield event
+
+    backend = event_bus.MongoBackend()
+    backend._collection = MagicMock()
+    backend._collection.find = MagicMock(return_value=tail())
+    backend._collection.insert_one = AsyncMock()
+    backend._outbox = asyncio.Queue()
+    seen = []
+    event_bus.subscribe("test.event", seen.append)
+    try:
+        with patch("services.event_bus.asyncio.sleep", side_effect=asyncio.CancelledError):
+            with pytest.raises(asyncio.CancelledError):
+                await backend._tail(None)
+        backend.publish("test.event", {"n": 3})
+        writer = asyncio.ensure_future(backend._write())
+        await backend._outbox.join()
+        writer.cancel()
+    finally:
+        event_bus.unsubscribe("test.event", seen.append)
+
+    assert seen == [{"n": 2}]
+    relayed = backend._collection.insert_one.call_args.args[0]
+    assert relayed == {
+        "type": "test.event", "payload": {"n": 3}, "origin": event_bus.PROCESS_ID,
+        "ts": event_bus.SERVER_TIMESTAMP,
+    }
+
+
+@pytest.mark.asyncio
+async def test_mongo_backend_writes_events_in_publish_order():
+    """Test that a process's events are inserted one after another, never concurrently."""
+    backend = event_bus.MongoBackend()
+    backend._collection = MagicMock()
+    backend._outbox = asyncio.Queue()
+    written, in_flight = [], []
+
+    async def insert_one(event):
+        in_flight.append(event)
+        assert len(in_flight) == 1
+        await asyncio.sleep(0)
+        written.append(event["payload"]["n"])
+        in_flight.remove(event)
+
+    backend._collection.insert_one = insert_one
+    for n in range(3):
+        backend.publish("test.event", {"n": n})
+    writer = asyncio.ensure_future(backend._write())
+    await backend._outbox.join()
+    writer.cancel()
+
+    assert written == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_mongo_backend_resumes_by_server_timestamp_without_repeats():
+    """Test that a re-opened cursor rescans the overlap by ts and skips dispatched events."""
+    from bson.timestamp import Timestamp
+
+    first = {"_id": ObjectId(), "type": "test.event", "payload": {"n": 1}, "origin": "w2", "ts": Timestamp(100, 1)}
+    # Client-made _id older than `first`'s, but visible only after the cursor died
+    late = {"_id": ObjectId.from_datetime(first["_id"].generation_time.replace(year=2000)),
+            "type": "test.event", "payload": {"n": 2}, "origin": "w3", "ts": Timestamp(99, 7)}
+
+    async def cursor(*events):
+        for event in events:
+            yield event
+
+    backend = event_bus.MongoBackend()
+    backend._collection = MagicMock()
+    backend._collection.find = MagicMock(side_effect=[cursor(first), cursor(late, first)])
+    seen = []
+    event_bus.subscribe("test.event", seen.append)
+    try:
+        with patch("services.event_bus.asyncio.sleep", side_effect=[None, asyncio.CancelledError]):
+            with pytest.raises(asyncio.CancelledError):
+                await backend._tail(Timestamp(90, 0))
+    finally:
+        event_bus.unsubscribe("test.event", seen.append)
+
+    queries = [call.args[0] for call in backend._collection.find.call_args_list]
+    assert queries[0] == {"ts": {"$gt": Timestamp(90, 0)}}
+    assert queries[1] == {"ts": {"$gte": Timestamp(100 - event_bus.TAIL_RESUME_OVERLAP_SECONDS, 0)}}
+    assert seen == [{"n": 1}, {"n": 2}]
+
+
+@pytest.mark.asyncio
+async def test_start_rejects_unknown_backend():
+    """Test that a misconfigured backend name fails loudly."""
+    with pytest.raises(ValueError, match="Unknown event bus backend"):
+        await event_bus.start("kafka")
+
+
+@pytest.mark.asyncio
+async def test_swap_status_change_is_published(received):
+    """Test that updating a swap request announces the old and new status."""
+    from services import swap_service
+
+    request_id = ObjectId()
+    collection = MagicMock()
+    collection.find_one_and_update = AsyncMock(return_value={
+        "_id": request_id, "item_id": "i1", "requester_id": "u1", "owner_id": "u2", "status": "pending",
+    })
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        with patch("services.storage_service.adjust_pending_requests", new_callable=AsyncMock):
+            await swap_service.update_swap_request(str(request_id), "approved")
+
+    assert received == [(event_bus.SWAP_STATUS_CHANGED, {
+        "request_id": str(request_id), "item_id": "i1", "requester_id": "u1",
+        "owner_id": "u2", "status": "approved", "previous_status": "pending",
+    })]
+
+
+@pytest.mark.asyncio
+async def test_credit_change_is_published(received):
+    """Test that applied credit changes announce the new balance."""
+    from services import credit_service
+
+    user_id = str(ObjectId())
+    db = MagicMock()
+    db["users"].find_one_and_update = AsyncMock(return_value={"credits": 5.0})
+    db["transactions"].insert_one = AsyncMock()
+    with patch("services.credit_service.get_db", return_value=db):
+        with patch("database.connection._transactions_supported", False):
+            await credit_service.add_credits(user_id, 1.0)
+
+    assert received == [(event_bus.CREDITS_CHANGED, {
+        "user_id": user_id, "balance": 5.0, "transaction_type": "credit_add",
+    })]
+
+
+@pytest.mark.asyncio
+async def test_item_delete_is_published(received):
+    """Test that deleting an item announces it."""
+    from services import storage_service
+
+    item_id = str(ObjectId())
+    collection = MagicMock()
+    collection.delete_one = AsyncMock(return_value=MagicMock(deleted_count=1))
+    with patch("services.storage_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        assert await storage_service.delete_item(item_id) is True
+
+    assert received == [(event_bus.ITEM_UPDATED, {"item_id": item_id, "status": None, "deleted": True})]
@@ -0,0 +1,157 @@
+"""Index coverage checks: every service query shape must avoid a COLLSCAN.
+
+Builds the registered indexes in a throwaway database on a local mongod and
+runs each query shape the services issue through `explain`. Skipped when no
+server is reachable at TEST_MONGODB_URI (default mongodb://localhost:27017).
+
+Shapes that scan on purpose (full exports, backfills over documents missing
+a field) are not listed. Add a shape here whenever a service gains a query.
+"""
+import os
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from database.indexes import INDEX_REGISTRY
+
+
+TEST_MONGODB_URI = os.getenv("TEST_MONGODB_URI", "mongodb://localhost:27017")
+
+OID = ObjectId()
+NOW = datetime.now().isoformat()
+
+# (collection, command) pairs mirroring the service queries
+QUERY_SHAPES = [
+    # user_service
+    ("users", {"find": "users", "filter": {"email": "a@b.c"}}),
+    ("users", {"find": "users", "filter": {"username": "sam"}}),
+    ("users", {"find": "users", "filter": {"id": "legacy"}}),
+    ("users", {"find": "users", "filter": {"username_lc": {"$regex": "^sa"}}, "sort": {"username_lc": 1}}),
+    ("users", {"find": "users", "filter": {"full_name_lc": {"$regex": "^sa"}}, "sort": {"full_name_lc": 1}}),
+    ("users", {"find": "users", "filter": {"name_words": {"$regex": "^sa"}}}),
+    # storage_service
+    ("items", {"find": "items", "filter": {"owner_id": "u1"}, "sort": {"_id": -1}}),
+    ("items", {"find": "items", "filter": {"status": "available"}, "sort": {"_id": -1}}),
+    ("items", {"find": "items", "filter": {"status": "available", "category": "Tops"}, "sort": {"_id": -1}}),
+    ("items", {"find": "items", "filter": {"status": "available"}, "sort": {"credits": 1, "_id": 1}}),
+    ("items", {"find": "items", "filter": {"status": "available"}, "sort": {"title": 1, "_id": 1}}),
+    ("items", {"find": "items", "filter": {"status": "available", "pending_requests": {"$not": {"$gt": 0}}}, "sort": {"_id": -1}}),
+    ("items", {"find": "items", "filter": {"$or": [{"status": "pending"}, {"status": "available", "pending_requests": {"$gt": 0}}]}, "sort": {"_id": -1}}),
+    ("items", {"find": "items", "filter": {"$and": [{"status": "available"}, {"$or": [
+        {"title": {"$regex": "coat", "$options": "i"}},
+        {"category": {"$regex": "coat", "$options": "i"}},
+        {"brand": {"$regex": "coat", "$options": "i"}},
+    ]}]}}),
+    ("items", {"find": "items", "filter": {"id": "legacy"}}),
+    ("items", {"aggregate": "items", "pipeline": [
+        {"$match": {"owner_id": "u1"}}, {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+    ], "cursor": {}}),
+    # swap_service
+    ("swap_requests", {"find": "swap_requests", "filter": {"item_id": "i1", "status": "pending"}}),
+    ("swap_requests", {"find": "swap_requests", "filter": {"requester_id": "u1"}}),
+    ("swap_requests", {"count": "swap_requests", "query": {"requester_id": "u1", "status": "pending"}}),
+    ("swap_requests", {"find": "swap_requests", "filter": {"owner_id": "u1", "status": "pending"}, "sort": {"created_at": 1}}),
+    ("swap_requests", {"count": "swap_requests", "query": {"participants": "u1", "status": "approved"}}),
+    # credit_service
+    ("transactions", {"find": "transactions", "filter": {"user_id": "u1"}, "sort": {"created_at": -1, "_id": -1}}),
+    ("transactions", {"aggregate": "transactions", "pipeline": [
+        {"$match": {"user_id": {"$in": ["u1", "u2"]}}}, {"$group": {"_id": "$user_id", "n": {"$sum": 1}}},
+    ], "cursor": {}}),
+    ("transactions", {"aggregate": "transactions", "pipeline": [
+        {"$match": {"user_id": "u1", "_id": {"$gt": OID}}}, {"$group": {"_id": None, "count": {"$sum": 1}}},
+    ], "cursor": {}}),
+    ("balance_checkpoints", {"find": "balance_checkpoints", "filter": {"user_id": "u1"}}),
+    # reconciliation_service
+    ("credit_drift_reports", {"find": "credit_drift_reports", "filter": {"run_id": "r1", "user_id": "u1"}}),
+    # notification_service / notification_retention
+    ("notifications", {"find": "notifications", "filter": {"user_id": "u1"}, "sort": {"created_at": -1}}),
+    ("notifications", {"find": "notifications", "filter": {"user_id": "u1", "_id": {"$gt": OID}}}),
+    ("notifications", {"find": "notifications", "filter": {"user_id": "u1", "updated_at": {"$gte": NOW}}, "sort": {"updated_at": 1, "_id": 1}}),
+    ("notifications", {"find": "notifications", "filter": {"user_id": "u1", "updated_at": {"$gte": NOW}, "$or": [
+        {"updated_at": {"$gt": NOW}}, {"updated_at": NOW, "_id": {"$gt": OID}},
+    ]}, "sort": {"updated_at": 1, "_id": 1}}),
+    ("notifications", {"count": "notifications", "query": {"user_id": "u1", "read": False}}),
+    ("notifications", {"find": "notifications", "filter": {"read": False, "created_at": {"$lt": NOW}}, "sort": {"created_at": 1}}),
+    ("notification_archives", {"find": "notification_archives", "filter": {
+        "user_id": "u1", "oldest_created_at": {"$lte": NOW},
+    }, "sort": {"oldest_created_at": -1}, "projection": {"count": 1}}),
+    ("notification_archives", {"aggregate": "notification_archives", "pipeline": [
+        {"$match": {"user_id": "u1", "oldest_created_at": {"$lte": NOW}, "newest_created_at": {"$gte": NOW}}},
+        {"$unwind": "$notifications"},
+    ], "cursor": {}}),
+    # rating_service
+    ("ratings", {"find": "ratings", "filter": {"rater_user_id": "u1", "rated_user_id": "u2"}}),
+    ("ratings", {"find": "ratings", "filter": {"rated_user_id": "u2"}}),
+    ("ratings", {"aggregate": "ratings", "pipeline": [
+        {"$match": {"rated_user_id": "u2"}}, {"$group": {"_id": "$stars", "count": {"$sum": 1}}},
+    ], "cursor": {}}),
+    # slow_query_service
+    ("slow_queries", {"aggregate": "slow_queries", "pipeline": [
+        {"$match": {"at": {"$gte": datetime(2024, 1, 1)}}}, {"$group": {"_id": "$shape_key"}},
+    ], "cursor": {}}),
+]
+
+
+def _winning_stages(node):
+    """Yield every stage name inside the winning plans of an explain result."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "winningPlan":
+                yield from _plan_stages(value)
+            else:
+                yield from _winning_stages(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _winning_stages(value)
+
+
+def _plan_stages(plan):
+    """Yield the stage names of one plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+@pytest.fixture(scope="module")
+def indexed_db():
+    """A throwaway database holding every registered index."""
+    client = MongoClient(TEST_MONGODB_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        pytest.skip(f"No MongoDB server reachable at {TEST_MONGODB_URI}")
+
+    db = client[f"swapcircle_index_coverage_{uuid4().hex[:8]}"]
+    for collection, models in INDEX_REGISTRY.items():
+        db[collection].create_indexes(models)
+    try:
+        yield db
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+def test_query_shapes_cover_registered_collections():
+    """Test that every registered collection has at least one checked query."""
+    assert {collection for collection, _ in QUERY_SHAPES} == set(INDEX_REGISTRY)
+
+
+@pytest.mark.parametrize(
+    "collection,command", QUERY_SHAPES, ids=[f"{c}-{i}" for i, (c, _) in enumerate(QUERY_SHAPES)]
+)
+def test_query_uses_an_index(indexed_db, collection, command):
+    """Test that the winning plan of a service query never scans the collection."""
+    explain = indexed_db.command("explain", command, verbosity="queryPlanner")
+    stages = list(_winning_stages(explain))
+    assert stages, f"No winning plan in explain output for {command}"
+    assert "COLLSCAN" not in stages, f"{collection} query scans the collection: {command}"
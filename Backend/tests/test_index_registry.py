@@ -0,0 +1,90 @@
+"""Unit tests for the index registry, its startup bootstrap and drift report."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo import ASCENDING, IndexModel
+
+from database import indexes
+
+
+class _IndexCursor:
+    """Mock list_indexes cursor yielding index specs."""
+
+    def __init__(self, specs):
+        self._specs = iter(specs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._specs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _db_with_indexes(specs_by_collection):
+    """Mock database whose collections list the given index specs."""
+    collections = {}
+    for name, specs in specs_by_collection.items():
+        collection = MagicMock()
+        collection.list_indexes = MagicMock(return_value=_IndexCursor(specs))
+        collections[name] = collection
+    db = MagicMock()
+    db.__getitem__.side_effect = collections.__getitem__
+    return db
+
+
+@pytest.mark.asyncio
+async def test_find_index_drift_reports_missing_changed_and_unexpected():
+    """Test that drift lists missing, changed and unregistered indexes."""
+    registry = {
+        "widgets": [
+            IndexModel([("owner_id", ASCENDING)], name="owner"),
+            IndexModel([("code", ASCENDING)], name="code_unique", unique=True),
+            IndexModel([("status", ASCENDING)], name="status"),
+        ],
+        "clean": [IndexModel([("user_id", ASCENDING)], name="user")],
+    }
+    db = _db_with_indexes({
+        "widgets": [
+            {"v": 2, "key": {"_id": 1}, "name": "_id_"},
+            {"v": 2, "key": {"owner_id": 1}, "name": "owner"},
+            # Built without the unique option
+            {"v": 2, "key": {"code": 1}, "name": "code_unique"},
+            {"v": 2, "key": {"legacy": 1}, "name": "legacy"},
+        ],
+        # Servers may report key directions as doubles
+        "clean": [{"v": 2, "key": {"user_id": 1.0}, "name": "user"}],
+    })
+
+    with patch.object(indexes, "INDEX_REGISTRY", registry), \
+         patch("database.indexes.get_db", return_value=db):
+        drift = await indexes.find_index_drift()
+
+    assert drift == {
+        "widgets": {"missing": ["status"], "changed": ["code_unique"], "unexpected": ["legacy"]}
+    }
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_runs_every_builder_despite_failures():
+    """Test that one failing builder doesn't stop the others or the drift report."""
+    failing = AsyncMock(side_effect=RuntimeError("boom"))
+    failing.__name__ = "ensure_failing_indexes"
+    working = AsyncMock()
+    drift = {"items": {"missing": ["owner_newest"], "changed": [], "unexpected": []}}
+
+    with patch.object(indexes, "INDEX_BUILDERS", (failing, working)), \
+         patch("database.indexes.find_index_drift", new_callable=AsyncMock, return_value=drift):
+        result = await indexes.ensure_indexes()
+
+    failing.assert_awaited_once()
+    working.assert_awaited_once()
+    assert result == drift
+
+
+def test_registry_index_names_are_unique_per_collection():
+    """Test that no collection declares two indexes under the same name."""
+    for collection, models in indexes.INDEX_REGISTRY.items():
+        names = [model.document["name"] for model in models]
+        assert len(names) == len(set(names)), collection
@@ -86,7 +86,7 @@ class TestListItems:
         """Test listing all items."""
         with patch("routes.item_routes.storage_service.list_items", new_callable=AsyncMock, return_value=[mock_item]):
             with patch("routes.item_routes.swap_service.get_pending_requests_for_item", new_callable=AsyncMock, return_value=[]):
-                response = client.get("/items/")
+                response = client.get("/items/?paginate=false")
                 assert response.status_code == 200
                 data = response.json()
                 assert isinstance(data, list)
@@ -96,7 +96,7 @@ class TestListItems:
         """Test listing items filtered by owner."""
         with patch("routes.item_routes.storage_service.list_items", new_callable=AsyncMock, return_value=[mock_item]):
             with patch("routes.item_routes.swap_service.get_pending_requests_for_item", new_callable=AsyncMock, return_value=[]):
-                response = client.get("/items/?owner_id=user123")
+                response = client.get("/items/?owner_id=user123&paginate=false")
                 assert response.status_code == 200
                 data = response.json()
                 assert all(item["owner_id"] == "user123" for item in data)
@@ -105,7 +105,7 @@ class TestListItems:
         """Test listing items filtered by status."""
         with patch("routes.item_routes.storage_service.list_items", new_callable=AsyncMock, return_value=[mock_item]):
             with patch("routes.item_routes.swap_service.get_pending_requests_for_item", new_callable=AsyncMock, return_value=[]):
-                response = client.get("/items/?status=available")
+                response = client.get("/items/?status=available&paginate=false")
                 assert response.status_code == 200
                 data = response.json()
                 assert all(item["status"] == "available" for item in data)
@@ -113,12 +113,111 @@ class TestListItems:
     def test_list_items_empty(self, client):
         """Test listing items when none exist."""
         with patch("routes.item_routes.storage_service.list_items", new_callable=AsyncMock, return_value=[]):
-            response = client.get("/items/")
+            response = client.get("/items/?paginate=false")
             assert response.status_code == 200
             data = response.json()
             assert data == []
 
 
+class TestListItemsPaginated:
+    """Tests for the paginated GET /items/ mode (the default)."""
+
+    def test_list_items_page_success(self, client, mock_item):
+        """Test that the default mode returns a page envelope."""
+        page = {"items": [mock_item], "next_cursor": "abc", "has_more": True}
+        with patch("routes.item_routes.storage_service.list_items_page", new_callable=AsyncMock, return_value=page):
+            with patch("routes.item_routes.swap_service.get_pending_requests_for_item", new_callable=AsyncMock, return_value=[]):
+                response = client.get("/items/")
+                assert response.status_code == 200
+                data = response.json()
+                assert data["has_more"] is True
+                assert data["next_cursor"] == "abc"
+                assert data["items"][0]["id"] == mock_item["id"]
+
+    def test_list_items_page_passes_filters(self, client):
+        """Test that comma-separated filters and sort are forwarded to storage."""
+        page = {"items": [], "next_cursor": None, "has_more": False}
+        with patch("routes.item_routes.storage_service.list_items_page", new_callable=AsyncMock, return_value=page) as mock_page:
+            response = client.get(
+                "/items/?category=tops,shoes&status=available&min_credits=1"
+                "&max_credits=3&sort=credits-desc&limit=10&cursor=xyz"
+            )
+            assert response.status_code == 200
+            kwargs = mock_page.call_args.kwargs
+            assert kwargs["categories"] == ["tops", "shoes"]
+            assert kwargs["statuses"] == ["available"]
+            assert kwargs["min_credits"] == 1.0
+            assert kwargs["max_credits"] == 3.0
+            assert kwargs["sort"] == "credits-desc"
+            assert kwargs["limit"] == 10
+            assert kwargs["cursor"] == "xyz"
+
+    def test_list_items_page_pending_counter(self, client, mock_item):
+        """Test that items with pending requests are reported as pending without extra queries."""
+        pending_item = {**mock_item, "id": "item456", "pending_requests": 2}
+        page = {"items": [mock_item, pending_item], "next_cursor": None, "has_more": False}
+        with patch("routes.item_routes.storage_service.list_items_page", new_callable=AsyncMock, return_value=page):
+            with patch("routes.item_routes.swap_service.get_pending_requests_for_item", new_callable=AsyncMock) as mock_pending:
+                response = client.get("/items/")
+                assert response.status_code == 200
+                statuses = [item["status"] for item in response.json()["items"]]
+                assert statuses == ["available", "pending"]
+                mock_pending.assert_not_called()
+
+    def test_list_items_page_invalid_sort(self, client):
+        """Test that an unknown sort order is rejected."""
+        response = client.get("/items/?sort=random")
+        assert response.status_code == 400
+
+    def test_list_items_page_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected."""
+        with patch("routes.item_routes.storage_service.list_items_page", new_callable=AsyncMock, side_effect=ValueError("Invalid cursor")):
+            response = client.get("/items/?cursor=garbage")
+            assert response.status_code == 400
+
+
+class TestListItemsPageQuery:
+    """Tests for the MongoDB query built by storage_service.list_items_page."""
+    
+    async def _query(self, **kwargs):
+        from services import storage_service
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(return_value=[])
+        db = MagicMock()
+        db.__getitem__.return_value.find.return_value = cursor
+        with patch("services.storage_service.get_db", return_value=db):
+            await storage_service.list_items_page(**kwargs)
+        return db.__getitem__.return_value.find.call_args.args[0]
+    
+    @pytest.mark.asyncio
+    async def test_search_matches_title_category_and_brand(self):
+        """Test that q searches the same fields the browse page used to filter on."""
+        query = await self._query(search="Coat")
+        pattern = {"$regex": "Coat", "$options": "i"}
+        assert query == {"$or": [{"title": pattern}, {"category": pattern}, {"brand": pattern}]}
+    
+    @pytest.mark.asyncio
+    async def test_pending_filter_uses_effective_status(self):
+        """Test that 'pending' includes available items with pending requests."""
+        query = await self._query(statuses=["pending", "locked"])
+        assert query == {"$or": [
+            {"status": "locked"},
+            {"status": "pending"},
+            {"status": "available", "pending_requests": {"$gt": 0}},
+        ]}
+    
+    @pytest.mark.asyncio
+    async def test_available_filter_excludes_items_with_pending_requests(self):
+        """Test that 'available' leaves out items clients see as pending."""
+        query = await self._query(statuses=["available"], categories=["tops"])
+        assert query == {"$and": [
+            {"category": "tops"},
+            {"status": "available", "pending_requests": {"$not": {"$gt": 0}}},
+        ]}
+
+
 class TestGetItem:
     """Tests for GET /items/{item_id} endpoint."""
     
@@ -142,12 +241,42 @@ class TestGetItem:
     def test_get_item_pending_status(self, client, mock_item):
         """Test getting an item with pending requests (status should be pending)."""
         mock_item["status"] = "available"
+        mock_item["pending_requests"] = 1
         with patch("routes.item_routes.storage_service.get_item", new_callable=AsyncMock, return_value=mock_item):
-            with patch("routes.item_routes.swap_service.get_pending_requests_for_item", new_callable=AsyncMock, return_value=[{"id": "req1"}]):
+            with patch("routes.item_routes.swap_service.get_pending_requests_for_item", new_callable=AsyncMock) as mock_pending:
                 response = client.get(f"/items/{mock_item['id']}")
                 assert response.status_code == 200
                 data = response.json()
                 assert data["status"] == "pending"
+                # Status comes from the item's counter, not a swap_requests query
+                mock_pending.assert_not_called()
+    
+    def test_get_item_owner_reads_primary_after_edit(self, client, mock_item, mock_user):
+        """Test that the owner sees their edit even when a secondary still has the old item."""
+        stale = {**mock_item, "title": "Old title"}
+        fresh = {**mock_item, "title": "New title"}
+        with patch("routes.item_routes.auth_service.get_optional_user_id", return_value=mock_user["id"]):
+            with patch("routes.item_routes.storage_service.get_item", new_callable=AsyncMock, side_effect=[stale, fresh]) as mock_get:
+                response = client.get(f"/items/{mock_item['id']}")
+                assert response.status_code == 200
+                assert response.json()["title"] == "New title"
+                # The second read goes to the primary
+                assert mock_get.await_args_list[1].kwargs.get("stale_reads", False) is False
+    
+    def test_get_item_owner_sees_item_not_yet_replicated(self, client, mock_item, mock_user):
+        """Test that a just-created item missing on a secondary is read from the primary."""
+        with patch("routes.item_routes.auth_service.get_optional_user_id", return_value=mock_user["id"]):
+            with patch("routes.item_routes.storage_service.get_item", new_callable=AsyncMock, side_effect=[None, mock_item]):
+                response = client.get(f"/items/{mock_item['id']}")
+                assert response.status_code == 200
+    
+    def test_get_item_other_users_read_secondaries_only(self, client, mock_item):
+        """Test that a non-owner's view is served by the stale-tolerant read alone."""
+        with patch("routes.item_routes.auth_service.get_optional_user_id", return_value="someone_else"):
+            with patch("routes.item_routes.storage_service.get_item", new_callable=AsyncMock, return_value=mock_item) as mock_get:
+                response = client.get(f"/items/{mock_item['id']}")
+                assert response.status_code == 200
+                mock_get.assert_awaited_once_with(mock_item["id"], stale_reads=True)
 
 
 class TestUpdateItem:
@@ -0,0 +1,159 @@
+"""Unit tests for request-scoped batch loaders using a mocked database."""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services import loader_service
+
+
+def _mock_collection(docs):
+    """Build a collection mock whose find() returns the given docs."""
+    collection = MagicMock()
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=docs)
+    collection.find.return_value = cursor
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_load_many_uses_one_query_and_dedupes():
+    """Test that duplicate IDs resolve with a single $in query."""
+    first, second = ObjectId(), ObjectId()
+    collection = _mock_collection(
+        [{"_id": first, "title": "A"}, {"_id": second, "title": "B"}]
+    )
+
+    with patch("services.loader_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        loader = loader_service.BatchLoader("items", loader_service.ITEM_SUMMARY_FIELDS)
+        result = await loader.load_many([str(first), str(second), str(first), None])
+
+    collection.find.assert_called_once()
+    query = collection.find.call_args.args[0]
+    assert query == {"_id": {"$in": [first, second]}}
+    assert result[str(first)]["title"] == "A"
+    assert result[str(second)]["id"] == str(second)
+
+
+@pytest.mark.asyncio
+async def test_load_many_caches_results_and_missing_docs():
+    """Test that cached and missing keys are not fetched again."""
+    existing, missing = ObjectId(), ObjectId()
+    collection = _mock_collection([{"_id": existing, "username": "alice"}])
+
+    with patch("services.loader_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        loader = loader_service.BatchLoader("users", loader_service.USER_SUMMARY_FIELDS)
+        await loader.load_many([str(existing), str(missing)])
+        result = await loader.load_many([str(existing), str(missing)])
+
+    collection.find.assert_called_once()
+    assert result[str(existing)]["username"] == "alice"
+    assert result[str(missing)] is None
+
+
+@pytest.mark.asyncio
+async def test_load_many_resolves_legacy_string_ids():
+    """Test that non-ObjectId keys are matched on the legacy id field."""
+    object_id = ObjectId()
+    collection = _mock_collection(
+        [{"_id": object_id, "title": "A"}, {"_id": ObjectId(), "id": "legacy-1", "title": "B"}]
+    )
+
+    with patch("services.loader_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        loader = loader_service.BatchLoader("items", loader_service.ITEM_SUMMARY_FIELDS)
+        result = await loader.load_many([str(object_id), "legacy-1"])
+
+    query = collection.find.call_args.args[0]
+    assert query == {"$or": [{"_id": {"$in": [object_id]}}, {"id": {"$in": ["legacy-1"]}}]}
+    assert result["legacy-1"]["title"] == "B"
+
+
+@pytest.mark.asyncio
+async def test_user_loader_never_projects_secrets():
+    """Test that user lookups project only public summary fields."""
+    collection = _mock_collection([])
+
+    with patch("services.loader_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        await loader_service.RequestLoaders().users.load(str(ObjectId()))
+
+    projection = collection.find.call_args.args[1]
+    assert "password_hash" not in projection
+    assert "salt" not in projection
+
+
+@pytest.mark.asyncio
+async def test_load_many_without_database_returns_none():
+    """Test that loaders degrade to None when the database is not connected."""
+    with patch("services.loader_service.get_db", side_effect=RuntimeError("no db")):
+        loader = loader_service.BatchLoader("items", loader_service.ITEM_SUMMARY_FIELDS)
+        result = await loader.load_many(["item1"])
+
+    assert result == {"item1": None}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_load_many_shares_the_in_flight_query():
+    """Test that a second load of a key being fetched waits for it instead of seeing None."""
+    item_id = ObjectId()
+    release = asyncio.Event()
+    collection = MagicMock()
+
+    async def to_list(length=None):
+        await release.wait()
+        return [{"_id": item_id, "title": "A"}]
+
+    collection.find.return_value.to_list = to_list
+
+    with patch("services.loader_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        loader = loader_service.BatchLoader("items", loader_service.ITEM_SUMMARY_FIELDS)
+        first = asyncio.ensure_future(loader.load_many([str(item_id)]))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(loader.load_many([str(item_id)]))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(first, second)
+
+    collection.find.assert_called_once()
+    assert results[0][str(item_id)]["title"] == "A"
+    assert results[1][str(item_id)]["title"] == "A"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_load_many_sees_the_query_failure():
+    """Test that callers waiting on a failed query get its error, not None."""
+    release = asyncio.Event()
+    collection = MagicMock()
+
+    async def to_list(length=None):
+        await release.wait()
+        raise RuntimeError("query failed")
+
+    collection.find.return_value.to_list = to_list
+
+    with patch("services.loader_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        loader = loader_service.BatchLoader("items", loader_service.ITEM_SUMMARY_FIELDS)
+        first = asyncio.ensure_future(loader.load_many(["item1"]))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(loader.load_many(["item1"]))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(first, second, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # Nothing was cached, so a later load queries again
+    assert "item1" not in loader._cache
+
+
+def test_get_loaders_is_shared_per_request():
+    """Test that loaders are attached to request.state and reused."""
+    request = SimpleNamespace(state=SimpleNamespace())
+
+    assert loader_service.get_loaders(request) is loader_service.get_loaders(request)
+    assert loader_service.get_loaders(object()) is not loader_service.get_loaders(object())
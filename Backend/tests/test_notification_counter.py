@@ -0,0 +1,109 @@
+"""Unit tests for the denormalized unread-notification counter."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services import notification_service
+
+
+@pytest.fixture
+def collections():
+    """Mock users and notifications collections behind get_db."""
+    users = MagicMock()
+    notifications = MagicMock()
+    db = MagicMock()
+    db.__getitem__.side_effect = {"users": users, "notifications": notifications}.__getitem__
+    with patch("services.notification_service.get_db", return_value=db):
+        yield users, notifications
+
+
+@pytest.mark.asyncio
+async def test_get_unread_count_is_point_read(collections):
+    """Test that the unread count comes from the user document."""
+    users, notifications = collections
+    user_id = str(ObjectId())
+    users.find_one = AsyncMock(return_value={"_id": ObjectId(user_id), "unread_notifications": 4})
+    notifications.count_documents = AsyncMock()
+
+    assert await notification_service.get_unread_count(user_id) == 4
+    users.find_one.assert_awaited_once_with({"_id": ObjectId(user_id)}, {"unread_notifications": 1})
+    notifications.count_documents.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_unread_count_initialises_missing_counter(collections):
+    """Test that users without the counter get it recounted and stored."""
+    users, notifications = collections
+    user_id = str(ObjectId())
+    users.find_one = AsyncMock(return_value={"_id": ObjectId(user_id)})
+    users.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+    notifications.count_documents = AsyncMock(return_value=2)
+
+    assert await notification_service.get_unread_count(user_id) == 2
+    users.update_one.assert_awaited_once_with(
+        {"_id": ObjectId(user_id)}, {"$set": {"unread_notifications": 2}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_mark_unread_notification_as_read_decrements(collections):
+    """Test that reading an unread notification decrements the counter."""
+    users, notifications = collections
+    user_id = str(ObjectId())
+    notifications.find_one_and_update = AsyncMock(return_value={"_id": ObjectId(), "read": False})
+    users.find_one_and_update = AsyncMock(return_value={"unread_notifications": 0})
+
+    assert await notification_service.mark_notification_as_read(str(ObjectId()), user_id) is True
+    update = users.find_one_and_update.call_args.args[1]
+    assert update[0]["$set"]["unread_notifications"]["$max"][1] == {"$add": ["$unread_notifications", -1]}
+
+
+@pytest.mark.asyncio
+async def test_mark_read_notification_again_keeps_counter(collections):
+    """Test that re-reading a read notification leaves the counter alone."""
+    users, notifications = collections
+    notifications.find_one_and_update = AsyncMock(return_value={"_id": ObjectId(), "read": True})
+    users.find_one_and_update = AsyncMock()
+
+    assert await notification_service.mark_notification_as_read(str(ObjectId()), "user1") is True
+    users.find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_mark_all_as_read_decrements_by_modified_count(collections):
+    """Test that mark-all subtracts exactly the notifications it changed."""
+    users, notifications = collections
+    notifications.update_many = AsyncMock(return_value=MagicMock(modified_count=3))
+    users.find_one_and_update = AsyncMock(return_value={"unread_notifications": 0})
+
+    assert await notification_service.mark_all_as_read("user1") == 3
+    update = users.find_one_and_update.call_args.args[1]
+    assert update[0]["$set"]["unread_notifications"]["$max"][1] == {"$add": ["$unread_notifications", -3]}
+
+
+@pytest.mark.asyncio
+async def test_delete_missing_notification_returns_false(collections):
+    """Test that deleting an unknown notification does not touch the counter."""
+    users, notifications = collections
+    notifications.find_one_and_delete = AsyncMock(return_value=None)
+    users.find_one_and_update = AsyncMock()
+
+    assert await notification_service.delete_notification(str(ObjectId()), "user1") is False
+    users.find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sync_unread_notification_counts_bulk_writes(collections):
+    """Test that the repair job rebuilds counters with one bulk write."""
+    users, notifications = collections
+    user_id = str(ObjectId())
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=[{"_id": user_id, "count": 5}])
+    notifications.aggregate = MagicMock(return_value=cursor)
+    users.bulk_write = AsyncMock(return_value=MagicMock(modified_count=2))
+
+    assert await notification_service.sync_unread_notification_counts() == 2
+    operations = users.bulk_write.call_args.args[0]
+    assert operations[0]._filter == {"_id": ObjectId(user_id)}
+    assert operations[0]._doc == {"$set": {"unread_notifications": 5}}
+    assert operations[1]._filter["_id"] == {"$nin": [ObjectId(user_id)]}
@@ -0,0 +1,140 @@
+"""Unit tests for background notification delivery through the outbox."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from services import notification_outbox, notification_service
+
+
+@pytest.fixture
+def outbox_collection():
+    """Mock notification_outbox collection behind get_db."""
+    collection = MagicMock()
+    collection.insert_one = AsyncMock()
+    collection.delete_one = AsyncMock()
+    with patch("services.notification_outbox.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        yield collection
+
+
+@pytest.mark.asyncio
+async def test_enqueue_without_worker_delivers_inline(outbox_collection):
+    """Test that processes without a worker deliver immediately and skip the outbox."""
+    with patch("services.notification_service.create_notification", new_callable=AsyncMock) as mock_create:
+        await notification_outbox.enqueue_notification(
+            user_id="owner1", event_type="new_request", request_id="r1", item_id="i1",
+            metadata={"item_title": "Jacket"},
+        )
+
+    mock_create.assert_awaited_once()
+    assert mock_create.call_args.kwargs["notification_id"] is None
+    outbox_collection.insert_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_worker_delivers_outbox_entry_then_deletes_it(outbox_collection):
+    """Test that enqueue only writes the outbox and the worker does the rest."""
+    delivered = asyncio.Event()
+
+    async def fake_create(**kwargs):
+        delivered.set()
+
+    with patch("services.notification_service.create_notification", side_effect=fake_create) as mock_create:
+        worker = notification_outbox.start_worker()
+        try:
+            await notification_outbox.enqueue_notification(
+                user_id="owner1", event_type="approved", request_id="r1", item_id="i1",
+            )
+            entry = outbox_collection.insert_one.call_args.args[0]
+            await asyncio.wait_for(delivered.wait(), 1)
+        finally:
+            await notification_outbox.stop_worker(worker)
+
+    assert mock_create.call_args.kwargs["notification_id"] == entry["_id"]
+    outbox_collection.delete_one.assert_awaited_once_with({"_id": entry["_id"]})
+
+
+@pytest.mark.asyncio
+async def test_recover_outbox_redelivers_stale_entries(outbox_collection):
+    """Test that entries left behind by a crash are delivered by the sweep."""
+    entry = {
+        "_id": ObjectId(), "user_id": "u1", "event_type": "rejected",
+        "request_id": "r1", "item_id": "i1", "metadata": {},
+    }
+
+    async def stale_entries():
+        yield entry
+
+    outbox_collection.find = MagicMock(return_value=stale_entries())
+    with patch("services.notification_service.create_notification", new_callable=AsyncMock) as mock_create:
+        assert await notification_outbox.recover_outbox() == 1
+
+    assert "$lt" in outbox_collection.find.call_args.args[0]["_id"]
+    assert mock_create.call_args.kwargs["notification_id"] == entry["_id"]
+    outbox_collection.delete_one.assert_awaited_once_with({"_id": entry["_id"]})
+
+
+@pytest.mark.asyncio
+async def test_create_notification_uses_caller_data_without_lookups():
+    """Test that passing item_title/other_user_name avoids extra reads."""
+    collection = MagicMock()
+    collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+    with patch("services.notification_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        with patch("services.notification_service.get_item", new_callable=AsyncMock) as mock_item:
+            with patch("services.notification_service.get_user_by_id", new_callable=AsyncMock) as mock_user:
+                with patch("services.notification_service._adjust_unread_count", new_callable=AsyncMock, return_value=1):
+                    result = await notification_service.create_notification(
+                        user_id="owner1", event_type="new_request", request_id="r1", item_id="i1",
+                        metadata={"item_title": "Jacket", "other_user_id": "u2", "other_user_name": "sam"},
+                    )
+
+    mock_item.assert_not_called()
+    mock_user.assert_not_called()
+    assert result["message"] == 'New swap request for "Jacket" from sam'
+
+
+@pytest.mark.asyncio
+async def test_approved_notification_skips_the_owner_lookup():
+    """Test that messages which don't name the other user don't look them up."""
+    collection = MagicMock()
+    collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId()))
+    with patch("services.notification_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        with patch("services.notification_service.get_user_by_id", new_callable=AsyncMock) as mock_user:
+            with patch("services.notification_service._adjust_unread_count", new_callable=AsyncMock, return_value=1):
+                result = await notification_service.create_notification(
+                    user_id="requester1", event_type="approved", request_id="r1", item_id="i1",
+                    metadata={"item_title": "Jacket", "other_user_id": "owner1"},
+                )
+
+    mock_user.assert_not_called()
+    assert result["message"] == 'Your swap request for "Jacket" was approved!'
+
+
+@pytest.mark.asyncio
+async def test_create_notification_with_existing_id_recounts_unread():
+    """Test that a redelivery doesn't insert twice and repairs a counter the crash skipped."""
+    notification_id = ObjectId()
+    collection = MagicMock()
+    collection.insert_one = AsyncMock(side_effect=DuplicateKeyError("dup"))
+    collection.find_one = AsyncMock(
+        return_value={"_id": notification_id, "user_id": "owner1", "read": False}
+    )
+    with patch("services.notification_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = collection
+        with patch("services.notification_service._adjust_unread_count", new_callable=AsyncMock) as mock_adjust, \
+             patch("services.notification_service.repair_unread_count", new_callable=AsyncMock, return_value=4) as mock_repair, \
+             patch("services.notification_service._publish_notification") as mock_publish:
+            result = await notification_service.create_notification(
+                user_id="owner1", event_type="approved", request_id="r1", item_id="i1",
+                message="ok", notification_id=notification_id,
+            )
+
+    # Recounting is idempotent; incrementing again could double count
+    mock_adjust.assert_not_called()
+    mock_repair.assert_awaited_once_with("owner1")
+    mock_publish.assert_called_once_with(result, 4)
+    assert result["id"] == str(notification_id)
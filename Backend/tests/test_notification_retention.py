@@ -0,0 +1,167 @@
+"""Unit tests for notification retention: TTL indexes, compaction and the archive."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from services import notification_retention, notification_service
+
+
+@pytest.fixture
+def mock_db():
+    """Mock database with notifications/notification_archives collections."""
+    notifications = MagicMock()
+    archives = MagicMock()
+    archives.create_indexes = AsyncMock()
+    archives.update_one = AsyncMock()
+    db = MagicMock()
+    db.__getitem__.side_effect = {
+        "notifications": notifications, "notification_archives": archives
+    }.__getitem__
+    db.notifications, db.archives = notifications, archives
+    with patch("services.notification_retention.get_db", return_value=db):
+        yield db
+
+
+def _find_returning(collection, *batches):
+    """Make collection.find(...).sort().limit().to_list() return each batch in turn."""
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(side_effect=list(batches))
+    collection.find = MagicMock(return_value=cursor)
+
+
+def test_read_update_sets_ttl_date():
+    """Test that marking as read sets the BSON date the TTL index expires on."""
+    update = notification_service._read_update()
+    assert update["read"] is True
+    assert update["read_date"].tzinfo is not None
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_updates_changed_ttl(mock_db):
+    """Test that a changed TTL age is applied with collMod instead of failing."""
+    mock_db.notifications.create_indexes = AsyncMock(
+        side_effect=[OperationFailure("conflict", code=85), None]
+    )
+    mock_db.command = AsyncMock()
+
+    await notification_retention.ensure_retention_indexes()
+
+    args, kwargs = mock_db.command.call_args
+    assert args == ("collMod", "notifications")
+    assert kwargs["index"]["name"] == notification_retention.READ_TTL_INDEX
+    mock_db.archives.create_indexes.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_compaction_moves_old_unread_into_archive(mock_db):
+    """Test that old unread notifications are archived per user and removed."""
+    old = [
+        {"_id": ObjectId(), "user_id": "u1", "read": False, "created_at": "2023-01-01T00:00:00"},
+        {"_id": ObjectId(), "user_id": "u1", "read": False, "created_at": "2023-01-02T00:00:00"},
+    ]
+    _find_returning(mock_db.notifications, old)
+    mock_db.notifications.delete_many = AsyncMock(return_value=MagicMock(deleted_count=2))
+
+    with patch("database.connection._transactions_supported", False):
+        with patch("services.notification_service.repair_unread_count", new_callable=AsyncMock, return_value=0) as mock_repair:
+            summary = await notification_retention.compact_notifications(batch_size=10)
+
+    assert summary == {"archived": 2, "users": 1}
+    query = mock_db.notifications.find.call_args.args[0]
+    assert query["read"] is False and "$lt" in query["created_at"]
+    bucket_filter, update = mock_db.archives.update_one.call_args.args
+    assert bucket_filter["user_id"] == "u1"
+    assert update["$push"]["notifications"]["$each"] == old
+    assert update["$min"] == {"oldest_created_at": "2023-01-01T00:00:00"}
+    deleted = mock_db.notifications.delete_many.call_args.args[0]
+    assert deleted == {"_id": {"$in": [n["_id"] for n in old]}, "read": False}
+    mock_repair.assert_awaited_once_with("u1")
+
+
+@pytest.mark.asyncio
+async def test_archive_page_uses_keyset_cursor(mock_db):
+    """Test that archive pages seek past the cursor and report the next one."""
+    from utils.pagination import encode_cursor
+
+    rows = [
+        {"_id": ObjectId(), "user_id": "u1", "created_at": f"2023-01-0{day}T00:00:00"}
+        for day in (3, 2, 1)
+    ]
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=rows)
+    mock_db.archives.aggregate = MagicMock(return_value=cursor)
+    after = {"_id": ObjectId(), "created_at": "2023-01-04T00:00:00"}
+    expected_next = encode_cursor(rows[1], "created_at")
+    expected_ids = [str(r["_id"]) for r in rows[:2]]
+
+    page = await notification_retention.get_archived_notifications(
+        "u1", limit=2, cursor=encode_cursor(after, "created_at")
+    )
+
+    pipeline = mock_db.archives.aggregate.call_args.args[0]
+    assert pipeline[0]["$match"] == {"user_id": "u1", "oldest_created_at": {"$lte": "2023-01-04T00:00:00"}}
+    assert pipeline[-1] == {"$limit": 3}
+    assert [n["id"] for n in page["notifications"]] == expected_ids
+    assert page["has_more"] is True
+    assert page["next_cursor"] == expected_next
+
+
+class _AsyncCursor:
+    """Minimal async-iterable cursor over a fixed list of documents."""
+
+    def __init__(self, docs):
+        self._docs = list(docs)
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._docs:
+            raise StopAsyncIteration
+        return self._docs.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_archive_page_only_unwinds_buckets_that_can_hold_it(mock_db):
+    """Test that buckets older than the page's floor are filtered out before $unwind."""
+    headers = [
+        {"count": 200, "oldest_created_at": "2023-03-01", "newest_created_at": "2023-03-05"},
+        {"count": 200, "oldest_created_at": "2023-02-01", "newest_created_at": "2023-03-09"},
+        {"count": 200, "oldest_created_at": "2023-01-01", "newest_created_at": "2023-01-31"},
+    ]
+    mock_db.archives.find = MagicMock(return_value=_AsyncCursor(headers))
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=[])
+    mock_db.archives.aggregate = MagicMock(return_value=cursor)
+
+    await notification_retention.get_archived_notifications("u1", limit=300)
+
+    bucket_filter = mock_db.archives.find.call_args.args[0]
+    assert bucket_filter == {"user_id": "u1"}
+    pipeline = mock_db.archives.aggregate.call_args.args[0]
+    # Two buckets cover 301 rows; the first overlaps the second so both stay
+    assert pipeline[0]["$match"] == {"user_id": "u1", "newest_created_at": {"$gte": "2023-02-01"}}
+    assert pipeline[1] == {"$unwind": "$notifications"}
+    assert {"$match": {"created_at": {"$gte": "2023-02-01"}}} in pipeline
+
+
+@pytest.mark.asyncio
+async def test_archive_page_floor_skips_bucket_straddling_the_cursor(mock_db):
+    """Test that a bucket holding rows newer than the cursor does not count towards the page."""
+    headers = [
+        {"count": 200, "oldest_created_at": "2023-02-01", "newest_created_at": "2023-03-09"},
+        {"count": 200, "oldest_created_at": "2023-01-01", "newest_created_at": "2023-01-31"},
+    ]
+    mock_db.archives.find = MagicMock(return_value=_AsyncCursor(headers))
+
+    floor = await notification_retention._archive_page_floor(
+        mock_db, {"user_id": "u1"}, "2023-02-15", 50
+    )
+
+    assert floor == "2023-01-01"
@@ -160,3 +160,60 @@ class TestDeleteNotification:
                 )
                 assert response.status_code == 404
 
+
+class TestSyncNotifications:
+    """Tests for GET /notifications/sync endpoint."""
+
+    def test_sync_success(self, client, mock_user, mock_token):
+        """Test that the sync response carries delta, unread count and cursor."""
+        payload = {"notifications": [], "unread_count": 2, "cursor": "abc", "has_more": False}
+        with patch("routes.notification_routes.auth_service.get_user_id_from_request", return_value=mock_user["id"]):
+            with patch("routes.notification_routes.notification_service.sync_notifications", new_callable=AsyncMock, return_value=payload) as mock_sync:
+                response = client.get(
+                    "/notifications/sync?since=prev",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 200
+                assert response.json() == payload
+                mock_sync.assert_awaited_once_with(user_id=mock_user["id"], since="prev", limit=100)
+
+    def test_sync_invalid_cursor(self, client, mock_user, mock_token):
+        """Test that a malformed cursor is rejected."""
+        with patch("routes.notification_routes.auth_service.get_user_id_from_request", return_value=mock_user["id"]):
+            with patch("routes.notification_routes.notification_service.sync_notifications", new_callable=AsyncMock, side_effect=ValueError("Invalid cursor")):
+                response = client.get(
+                    "/notifications/sync?since=bogus",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 400
+
+    def test_sync_no_auth(self, client):
+        """Test syncing without authentication."""
+        response = client.get("/notifications/sync")
+        assert response.status_code == 401
+
+class TestArchivedNotifications:
+    """Tests for GET /notifications/archive endpoint."""
+
+    def test_archive_page(self, client, mock_user, mock_token):
+        """Test that a page of archived notifications is returned."""
+        payload = {"notifications": [{"id": "n1"}], "next_cursor": None, "has_more": False}
+        with patch("routes.notification_routes.auth_service.get_user_id_from_request", return_value=mock_user["id"]):
+            with patch("routes.notification_routes.notification_retention.get_archived_notifications", new_callable=AsyncMock, return_value=payload) as mock_archive:
+                response = client.get(
+                    "/notifications/archive?limit=10&cursor=abc",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 200
+                assert response.json() == payload
+                mock_archive.assert_awaited_once_with(user_id=mock_user["id"], limit=10, cursor="abc")
+
+    def test_archive_invalid_cursor(self, client, mock_user, mock_token):
+        """Test that a malformed cursor is rejected."""
+        with patch("routes.notification_routes.auth_service.get_user_id_from_request", return_value=mock_user["id"]):
+            with patch("routes.notification_routes.notification_retention.get_archived_notifications", new_callable=AsyncMock, side_effect=ValueError("Invalid cursor")):
+                response = client.get(
+                    "/notifications/archive?cursor=bogus",
+                    headers={"Authorization": f"Bearer {mock_token}"}
+                )
+                assert response.status_code == 400
@@ -0,0 +1,288 @@
+"""Tests for notification push (hub and SSE stream) and delta sync."""
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from main import app
+from routes import notification_routes
+from services import notification_hub
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_publish_reaches_every_subscriber():
+    """Test that events fan out to all of a user's connections only."""
+    first = notification_hub.subscribe("user1")
+    second = notification_hub.subscribe("user1")
+    other = notification_hub.subscribe("user2")
+    try:
+        notification_hub.publish("user1", {"type": "unread_count", "unread_count": 3})
+
+        assert first.get_nowait()["unread_count"] == 3
+        assert second.get_nowait()["unread_count"] == 3
+        assert other.empty()
+    finally:
+        for user_id, queue in (("user1", first), ("user1", second), ("user2", other)):
+            notification_hub.unsubscribe(user_id, queue)
+    assert not notification_hub.has_subscribers("user1")
+
+
+def test_publish_overflows_a_full_queue():
+    """Test that a slow client never blocks the publisher and is told to reconnect."""
+    queue = notification_hub.subscribe("user1")
+    other = notification_hub.subscribe("user1")
+    try:
+        for count in range(notification_hub.SUBSCRIBER_QUEUE_SIZE + 1):
+            notification_hub.publish("user1", {"type": "unread_count", "unread_count": count})
+            if count < notification_hub.SUBSCRIBER_QUEUE_SIZE:
+                other.get_nowait()
+
+        assert queue.qsize() == 1
+        assert queue.get_nowait() == notification_hub.OVERFLOW
+        # The lagging connection no longer receives events; the other one does
+        notification_hub.publish("user1", {"type": "unread_count", "unread_count": 0})
+        assert queue.empty()
+        assert other.get_nowait()["unread_count"] == notification_hub.SUBSCRIBER_QUEUE_SIZE
+    finally:
+        notification_hub.unsubscribe("user1", queue)
+        notification_hub.unsubscribe("user1", other)
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_when_it_falls_behind():
+    """Test that an overflowed connection closes so the client reconnects and replays."""
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(return_value=False)
+
+    async def flood(user_id):
+        for count in range(notification_hub.SUBSCRIBER_QUEUE_SIZE + 1):
+            notification_hub.publish("user1", {"type": "unread_count", "unread_count": count})
+        return 0
+
+    with patch("routes.notification_routes.notification_service.get_unread_count", new_callable=AsyncMock, side_effect=flood):
+        chunks = [
+            chunk async for chunk in notification_routes._notification_events(request, "user1", None)
+        ]
+
+    # Only the initial count; the flooded events are replayed after reconnecting
+    assert "".join(chunks).count("event: unread_count") == 1
+    assert not notification_hub.has_subscribers("user1")
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_missed_then_pushes_live_events():
+    """Test resume from Last-Event-ID followed by a live notification."""
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+    missed = [{"id": "n2", "message": "missed"}]
+
+    async def replay(user_id, after_id):
+        # Published while the replay is being read; must still be delivered
+        notification_hub.publish("user1", {
+            "type": "notification",
+            "notification": {"id": "n3", "message": "live"},
+            "unread_count": 3,
+        })
+        return missed
+
+    with patch("routes.notification_routes.notification_service.get_notifications_after", new_callable=AsyncMock, side_effect=replay) as mock_after:
+        with patch("routes.notification_routes.notification_service.get_unread_count", new_callable=AsyncMock, return_value=2):
+            chunks = [
+                chunk async for chunk in notification_routes._notification_events(request, "user1", "n1")
+            ]
+
+    mock_after.assert_awaited_once_with("user1", "n1")
+    body = "".join(chunks)
+    assert body.startswith("retry: ")
+    assert body.index("id: n2") < body.index('"unread_count": 2') < body.index("id: n3")
+    assert body.rstrip().endswith('data: {"unread_count": 3}')
+    # The connection is unregistered once the client goes away
+    assert not notification_hub.has_subscribers("user1")
+
+
+@pytest.mark.asyncio
+async def test_stream_subscribes_only_once_streaming_starts():
+    """Test that a response that is never streamed leaves no queue in the hub."""
+    request = MagicMock()
+
+    with patch("routes.notification_routes._stream_user_id", return_value="user1"):
+        response = await notification_routes.stream_notifications(request, last_event_id=None, since=None)
+
+    assert not notification_hub.has_subscribers("user1")
+    # Client went away before the body was sent
+    await response.body_iterator.aclose()
+    assert not notification_hub.has_subscribers("user1")
+
+
+def test_stream_rejects_invalid_query_token(client):
+    """Test that a bad token in the query string is refused."""
+    response = client.get("/notifications/stream?token=user1|bad")
+    assert response.status_code == 401
+
+
+def test_stream_requires_auth(client):
+    """Test that the stream needs a header or token."""
+    response = client.get("/notifications/stream")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_create_notification_publishes_to_subscribers():
+    """Test that create_notification pushes to the recipient's open streams."""
+    from services import notification_service
+
+    collection = MagicMock()
+    collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id="abc"))
+    queue = notification_hub.subscribe("user1")
+    try:
+        with patch("services.notification_service.get_db") as mock_get_db:
+            mock_get_db.return_value.__getitem__.return_value = collection
+            with patch("services.notification_service._adjust_unread_count", new_callable=AsyncMock, return_value=1):
+                await notification_service.create_notification(
+                    user_id="user1", event_type="approved", request_id="r1", item_id="i1", message="ok"
+                )
+
+        event = queue.get_nowait()
+        assert event["type"] == "notification"
+        assert event["notification"]["message"] == "ok"
+        assert event["unread_count"] == 1
+    finally:
+        notification_hub.unsubscribe("user1", queue)
+
+
+@pytest.mark.asyncio
+async def test_sync_with_cursor_rescans_the_overlap_window():
+    """Test that a delta sync starts SYNC_OVERLAP_SECONDS behind its cursor."""
+    from bson import ObjectId
+    from services import notification_service
+    from utils.pagination import encode_cursor
+
+    last = {"_id": ObjectId(), "updated_at": "2024-01-01T00:01:00"}
+    since = encode_cursor(last, "updated_at")
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=[])
+    collection = MagicMock()
+    collection.find.return_value = cursor
+
+    with patch("services.notification_service.get_db") as mock_get_db, \
+         patch.object(notification_service, "SYNC_OVERLAP_SECONDS", 30):
+        mock_get_db.return_value.__getitem__.return_value = collection
+        with patch("services.notification_service.get_unread_count", new_callable=AsyncMock, return_value=0):
+            result = await notification_service.sync_notifications("user1", since=since)
+
+    query = collection.find.call_args.args[0]
+    assert query == {"user_id": "user1", "updated_at": {"$gte": "2024-01-01T00:00:30"}}
+    assert result == {"notifications": [], "unread_count": 0, "cursor": since, "has_more": False}
+
+
+class _FakeNotifications:
+    """Just enough of a notifications collection for sync_notifications."""
+
+    def __init__(self):
+        self.docs = []
+
+    def _matching(self, query):
+        docs = [d for d in self.docs if d["user_id"] == query["user_id"]]
+        bound = query.get("updated_at", {}).get("$gte")
+        docs = [d for d in docs if bound is None or d["updated_at"] >= bound]
+        if "$or" in query:
+            after_t = query["$or"][0]["updated_at"]["$gt"]
+            after_id = query["$or"][1]["_id"]["$gt"]
+            docs = [d for d in docs if (d["updated_at"], d["_id"]) > (after_t, after_id)]
+        return docs
+
+    def find(self, query):
+        docs = self._matching(query)
+        cursor = MagicMock()
+
+        def sort(spec, direction=None):
+            if isinstance(spec, str):
+                docs.sort(key=lambda d: d[spec], reverse=direction == -1)
+            else:
+                docs.sort(key=lambda d: (d["updated_at"], d["_id"]))
+            return cursor
+
+        cursor.sort.side_effect = sort
+        cursor.limit.side_effect = lambda n: cursor
+        cursor.to_list = AsyncMock(side_effect=lambda length: [dict(d) for d in docs[:length]])
+        return cursor
+
+    async def find_one(self, query, sort=None):
+        docs = sorted(self._matching(query), key=lambda d: (d["updated_at"], d["_id"]))
+        return dict(docs[-1]) if docs else None
+
+
+@pytest.mark.asyncio
+async def test_sync_returns_a_change_that_committed_after_a_later_stamp():
+    """Test that a write stamped before the cursor but committed after a sync isn't lost."""
+    from bson import ObjectId
+    from services import notification_service
+
+    collection = _FakeNotifications()
+
+    def add(updated_at):
+        doc = {"_id": ObjectId(), "user_id": "user1", "created_at": updated_at, "updated_at": updated_at}
+        collection.docs.append(doc)
+        return str(doc["_id"])
+
+    async def sync(since):
+        with patch("services.notification_service.get_db") as mock_get_db, \
+             patch("services.notification_service.get_unread_count", new_callable=AsyncMock, return_value=0):
+            mock_get_db.return_value.__getitem__.return_value = collection
+            return await notification_service.sync_notifications("user1", since=since)
+
+    add("2024-01-01T00:00:00")
+    first = await sync(None)
+    later = add("2024-01-01T00:00:10")
+    second = await sync(first["cursor"])
+    assert [n["id"] for n in second["notifications"]] == [later]
+
+    # Stamped before `later`, committed after the second sync
+    late = add("2024-01-01T00:00:05")
+    third = await sync(second["cursor"])
+    assert [n["id"] for n in third["notifications"]] == [late]
+
+    # Nothing already delivered comes back
+    fourth = await sync(third["cursor"])
+    assert fourth["notifications"] == []
+
+
+@pytest.mark.asyncio
+async def test_sync_cursor_stays_small_after_a_burst_of_changes():
+    """Test that hundreds of same-stamp changes page through with a URL-sized cursor."""
+    from bson import ObjectId
+    from services import notification_service
+
+    collection = _FakeNotifications()
+    collection.docs = [
+        {"_id": ObjectId(), "user_id": "user1", "created_at": "2024-01-01T00:00:00",
+         "updated_at": "2024-01-01T00:00:00"}
+        for _ in range(300)
+    ]
+
+    async def sync(since):
+        with patch("services.notification_service.get_db") as mock_get_db, \
+             patch("services.notification_service.get_unread_count", new_callable=AsyncMock, return_value=0):
+            mock_get_db.return_value.__getitem__.return_value = collection
+            return await notification_service.sync_notifications("user1", since=since)
+
+    result = await sync(None)
+    # Mark-all-read stamps every notification with the same updated_at
+    for doc in collection.docs:
+        doc["updated_at"] = "2024-01-01T00:01:00"
+
+    delivered = []
+    for _ in range(10):
+        result = await sync(result["cursor"])
+        assert len(result["cursor"]) < 8192
+        delivered += [n["id"] for n in result["notifications"]]
+        if not result["has_more"]:
+            break
+
+    assert sorted(delivered) == sorted(str(d["_id"]) for d in collection.docs)
+    assert (await sync(result["cursor"]))["notifications"] == []
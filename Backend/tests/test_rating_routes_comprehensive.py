@@ -134,3 +134,37 @@ class TestGetRatingStats:
             data = response.json()
             assert data["total_ratings"] == 0
 
+
+
+class TestGetRatingStatsBatch:
+    """Tests for POST /ratings/stats:batch endpoint."""
+    
+    def test_get_rating_stats_batch_success(self, client, mock_user, mock_user2):
+        """Test getting rating statistics for several users at once."""
+        stats = {
+            mock_user["id"]: {"average_rating": 4.5, "total_ratings": 2, "rating_breakdown": None},
+            mock_user2["id"]: {"average_rating": 0.0, "total_ratings": 0, "rating_breakdown": None},
+        }
+        with patch("routes.rating_routes.rating_service.get_cached_rating_stats_for_users", return_value=stats) as mock_get:
+            response = client.post(
+                "/ratings/stats:batch",
+                json={"user_ids": [mock_user["id"], mock_user2["id"]]}
+            )
+            assert response.status_code == 200
+            data = response.json()["stats"]
+            assert data[mock_user["id"]]["average_rating"] == 4.5
+            assert data[mock_user2["id"]]["total_ratings"] == 0
+            mock_get.assert_called_once_with([mock_user["id"], mock_user2["id"]])
+    
+    def test_get_rating_stats_batch_too_many_ids(self, client):
+        """Test that oversized batches are rejected."""
+        response = client.post(
+            "/ratings/stats:batch",
+            json={"user_ids": [f"user{i}" for i in range(301)]}
+        )
+        assert response.status_code == 422
+    
+    def test_get_rating_stats_batch_empty(self, client):
+        """Test that an empty batch is rejected."""
+        response = client.post("/ratings/stats:batch", json={"user_ids": []})
+        assert response.status_code == 422
@@ -8,8 +8,11 @@ from services.rating_service import (
     create_or_update_rating,
     get_rating,
     get_user_rating_stats,
-    delete_rating
+    delete_rating,
+    ensure_rating_indexes,
+    rebuild_rating_stats
 )
+from services import event_bus, rating_service
 
 
 @pytest.fixture
@@ -27,23 +30,31 @@ def mock_ratings_collection(mock_db):
     return collection
 
 
+@pytest.fixture
+def mock_users_collection():
+    """Mock users collection holding the rating counters."""
+    collection = MagicMock()
+    collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+    return collection
+
+
+def _patch_collections(mock_get_db, ratings, users):
+    """Route get_db()["ratings"] and get_db()["users"] to the given mocks."""
+    mock_get_db.return_value.__getitem__.side_effect = {"ratings": ratings, "users": users}.__getitem__
+
+
 @pytest.mark.asyncio
-async def test_create_or_update_rating_new_rating(mock_ratings_collection):
+async def test_create_or_update_rating_new_rating(mock_ratings_collection, mock_users_collection):
     """Test creating a new rating."""
     rater_user_id = "user1"
     rated_user_id = "user2"
     stars = 5
     
-    # Mock find_one to return None (no existing rating)
-    mock_ratings_collection.find_one = AsyncMock(return_value=None)
-    
-    # Mock insert_one
-    mock_insert_result = MagicMock()
-    mock_insert_result.inserted_id = "rating_id_123"
-    mock_ratings_collection.insert_one = AsyncMock(return_value=mock_insert_result)
+    # The upsert inserted the rating, so there is no previous document
+    mock_ratings_collection.find_one_and_update = AsyncMock(return_value=None)
     
     with patch('services.rating_service.get_db') as mock_get_db:
-        mock_get_db.return_value.__getitem__.return_value = mock_ratings_collection
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
         
         result = await create_or_update_rating(
             rater_user_id=rater_user_id,
@@ -51,20 +62,33 @@ async def test_create_or_update_rating_new_rating(mock_ratings_collection):
             stars=stars
         )
     
+    # The upsert is the only call to the ratings collection
+    mock_ratings_collection.find_one_and_update.assert_called_once()
+    rating_filter, update = mock_ratings_collection.find_one_and_update.call_args.args
+    assert rating_filter == {"rater_user_id": rater_user_id, "rated_user_id": rated_user_id}
+    assert update["$set"]["stars"] == stars
+    assert mock_ratings_collection.find_one_and_update.call_args.kwargs["upsert"] is True
+    
     assert result is not None
-    assert result["id"] == "rating_id_123"
+    assert result["id"] == str(update["$setOnInsert"]["_id"])
     assert result["rater_user_id"] == rater_user_id
     assert result["rated_user_id"] == rated_user_id
     assert result["stars"] == stars
     assert "created_at" in result
     assert "updated_at" in result
     
-    # Verify insert_one was called
-    mock_ratings_collection.insert_one.assert_called_once()
+    # The rated user's counters gain the new rating
+    user_filter, update = mock_users_collection.update_one.call_args.args
+    assert user_filter == {"id": rated_user_id, "rating_stats": {"$exists": True}}
+    assert update == {"$inc": {
+        "rating_stats.sum": 5,
+        "rating_stats.count": 1,
+        "rating_stats.histogram.5": 1
+    }}
 
 
 @pytest.mark.asyncio
-async def test_create_or_update_rating_update_existing(mock_ratings_collection):
+async def test_create_or_update_rating_update_existing(mock_ratings_collection, mock_users_collection):
     """Test updating an existing rating."""
     rater_user_id = "user1"
     rated_user_id = "user2"
@@ -80,21 +104,11 @@ async def test_create_or_update_rating_update_existing(mock_ratings_collection):
         "updated_at": datetime.utcnow()
     }
     
-    updated_rating = {
-        "_id": "rating_id_123",
-        "rater_user_id": rater_user_id,
-        "rated_user_id": rated_user_id,
-        "stars": stars,
-        "created_at": existing_rating["created_at"],
-        "updated_at": datetime.utcnow()
-    }
-    
-    mock_ratings_collection.find_one = AsyncMock(return_value=existing_rating)
-    mock_ratings_collection.update_one = AsyncMock()
-    mock_ratings_collection.find_one = AsyncMock(side_effect=[existing_rating, updated_rating])
+    # The upsert matched the existing rating and returns it as it was
+    mock_ratings_collection.find_one_and_update = AsyncMock(return_value=existing_rating)
     
     with patch('services.rating_service.get_db') as mock_get_db:
-        mock_get_db.return_value.__getitem__.return_value = mock_ratings_collection
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
         
         result = await create_or_update_rating(
             rater_user_id=rater_user_id,
@@ -105,8 +119,64 @@ async def test_create_or_update_rating_update_existing(mock_ratings_collection):
     assert result is not None
     assert result["id"] == "rating_id_123"
     assert result["stars"] == stars
-    # Verify update_one was called
-    mock_ratings_collection.update_one.assert_called_once()
+    mock_ratings_collection.find_one_and_update.assert_called_once()
+    # Only the delta between the old and new stars is applied
+    update = mock_users_collection.update_one.call_args.args[1]
+    assert update == {"$inc": {
+        "rating_stats.sum": 1,
+        "rating_stats.count": 0,
+        "rating_stats.histogram.4": 1,
+        "rating_stats.histogram.3": -1
+    }}
+
+
+@pytest.mark.asyncio
+async def test_create_or_update_rating_unchanged_stars(mock_ratings_collection, mock_users_collection):
+    """Test that resubmitting the same stars leaves the counters alone."""
+    existing_rating = {
+        "_id": "rating_id_123",
+        "rater_user_id": "user1",
+        "rated_user_id": "user2",
+        "stars": 4,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    mock_ratings_collection.find_one_and_update = AsyncMock(return_value=existing_rating)
+    
+    with patch('services.rating_service.get_db') as mock_get_db:
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
+        
+        result = await create_or_update_rating("user1", "user2", 4)
+    
+    assert result["stars"] == 4
+    mock_users_collection.update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ensure_rating_indexes_removes_duplicates(mock_ratings_collection, mock_users_collection):
+    """Test that duplicate pairs are removed when they block the unique index."""
+    from pymongo.errors import OperationFailure
+    
+    mock_ratings_collection.create_indexes = AsyncMock(
+        side_effect=[OperationFailure("duplicate key", code=11000), ["rater_rated_unique"]]
+    )
+    
+    async def duplicates(*args, **kwargs):
+        yield {"_id": {"rater": "user1", "rated": "user2"}, "ids": ["newest", "older"], "count": 2}
+    
+    mock_ratings_collection.aggregate = MagicMock(side_effect=duplicates)
+    mock_ratings_collection.delete_many = AsyncMock(return_value=MagicMock(deleted_count=1))
+    
+    with patch('services.rating_service.get_db') as mock_get_db, \
+         patch('services.rating_service.repair_rating_stats', new_callable=AsyncMock) as mock_repair:
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
+        
+        await ensure_rating_indexes()
+    
+    # The newest rating of the pair is kept
+    mock_ratings_collection.delete_many.assert_awaited_once_with({"_id": {"$in": ["older"]}})
+    mock_repair.assert_awaited_once_with("user2")
+    assert mock_ratings_collection.create_indexes.await_count == 2
 
 
 @pytest.mark.asyncio
@@ -188,65 +258,43 @@ async def test_get_rating_not_exists(mock_ratings_collection):
 
 
 @pytest.mark.asyncio
-async def test_get_user_rating_stats_no_ratings(mock_ratings_collection):
-    """Test getting stats when user has no ratings."""
+async def test_get_user_rating_stats_no_ratings(mock_ratings_collection, mock_users_collection):
+    """Test getting stats for a user without counters yet and no ratings."""
     rated_user_id = "user1"
     
-    # Mock aggregation pipeline returning empty result
+    mock_users_collection.find_one = AsyncMock(return_value={"id": rated_user_id})
+    
+    # Mock the recount aggregation returning empty result
     mock_cursor = MagicMock()
     mock_cursor.to_list = AsyncMock(return_value=[])
     mock_ratings_collection.aggregate = MagicMock(return_value=mock_cursor)
     
     with patch('services.rating_service.get_db') as mock_get_db:
-        mock_get_db.return_value.__getitem__.return_value = mock_ratings_collection
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
         
         result = await get_user_rating_stats(rated_user_id)
     
     assert result["average_rating"] == 0.0
     assert result["total_ratings"] == 0
     assert result["rating_breakdown"] == {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+    # The recounted (empty) counters are stored for next time
+    stored = mock_users_collection.update_one.call_args.args[1]["$set"]["rating_stats"]
+    assert stored["count"] == 0
 
 
 @pytest.mark.asyncio
-async def test_get_user_rating_stats_with_ratings(mock_ratings_collection):
-    """Test getting stats when user has ratings."""
+async def test_get_user_rating_stats_with_ratings(mock_ratings_collection, mock_users_collection):
+    """Test that stats are read from the counters on the user document."""
     rated_user_id = "user1"
     
-    # Mock aggregation pipeline for stats
-    stats_result = [{
-        "_id": None,
-        "total_ratings": 5,
-        "total_stars": 20,
-        "avg_rating": 4.0
-    }]
-    
-    # Mock breakdown aggregation
-    breakdown_results = [
-        {"_id": 5, "count": 2},
-        {"_id": 4, "count": 2},
-        {"_id": 3, "count": 1}
-    ]
-    
-    mock_stats_cursor = MagicMock()
-    mock_stats_cursor.to_list = AsyncMock(return_value=stats_result)
-    
-    mock_breakdown_cursor = MagicMock()
-    mock_breakdown_cursor.to_list = AsyncMock(return_value=breakdown_results)
-    
-    # Setup aggregate to return different cursors for different calls
-    call_count = 0
-    def aggregate_side_effect(*args, **kwargs):
-        nonlocal call_count
-        call_count += 1
-        if call_count == 1:
-            return mock_stats_cursor
-        else:
-            return mock_breakdown_cursor
-    
-    mock_ratings_collection.aggregate = MagicMock(side_effect=aggregate_side_effect)
+    mock_users_collection.find_one = AsyncMock(return_value={
+        "id": rated_user_id,
+        "rating_stats": {"sum": 20, "count": 5, "histogram": {"5": 2, "4": 2, "3": 1}}
+    })
+    mock_ratings_collection.aggregate = MagicMock()
     
     with patch('services.rating_service.get_db') as mock_get_db:
-        mock_get_db.return_value.__getitem__.return_value = mock_ratings_collection
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
         
         result = await get_user_rating_stats(rated_user_id)
     
@@ -257,20 +305,34 @@ async def test_get_user_rating_stats_with_ratings(mock_ratings_collection):
     assert result["rating_breakdown"][3] == 1
     assert result["rating_breakdown"][1] == 0
     assert result["rating_breakdown"][2] == 0
+    mock_ratings_collection.aggregate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_user_rating_stats_uses_loaded_user(mock_ratings_collection, mock_users_collection):
+    """Test that passing an already-loaded user document skips the read."""
+    user = {"id": "user1", "rating_stats": {"sum": 3, "count": 1, "histogram": {"3": 1}}}
+    mock_users_collection.find_one = AsyncMock()
+    
+    with patch('services.rating_service.get_db') as mock_get_db:
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
+        
+        result = await get_user_rating_stats("user1", user=user)
+    
+    assert result["average_rating"] == 3.0
+    mock_users_collection.find_one.assert_not_called()
 
 
 @pytest.mark.asyncio
-async def test_delete_rating_exists(mock_ratings_collection):
+async def test_delete_rating_exists(mock_ratings_collection, mock_users_collection):
     """Test deleting an existing rating."""
     rater_user_id = "user1"
     rated_user_id = "user2"
     
-    mock_delete_result = MagicMock()
-    mock_delete_result.deleted_count = 1
-    mock_ratings_collection.delete_one = AsyncMock(return_value=mock_delete_result)
+    mock_ratings_collection.find_one_and_delete = AsyncMock(return_value={"_id": "rating_id_123", "stars": 4})
     
     with patch('services.rating_service.get_db') as mock_get_db:
-        mock_get_db.return_value.__getitem__.return_value = mock_ratings_collection
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
         
         result = await delete_rating(
             rater_user_id=rater_user_id,
@@ -278,18 +340,23 @@ async def test_delete_rating_exists(mock_ratings_collection):
         )
     
     assert result is True
-    mock_ratings_collection.delete_one.assert_called_once()
+    mock_ratings_collection.find_one_and_delete.assert_called_once()
+    # The deleted rating is removed from the rated user's counters
+    update = mock_users_collection.update_one.call_args.args[1]
+    assert update == {"$inc": {
+        "rating_stats.sum": -4,
+        "rating_stats.count": -1,
+        "rating_stats.histogram.4": -1
+    }}
 
 
 @pytest.mark.asyncio
-async def test_delete_rating_not_exists(mock_ratings_collection):
+async def test_delete_rating_not_exists(mock_ratings_collection, mock_users_collection):
     """Test deleting a non-existent rating."""
-    mock_delete_result = MagicMock()
-    mock_delete_result.deleted_count = 0
-    mock_ratings_collection.delete_one = AsyncMock(return_value=mock_delete_result)
+    mock_ratings_collection.find_one_and_delete = AsyncMock(return_value=None)
     
     with patch('services.rating_service.get_db') as mock_get_db:
-        mock_get_db.return_value.__getitem__.return_value = mock_ratings_collection
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
         
         result = await delete_rating(
             rater_user_id="user1",
@@ -297,4 +364,55 @@ async def test_delete_rating_not_exists(mock_ratings_collection):
         )
     
     assert result is False
+    mock_users_collection.update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rebuild_rating_stats(mock_ratings_collection, mock_users_collection):
+    """Test that the rebuild job recounts every rated user in one bulk write."""
+    rows = [
+        {"_id": {"user": "user2", "stars": 5}, "count": 2},
+        {"_id": {"user": "user2", "stars": 1}, "count": 1},
+    ]
+    
+    async def aggregate_rows():
+        for row in rows:
+            yield row
+    
+    mock_ratings_collection.aggregate = MagicMock(return_value=aggregate_rows())
+    mock_users_collection.bulk_write = AsyncMock(return_value=MagicMock(modified_count=1))
+    
+    with patch('services.rating_service.get_db') as mock_get_db:
+        _patch_collections(mock_get_db, mock_ratings_collection, mock_users_collection)
+        
+        assert await rebuild_rating_stats() == 1
+    
+    operations = mock_users_collection.bulk_write.call_args.args[0]
+    counters = operations[0]._doc["$set"]["rating_stats"]
+    assert counters["sum"] == 11
+    assert counters["count"] == 3
+    assert counters["histogram"]["5"] == 2
+    # Users without ratings are reset by the trailing UpdateMany
+    assert len(operations) == 2
+
 
+@pytest.mark.asyncio
+async def test_cached_rating_stats_evicted_on_rating_change():
+    """Test that batch stats are cached until a rating.changed event arrives."""
+    rating_service._stats_cache.clear()
+    stats = {"average_rating": 4.0, "total_ratings": 1, "rating_breakdown": None}
+    
+    with patch('services.rating_service.get_rating_stats_for_users', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = {"user2": stats}
+        
+        first = await rating_service.get_cached_rating_stats_for_users(["user2"])
+        second = await rating_service.get_cached_rating_stats_for_users(["user2"])
+        
+        assert first == second == {"user2": stats}
+        mock_fetch.assert_awaited_once_with(["user2"])
+        
+        event_bus.publish(event_bus.RATING_CHANGED, {"rated_user_id": "user2", "rater_user_id": "user1"})
+        await rating_service.get_cached_rating_stats_for_users(["user2"])
+        
+        assert mock_fetch.await_count == 2
+    rating_service._stats_cache.clear()
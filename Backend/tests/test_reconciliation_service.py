@@ -0,0 +1,237 @@
+"""Unit tests for fleet-wide credit reconciliation using a mocked database."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services import reconciliation_service
+
+
+class _AsyncCursor:
+    """Minimal async-iterable cursor over a fixed list of documents."""
+
+    def __init__(self, docs):
+        self._docs = list(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._docs:
+            raise StopAsyncIteration
+        return self._docs.pop(0)
+
+
+def _ledger(rows, fresh=None):
+    """Mock transactions whose full aggregation streams `rows`.
+
+    Per-user re-totals (`$match` on user_id) read from `fresh`, which
+    defaults to the same rows.
+    """
+    fresh = rows if fresh is None else fresh
+
+    def aggregate(pipeline, **kwargs):
+        if "$match" not in pipeline[0]:
+            return _AsyncCursor(rows)
+        user_ids = pipeline[0]["$match"]["user_id"]["$in"]
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[row for row in fresh if row["_id"] in user_ids])
+        return cursor
+
+    transactions = MagicMock()
+    transactions.aggregate.side_effect = aggregate
+    return transactions
+
+
+@pytest.fixture
+def ledger_setup():
+    """Mock users/transactions/report collections for two users and one orphan ledger."""
+    in_sync, drifted, no_ledger = ObjectId(), ObjectId(), ObjectId()
+    users_docs = [
+        {"_id": in_sync, "credits": 5.0},
+        {"_id": drifted, "credits": 9.0},
+    ]
+    ledger_rows = [
+        {"_id": str(in_sync), "balance": 5.0, "count": 3},
+        {"_id": str(drifted), "balance": 7.0, "count": 4},
+        {"_id": "deleted-user", "balance": 1.0, "count": 1},
+    ]
+
+    users = MagicMock()
+    chunk_cursor = MagicMock()
+    chunk_cursor.to_list = AsyncMock(return_value=users_docs)
+    # First find(): chunk lookup; second find(): users-with-credits pass
+    users.find.side_effect = [
+        chunk_cursor,
+        _AsyncCursor(users_docs + [{"_id": no_ledger, "credits": 2.0}]),
+    ]
+    bulk_result = MagicMock()
+    bulk_result.modified_count = 2
+    users.bulk_write = AsyncMock(return_value=bulk_result)
+
+    transactions = _ledger(ledger_rows)
+    reports = MagicMock()
+    reports.insert_many = AsyncMock()
+
+    db = MagicMock()
+    db.__getitem__.side_effect = {
+        "users": users,
+        "transactions": transactions,
+        "credit_drift_reports": reports,
+    }.__getitem__
+    return db, users, transactions, reports, drifted, no_ledger, in_sync
+
+
+@pytest.mark.asyncio
+async def test_reconcile_reports_drift_without_repair(ledger_setup):
+    """Test that drift and orphaned ledgers are reported from one full ledger pass."""
+    db, users, transactions, reports, drifted, no_ledger, _ = ledger_setup
+
+    with patch("services.reconciliation_service.get_db", return_value=db):
+        summary = await reconciliation_service.reconcile_credits()
+
+    # One full pass plus one re-total per chunk with apparent drift
+    assert transactions.aggregate.call_count == 3
+    assert summary["users_checked"] == 3
+    assert summary["drifted"] == 2
+    assert summary["orphaned"] == 1
+    assert summary["total_drift"] == pytest.approx(4.0)
+    assert summary["repaired"] == 0
+    users.bulk_write.assert_not_called()
+
+    written = [entry for call in reports.insert_many.call_args_list for entry in call.args[0]]
+    by_user = {entry["user_id"]: entry for entry in written}
+    assert by_user[str(drifted)]["drift"] == pytest.approx(2.0)
+    assert by_user["deleted-user"]["orphaned"] is True
+    assert by_user[str(no_ledger)]["ledger_balance"] == 0.0
+    assert all(entry["run_id"] == summary["run_id"] for entry in written)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repair_uses_guarded_bulk_writes(ledger_setup):
+    """Test that repairs are chunked bulk writes guarded on the observed credits."""
+    db, users, _, _, drifted, no_ledger, _ = ledger_setup
+
+    with patch("services.reconciliation_service.get_db", return_value=db):
+        summary = await reconciliation_service.reconcile_credits(repair=True)
+
+    operations = [op for call in users.bulk_write.call_args_list for op in call.args[0]]
+    filters = {op._filter["_id"]: op for op in operations}
+    assert filters[drifted]._filter["credits"] == 9.0
+    assert filters[drifted]._doc == {"$set": {"credits": 7.0}}
+    assert filters[no_ledger]._doc == {"$set": {"credits": 0.0}}
+    assert summary["repaired"] == 4
+
+
+@pytest.mark.asyncio
+async def test_reconcile_does_not_mark_unmatched_repairs(ledger_setup):
+    """Test that repairs whose guard matched nothing are not reported as issued."""
+    db, users, _, reports, drifted, no_ledger, _ = ledger_setup
+    users.bulk_write.return_value.modified_count = 0
+
+    with patch("services.reconciliation_service.get_db", return_value=db):
+        summary = await reconciliation_service.reconcile_credits(repair=True)
+
+    written = [entry for call in reports.insert_many.call_args_list for entry in call.args[0]]
+    by_user = {entry["user_id"]: entry for entry in written}
+    assert summary["repaired"] == 0
+    assert by_user[str(drifted)]["repair_issued"] is False
+    assert by_user[str(no_ledger)]["repair_issued"] is False
+
+
+@pytest.mark.asyncio
+async def test_reconcile_marks_only_matched_repairs_in_a_partial_chunk():
+    """Test that a partially applied chunk is re-read to mark the repaired users."""
+    repaired, raced = ObjectId(), ObjectId()
+    users = MagicMock()
+    chunk_cursor = MagicMock()
+    chunk_cursor.to_list = AsyncMock(return_value=[
+        {"_id": repaired, "credits": 9.0},
+        {"_id": raced, "credits": 4.0},
+    ])
+    reread_cursor = MagicMock()
+    # The second user's credits changed before the guarded update ran
+    reread_cursor.to_list = AsyncMock(return_value=[
+        {"_id": repaired, "credits": 7.0},
+        {"_id": raced, "credits": 6.0},
+    ])
+    users.find.side_effect = [chunk_cursor, reread_cursor, _AsyncCursor([])]
+    bulk_result = MagicMock()
+    bulk_result.modified_count = 1
+    users.bulk_write = AsyncMock(return_value=bulk_result)
+    transactions = _ledger([
+        {"_id": str(repaired), "balance": 7.0, "count": 2},
+        {"_id": str(raced), "balance": 3.0, "count": 2},
+    ])
+    reports = MagicMock()
+    reports.insert_many = AsyncMock()
+    db = MagicMock()
+    db.__getitem__.side_effect = {
+        "users": users,
+        "transactions": transactions,
+        "credit_drift_reports": reports,
+    }.__getitem__
+
+    with patch("services.reconciliation_service.get_db", return_value=db):
+        summary = await reconciliation_service.reconcile_credits(repair=True)
+
+    written = [entry for call in reports.insert_many.call_args_list for entry in call.args[0]]
+    by_user = {entry["user_id"]: entry for entry in written}
+    assert summary["repaired"] == 1
+    assert by_user[str(repaired)]["repair_issued"] is True
+    assert by_user[str(raced)]["repair_issued"] is False
+
+
+@pytest.mark.asyncio
+async def test_reconcile_skips_users_whose_ledger_moved_after_the_first_pass(ledger_setup):
+    """Test that a transaction landing between the ledger pass and the user read is not undone."""
+    db, users, _, reports, drifted, no_ledger, in_sync = ledger_setup
+    # Both users' credits already include a transaction the first pass missed
+    db.__getitem__.side_effect = {
+        "users": users,
+        "transactions": _ledger(
+            [
+                {"_id": str(in_sync), "balance": 5.0, "count": 3},
+                {"_id": str(drifted), "balance": 7.0, "count": 4},
+                {"_id": "deleted-user", "balance": 1.0, "count": 1},
+            ],
+            fresh=[
+                {"_id": str(drifted), "balance": 9.0, "count": 5},
+                {"_id": str(no_ledger), "balance": 2.0, "count": 1},
+            ],
+        ),
+        "credit_drift_reports": reports,
+    }.__getitem__
+
+    with patch("services.reconciliation_service.get_db", return_value=db):
+        summary = await reconciliation_service.reconcile_credits(repair=True)
+
+    assert summary["drifted"] == 0
+    assert summary["repaired"] == 0
+    users.bulk_write.assert_not_called()
+    written = [entry for call in reports.insert_many.call_args_list for entry in call.args[0]]
+    assert [entry["user_id"] for entry in written] == ["deleted-user"]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_to_the_fresh_ledger_total(ledger_setup):
+    """Test that a repair writes the re-totalled balance, not the first pass's."""
+    db, users, _, reports, drifted, _, in_sync = ledger_setup
+    db.__getitem__.side_effect = {
+        "users": users,
+        "transactions": _ledger(
+            [
+                {"_id": str(in_sync), "balance": 5.0, "count": 3},
+                {"_id": str(drifted), "balance": 7.0, "count": 4},
+            ],
+            fresh=[{"_id": str(drifted), "balance": 8.0, "count": 5}],
+        ),
+        "credit_drift_reports": reports,
+    }.__getitem__
+
+    with patch("services.reconciliation_service.get_db", return_value=db):
+        await reconciliation_service.reconcile_credits(repair=True)
+
+    operations = [op for call in users.bulk_write.call_args_list for op in call.args[0]]
+    repair = next(op for op in operations if op._filter["_id"] == drifted)
+    assert repair._filter["credits"] == 9.0
+    assert repair._doc == {"$set": {"credits": 8.0}}
@@ -0,0 +1,270 @@
+"""Unit tests for slow query detection, recording and the admin ranking endpoint."""
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from database.command_monitor import track_commands
+from database.slow_query_monitor import SlowQueryListener, query_shape, redact, shape_key
+from services import slow_query_service
+
+
+def _started(request_id, name, command):
+    return SimpleNamespace(
+        connection_id=("localhost", 27017), request_id=request_id, command_name=name,
+        command=command, database_name="swapcircle",
+    )
+
+
+def _finished(request_id, name, micros):
+    return SimpleNamespace(
+        connection_id=("localhost", 27017), request_id=request_id, command_name=name,
+        duration_micros=micros,
+    )
+
+
+def test_redact_keeps_structure_and_hides_values():
+    """Test that values become "?" while operators and field references remain."""
+    assert redact({"status": "available", "owner_id": {"$in": ["a", "b", "c"]}}) == {
+        "status": "?", "owner_id": {"$in": ["?"]},
+    }
+    assert redact({"$or": [{"name": "x"}, {"email": "y"}]}) == {"$or": [{"name": "?"}, {"email": "?"}]}
+    # A user-entered "$..." string in a filter is a value like any other
+    assert redact({"username": "$admin"}) == {"username": "?"}
+
+
+def test_field_paths_are_kept_only_in_aggregation_expressions():
+    """Test that pipeline field references survive while $match values are redacted."""
+    shape = query_shape("aggregate", {"aggregate": "ratings", "pipeline": [
+        {"$match": {"rated_user_id": "$sam", "$expr": {"$gt": ["$stars", 3]}}},
+        {"$group": {"_id": "$stars", "n": {"$sum": 1}}},
+    ]})
+
+    assert shape == {"pipeline": [
+        {"$match": {"rated_user_id": "?", "$expr": {"$gt": ["$stars", "?"]}}},
+        {"$group": {"_id": "$stars", "n": {"$sum": "?"}}},
+    ]}
+
+
+def test_projection_values_are_redacted():
+    """Test that inclusion flags stay while $elemMatch values are hidden."""
+    shape = query_shape("find", {"find": "users", "filter": {}, "projection": {
+        "username": 1, "favorites": {"$elemMatch": {"item_id": "abc"}},
+    }})
+
+    assert shape["projection"] == {"username": 1, "favorites": {"$elemMatch": {"item_id": "?"}}}
+
+
+def test_queries_differing_only_in_values_share_a_shape():
+    """Test that shape keys ignore values but not fields, sorts or collections."""
+    first = query_shape("find", {"find": "items", "filter": {"owner_id": "u1"}, "sort": {"created_at": -1}})
+    second = query_shape("find", {"find": "items", "filter": {"owner_id": "u2"}, "sort": {"created_at": -1}})
+    other = query_shape("find", {"find": "items", "filter": {"status": "u1"}, "sort": {"created_at": -1}})
+
+    assert first == {"filter": {"owner_id": "?"}, "sort": {"created_at": -1}}
+    assert shape_key("find", "items", first) == shape_key("find", "items", second)
+    assert shape_key("find", "items", first) != shape_key("find", "items", other)
+    assert shape_key("find", "items", first) != shape_key("find", "users", first)
+
+
+def test_update_shape_uses_first_statement():
+    """Test that update commands are shaped by their first statement."""
+    shape = query_shape("update", {"update": "users", "updates": [
+        {"q": {"_id": "x"}, "u": {"$set": {"credits": 5}}, "upsert": False},
+        {"q": {"_id": "y"}, "u": {"$set": {"credits": 6}}},
+    ]})
+
+    assert shape == {"updates": [{"q": {"_id": "?"}, "u": {"$set": {"credits": "?"}}}]}
+
+
+def test_listener_hands_only_slow_monitored_commands_to_the_sink():
+    """Test the threshold, the monitored commands and the originating route."""
+    records = []
+    listener = SlowQueryListener(threshold_ms=50)
+    listener.attach(records.append)
+
+    with track_commands(lambda: "GET /items/{item_id}"):
+        listener.started(_started(1, "find", {"find": "items", "filter": {"_id": "abc"}}))
+        listener.succeeded(_finished(1, "find", 80_000))
+        listener.started(_started(2, "find", {"find": "items", "filter": {"_id": "abc"}}))
+        listener.succeeded(_finished(2, "find", 10_000))
+        listener.started(_started(3, "insert", {"insert": "items", "documents": []}))
+        listener.succeeded(_finished(3, "insert", 90_000))
+
+    assert len(records) == 1
+    record = records[0]
+    assert record["command"] == "find"
+    assert record["collection"] == "items"
+    assert record["shape"] == {"filter": {"_id": "?"}}
+    assert record["duration_ms"] == 80.0
+    assert record["route"] == "GET /items/{item_id}"
+    assert record["failed"] is False
+    assert listener._pending == {}
+
+
+def test_listener_is_idle_without_a_sink():
+    """Test that nothing is retained before recording starts."""
+    listener = SlowQueryListener(threshold_ms=0)
+    listener.started(_started(1, "find", {"find": "items", "filter": {}}))
+
+    assert listener._pending == {}
+
+
+def test_summarize_explain_for_find_and_aggregate():
+    """Test that plans and execution stats are extracted from both explain formats."""
+    find_explain = {
+        "queryPlanner": {"winningPlan": {
+            "stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "owner_id_1"},
+        }},
+        "executionStats": {
+            "nReturned": 3, "totalKeysExamined": 3, "totalDocsExamined": 3, "executionTimeMillis": 1,
+        },
+    }
+    aggregate_explain = {"stages": [{"$cursor": {
+        "queryPlanner": {"winningPlan": {"queryPlan": {"stage": "COLLSCAN"}}},
+        "executionStats": {"nReturned": 10, "totalDocsExamined": 5000},
+    }}]}
+
+    find_summary = slow_query_service.summarize_explain(find_explain)
+    aggregate_summary = slow_query_service.summarize_explain(aggregate_explain)
+
+    assert find_summary["plan"] == ["FETCH", "IXSCAN owner_id_1"]
+    assert find_summary["collection_scan"] is False
+    assert find_summary["docs_examined"] == 3
+    assert aggregate_summary["plan"] == ["COLLSCAN"]
+    assert aggregate_summary["collection_scan"] is True
+    assert aggregate_summary["docs_examined"] == 5000
+
+
+def _record(shape_key_value="abc123"):
+    return {
+        "command": "find", "collection": "items", "database": "swapcircle",
+        "shape": {"filter": {"$and": [{"status": "?"}]}}, "shape_key": shape_key_value,
+        "duration_ms": 120.0, "failed": False, "route": "GET /items/", "at": None,
+        "command_doc": {"find": "items", "filter": {"status": "available"}, "lsid": {"id": 1}, "$db": "swapcircle"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_store_explains_a_shape_once_per_interval():
+    """Test that records are stored without the command and explained at most once per interval."""
+    db = MagicMock()
+    db.__getitem__.return_value.insert_one = AsyncMock()
+    db.client.__getitem__.return_value.command = AsyncMock(return_value={
+        "queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}, "executionStats": {"nReturned": 1},
+    })
+
+    with patch("services.slow_query_service.get_db", return_value=db), \
+         patch.dict(slow_query_service._last_explained, clear=True):
+        await slow_query_service._store(_record())
+        await slow_query_service._store(_record())
+
+    explain_command = db.client.__getitem__.return_value.command
+    explain_command.assert_awaited_once()
+    explained = explain_command.await_args.args[0]
+    assert explained == {
+        "explain": {"find": "items", "filter": {"status": "available"}}, "verbosity": "executionStats",
+    }
+
+
+    stored = [call.args[0] for call in db.__getitem__.return_value.insert_one.await_args_list]
+    assert "command_doc" not in stored[0]
+    assert json.loads(stored[0]["shape"]) == {"filter": {"$and": [{"status": "?"}]}}
+    assert stored[0]["explain"]["collection_scan"] is True
+    assert stored[1]["explain"] is None
+
+
+@pytest.mark.asyncio
+async def test_explain_sends_one_statement_of_a_bulk_update():
+    """Test that multi-statement updates are explained by their first statement."""
+    db = MagicMock()
+    db.client.__getitem__.return_value.command = AsyncMock(return_value={})
+    record = {**_record(), "command": "update", "command_doc": {"update": "users", "updates": [
+        {"q": {"_id": 1}, "u": {"$set": {"credits": 1}}},
+        {"q": {"_id": 2}, "u": {"$set": {"credits": 2}}},
+    ], "ordered": False}}
+
+    with patch("services.slow_query_service.get_db", return_value=db):
+        await slow_query_service._explain(record)
+
+    explained = db.client.__getitem__.return_value.command.await_args.args[0]["explain"]
+    assert explained["updates"] == [{"q": {"_id": 1}, "u": {"$set": {"credits": 1}}}]
+    # The recorded command itself is left intact
+    assert len(record["command_doc"]["updates"]) == 2
+
+
+def test_schedule_drops_records_when_too_many_are_pending():
+    """Test that recording sheds load instead of queueing without bound."""
+    with patch.object(slow_query_service, "_tasks", {object()}), \
+         patch.object(slow_query_service, "MAX_PENDING_RECORDS", 1), \
+         patch.object(slow_query_service, "_dropped", 0), \
+         patch("services.slow_query_service.asyncio.ensure_future") as ensure_future:
+        slow_query_service._schedule(_record())
+        assert slow_query_service._dropped == 1
+
+    ensure_future.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_slow_query_shapes_ranks_by_total_time():
+    """Test the ranking pipeline and the shaping of its results."""
+    group = {
+        "_id": "abc123", "command": "find", "collection": "items",
+        "shape": json.dumps({"filter": {"status": "?"}}), "count": 3, "total_ms": 400.12345,
+        "avg_ms": 133.3744, "max_ms": 200.0, "failures": 0, "routes": [None, "GET /items/"],
+        "last_seen": None, "latest_explain": {"at": None, "explain": {"plan": ["COLLSCAN"]}},
+    }
+
+    async def groups():
+        yield group
+
+    collection = MagicMock()
+    collection.aggregate.return_value = groups()
+    db = MagicMock()
+    db.__getitem__.return_value = collection
+
+    with patch("services.slow_query_service.get_db", return_value=db):
+        shapes = await slow_query_service.get_slow_query_shapes(limit=5)
+
+    pipeline = collection.aggregate.call_args.args[0]
+    assert pipeline[-2:] == [{"$sort": {"total_ms": -1}}, {"$limit": 5}]
+    assert shapes == [{
+        "shape_key": "abc123", "command": "find", "collection": "items",
+        "shape": {"filter": {"status": "?"}}, "count": 3, "total_ms": 400.123, "avg_ms": 133.374,
+        "max_ms": 200.0, "failures": 0, "routes": ["GET /items/"], "last_seen": None,
+        "explain": {"plan": ["COLLSCAN"]},
+    }]
+
+
+class TestAdminSlowQueries:
+    """Tests for GET /admin/slow-queries."""
+
+    def _get(self, headers=None, token="secret", **params):
+        import main
+
+        with patch("routes.admin_routes.ADMIN_TOKEN", token), \
+             patch("services.slow_query_service.get_slow_query_shapes", new_callable=AsyncMock) as shapes:
+            shapes.return_value = [{"shape_key": "abc123"}]
+            response = TestClient(main.app).get("/admin/slow-queries", headers=headers or {}, params=params)
+        return response, shapes
+
+    def test_requires_admin_token(self):
+        response, shapes = self._get(headers={"X-Admin-Token": "wrong"})
+
+        assert response.status_code == 403
+        shapes.assert_not_called()
+
+    def test_disabled_without_configured_token(self):
+        response, _ = self._get(headers={"X-Admin-Token": ""}, token="")
+
+        assert response.status_code == 404
+
+    def test_returns_ranked_shapes(self):
+        response, shapes = self._get(headers={"X-Admin-Token": "secret"}, limit=5, hours=24)
+
+        assert response.status_code == 200
+        assert response.json() == {"shapes": [{"shape_key": "abc123"}]}
+        assert shapes.await_args.kwargs["limit"] == 5
+        assert shapes.await_args.kwargs["since"] is not None
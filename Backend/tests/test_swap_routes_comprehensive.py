@@ -42,7 +42,7 @@ class TestRequestSwap:
                                 return_value=None,
                             ):
                                 with patch(
-                                    "routes.swap_routes.notification_service.create_notification",
+                                    "routes.swap_routes.notification_outbox.enqueue_notification",
                                     return_value=None,
                                 ):
                                     response = client.post(
@@ -193,7 +193,7 @@ class TestApproveSwap:
                                             return_value=None,
                                         ):
                                             with patch(
-                                                "routes.swap_routes.notification_service.create_notification",
+                                                "routes.swap_routes.notification_outbox.enqueue_notification",
                                                 return_value=None,
                                             ):
                                                 response = client.post(
@@ -310,9 +310,9 @@ class TestRejectSwap:
                                     return_value=mock_user,
                                 ):
                                     with patch(
-                                        "routes.swap_routes.notification_service.create_notification",
+                                        "routes.swap_routes.notification_outbox.enqueue_notification",
                                         return_value=None,
-                                    ):
+                                    ) as mock_enqueue:
                                         response = client.post(
                                             f"/swaps/items/{mock_item['id']}/requests/{mock_swap_request['id']}/reject",
                                             headers={
@@ -322,6 +322,9 @@ class TestRejectSwap:
                                         assert response.status_code == 200
                                         data = response.json()
                                         assert data["status"] == "rejected"
+                                        # The stored notification names the owner
+                                        metadata = mock_enqueue.call_args.kwargs["metadata"]
+                                        assert metadata["other_user_name"] == mock_user["username"]
 
     def test_reject_swap_not_owner(
         self, client, mock_user2, mock_item, mock_swap_request, mock_token
@@ -380,7 +383,7 @@ class TestCancelSwap:
                                     return_value=mock_user2,
                                 ):
                                     with patch(
-                                        "routes.swap_routes.notification_service.create_notification",
+                                        "routes.swap_routes.notification_outbox.enqueue_notification",
                                         return_value=None,
                                     ):
                                         response = client.post(
@@ -0,0 +1,154 @@
+"""Unit tests for swap service queries using a mocked database."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services import swap_service
+
+
+@pytest.fixture
+def mock_swap_requests_collection():
+    """Mock swap_requests collection."""
+    return MagicMock()
+
+
+def _mock_cursor(docs):
+    """Build a cursor mock supporting chained sort/limit and to_list."""
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=docs)
+    return cursor
+
+
+@pytest.mark.asyncio
+async def test_create_swap_request_stores_owner_and_participants(mock_swap_requests_collection):
+    """Test that the item owner is denormalized onto new swap requests."""
+    mock_insert_result = MagicMock()
+    mock_insert_result.inserted_id = ObjectId()
+    mock_swap_requests_collection.insert_one = AsyncMock(return_value=mock_insert_result)
+
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = mock_swap_requests_collection
+        result = await swap_service.create_swap_request(
+            item_id="item1", requester_id="user2", credits_required=1.0, owner_id="user1"
+        )
+
+    stored = mock_swap_requests_collection.insert_one.call_args.args[0]
+    assert stored["owner_id"] == "user1"
+    assert stored["participants"] == ["user2", "user1"]
+    assert result["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_get_pending_requests_for_owner_uses_owner_index(mock_swap_requests_collection):
+    """Test that owner lookups are a single query on owner_id without loading items."""
+    doc = {"_id": ObjectId(), "item_id": "item1", "owner_id": "user1", "status": "pending"}
+    mock_swap_requests_collection.find.return_value = _mock_cursor([doc])
+
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = mock_swap_requests_collection
+        with patch("services.storage_service.get_item", new_callable=AsyncMock) as mock_get_item:
+            result = await swap_service.get_pending_requests_for_owner("user1")
+
+    mock_swap_requests_collection.find.assert_called_once_with(
+        {"owner_id": "user1", "status": "pending"}
+    )
+    mock_get_item.assert_not_called()
+    assert len(result) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_approved_swaps_for_user_uses_participants(mock_swap_requests_collection):
+    """Test that swap history is a single query on participants."""
+    mock_swap_requests_collection.find.return_value = _mock_cursor([])
+
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = mock_swap_requests_collection
+        await swap_service.get_approved_swaps_for_user("user1")
+
+    mock_swap_requests_collection.find.assert_called_once_with(
+        {"participants": "user1", "status": "approved"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_swap_request_decrements_pending_counter(mock_swap_requests_collection):
+    """Test that leaving the pending state decrements the item's counter."""
+    request_id = str(ObjectId())
+    previous = {"_id": ObjectId(request_id), "item_id": "item1", "status": "pending"}
+    mock_swap_requests_collection.find_one_and_update = AsyncMock(return_value=previous)
+
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = mock_swap_requests_collection
+        with patch("services.storage_service.adjust_pending_requests", new_callable=AsyncMock) as mock_adjust:
+            result = await swap_service.update_swap_request(request_id, "rejected")
+
+    mock_adjust.assert_awaited_once_with("item1", -1)
+    assert result["status"] == "rejected"
+    assert result["id"] == request_id
+
+
+@pytest.mark.asyncio
+async def test_update_swap_request_not_pending_keeps_counter(mock_swap_requests_collection):
+    """Test that updating an already-closed request leaves the counter alone."""
+    request_id = str(ObjectId())
+    previous = {"_id": ObjectId(request_id), "item_id": "item1", "status": "approved"}
+    mock_swap_requests_collection.find_one_and_update = AsyncMock(return_value=previous)
+
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = mock_swap_requests_collection
+        with patch("services.storage_service.adjust_pending_requests", new_callable=AsyncMock) as mock_adjust:
+            await swap_service.update_swap_request(request_id, "cancelled")
+
+    mock_adjust.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cancel_other_pending_requests_decrements_by_cancelled_count(mock_swap_requests_collection):
+    """Test that the counter drops by the number of requests actually cancelled."""
+    approved_id = str(ObjectId())
+    mock_swap_requests_collection.update_many = AsyncMock(return_value=MagicMock(modified_count=2))
+
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = mock_swap_requests_collection
+        with patch("services.storage_service.adjust_pending_requests", new_callable=AsyncMock) as mock_adjust:
+            await swap_service.cancel_other_pending_requests("item1", approved_id)
+
+    query = mock_swap_requests_collection.update_many.call_args.args[0]
+    assert query == {"item_id": "item1", "status": "pending", "_id": {"$ne": ObjectId(approved_id)}}
+    mock_adjust.assert_awaited_once_with("item1", -2)
+
+
+@pytest.mark.asyncio
+async def test_cancel_other_pending_requests_nothing_cancelled_keeps_counter(mock_swap_requests_collection):
+    """Test that the counter is untouched when no other request was pending."""
+    mock_swap_requests_collection.update_many = AsyncMock(return_value=MagicMock(modified_count=0))
+
+    with patch("services.swap_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = mock_swap_requests_collection
+        with patch("services.storage_service.adjust_pending_requests", new_callable=AsyncMock) as mock_adjust:
+            await swap_service.cancel_other_pending_requests("item1", str(ObjectId()))
+
+    mock_adjust.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sync_pending_request_counts_missing_only_leaves_live_counters():
+    """Test that the startup backfill only sets counters on items that have none."""
+    item_id = ObjectId()
+    db = MagicMock()
+    db["swap_requests"].aggregate.return_value.to_list = AsyncMock(
+        return_value=[{"_id": str(item_id), "count": 2}]
+    )
+    db["items"].bulk_write = AsyncMock(return_value=MagicMock(modified_count=5))
+
+    with patch("services.swap_service.get_db", return_value=db):
+        updated = await swap_service.sync_pending_request_counts(missing_only=True)
+
+    counted, rest = db["items"].bulk_write.call_args.args[0]
+    assert counted._filter == {"_id": item_id, "pending_requests": {"$exists": False}}
+    assert counted._doc == {"$set": {"pending_requests": 2}}
+    assert rest._filter["pending_requests"] == {"$exists": False}
+    assert rest._doc == {"$set": {"pending_requests": 0}}
+    assert updated == 5
@@ -26,6 +26,30 @@ class TestListUsers:
             assert isinstance(data["users"], list)
 
 
+class TestSearchUsers:
+    """Tests for GET /users/search endpoint."""
+    
+    def test_search_users_batches_rating_stats(self, client, mock_user):
+        """Test that search hydrates ratings for all results with one call."""
+        results = [{"id": "u1", "username": "sarah", "full_name": "Sarah Lee"}, {"id": "u2", "username": "sarahk"}]
+        stats = {"u1": {"average_rating": 4.5, "total_ratings": 2}, "u2": {"average_rating": 0.0, "total_ratings": 0}}
+        with patch("routes.user_routes.user_service.search_users", new_callable=AsyncMock, return_value=results) as mock_search:
+            with patch("services.rating_service.get_rating_stats_for_users", new_callable=AsyncMock, return_value=stats) as mock_stats:
+                response = client.get("/users/search?q=Sarah&limit=5")
+                assert response.status_code == 200
+                data = response.json()
+                assert [u["id"] for u in data["users"]] == ["u1", "u2"]
+                assert data["users"][0]["averageRating"] == 4.5
+                assert data["users"][1]["initials"] == "S"
+                mock_search.assert_awaited_once_with("sarah", 5)
+                mock_stats.assert_awaited_once_with(["u1", "u2"])
+    
+    def test_search_users_blank_query(self, client):
+        """Test that a whitespace-only query is rejected."""
+        response = client.get("/users/search?q=%20%20")
+        assert response.status_code == 400
+
+
 class TestGetUserByUsername:
     """Tests for GET /users/username/{username} endpoint."""
     
@@ -46,6 +70,80 @@ class TestGetUserByUsername:
             assert response.status_code == 404
 
 
+class TestGetPublicProfile:
+    """Tests for GET /users/username/{username}/profile endpoint."""
+    
+    def _patches(self, user, listings=None):
+        """Patch the user lookup and the loaders gathered by the endpoint."""
+        return (
+            patch("routes.user_routes.user_service.get_user_by_username", new_callable=AsyncMock, return_value=user),
+            patch("services.storage_service.list_owner_listings", new_callable=AsyncMock, return_value=listings or []),
+            patch("services.rating_service.get_user_rating_stats", new_callable=AsyncMock, return_value={"average_rating": 4.5, "total_ratings": 2}),
+            patch("services.storage_service.count_items_by_status", new_callable=AsyncMock, return_value={"available": 1, "swapped": 3}),
+            patch("services.swap_service.count_approved_swaps_for_user", new_callable=AsyncMock, return_value=3),
+        )
+    
+    def test_get_public_profile_success(self, client, mock_user):
+        """Test that the profile combines user, listings, ratings and counts."""
+        user = {"id": mock_user["id"], "username": mock_user["username"], "full_name": "Test User", "bio": "Test bio"}
+        listings = [{"id": "item1", "title": "Jacket", "owner_id": mock_user["id"], "status": "available"}]
+        p_user, p_listings, p_stats, p_counts, p_swaps = self._patches(user, listings)
+        with p_user as mock_get_user, p_listings as mock_listings, p_stats, p_counts, p_swaps:
+            response = client.get(f"/users/username/{mock_user['username']}/profile")
+            assert response.status_code == 200
+            assert response.headers["Cache-Control"].startswith("public")
+            assert "Authorization" in response.headers["Vary"]
+            assert "ETag" in response.headers
+            data = response.json()
+            assert data["user"]["username"] == mock_user["username"]
+            assert data["user"]["average_rating"] == 4.5
+            assert "email" not in data["user"]
+            assert [item["id"] for item in data["listings"]] == ["item1"]
+            assert data["item_counts"] == {"available": 1, "swapped": 3}
+            assert data["swap_count"] == 3
+            # The user is resolved once, without authentication fields
+            mock_get_user.assert_awaited_once()
+            assert "password_hash" not in mock_get_user.call_args.kwargs["projection"]
+            assert mock_listings.call_args.args[0] == mock_user["id"]
+    
+    def test_get_public_profile_not_modified(self, client, mock_user):
+        """Test that a matching If-None-Match gets 304 without a body."""
+        user = {"id": mock_user["id"], "username": mock_user["username"]}
+        p_user, p_listings, p_stats, p_counts, p_swaps = self._patches(user)
+        with p_user, p_listings, p_stats, p_counts, p_swaps:
+            first = client.get(f"/users/username/{mock_user['username']}/profile")
+            second = client.get(
+                f"/users/username/{mock_user['username']}/profile",
+                headers={"If-None-Match": first.headers["ETag"]}
+            )
+            assert second.status_code == 304
+            assert second.content == b""
+    
+    def test_get_public_profile_owner_reads_primary_after_edit(self, client, mock_user):
+        """Test that users see their own edits: primary reads and no shared caching."""
+        stale = {"id": mock_user["id"], "username": mock_user["username"], "bio": "Old bio"}
+        fresh = {"id": mock_user["id"], "username": mock_user["username"], "bio": "New bio"}
+        p_user, p_listings, p_stats, p_counts, p_swaps = self._patches(None)
+        with patch("routes.user_routes.auth_service.get_optional_user_id", return_value=mock_user["id"]), \
+             patch("routes.user_routes.user_service.get_user_by_username", new_callable=AsyncMock, side_effect=[stale, fresh]) as mock_get_user, \
+             p_listings as mock_listings, p_stats, p_counts as mock_counts, p_swaps as mock_swaps:
+            response = client.get(f"/users/username/{mock_user['username']}/profile")
+            assert response.status_code == 200
+            assert response.json()["user"]["bio"] == "New bio"
+            assert response.headers["Cache-Control"] == "private, no-cache"
+            assert "Authorization" in response.headers["Vary"]
+            assert mock_get_user.await_args_list[1].kwargs.get("stale_reads", False) is False
+            assert mock_listings.call_args.kwargs["stale_reads"] is False
+            assert mock_counts.call_args.kwargs["stale_reads"] is False
+            assert mock_swaps.call_args.kwargs["stale_reads"] is False
+    
+    def test_get_public_profile_not_found(self, client):
+        """Test getting the profile of a non-existent user."""
+        with patch("routes.user_routes.user_service.get_user_by_username", new_callable=AsyncMock, return_value=None):
+            response = client.get("/users/username/nonexistent/profile")
+            assert response.status_code == 404
+
+
 class TestGetUserById:
     """Tests for GET /users/{user_id} endpoint."""
     
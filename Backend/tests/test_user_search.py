@@ -0,0 +1,71 @@
+"""Unit tests for indexed user search and batched rating statistics."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+
+from services import rating_service, user_service
+
+
+def _cursor(rows):
+    """Mock a find cursor returning rows."""
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=rows)
+    return cursor
+
+
+def test_search_fields_normalize_names():
+    """Test that the search fields are lowercased and split into words."""
+    assert user_service._search_fields("Sarah_K", "Sarah  Lee") == {
+        "username_lc": "sarah_k",
+        "full_name_lc": "sarah  lee",
+        "name_words": ["sarah", "lee"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_runs_ranked_prefix_tiers_until_full():
+    """Test that search queries tiers in rank order, capped at the remaining limit."""
+    exact_id = ObjectId()
+    exact, prefix = {"_id": exact_id, "username": "sam"}, {"_id": ObjectId(), "username": "samir"}
+    users = MagicMock()
+    users.find = MagicMock(side_effect=[_cursor([exact]), _cursor([prefix])])
+    with patch("services.user_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.return_value = users
+        results = await user_service.search_users("Sa.m", limit=2)
+
+    assert [u["username"] for u in results] == ["sam", "samir"]
+    assert users.find.call_count == 2  # Limit reached before the name tiers
+    first_filter, projection = users.find.call_args_list[0].args
+    assert first_filter == {"username_lc": "sa.m"}
+    assert "password_hash" not in projection and "salt" not in projection
+    second_filter = users.find.call_args_list[1].args[0]
+    assert second_filter["username_lc"] == {"$regex": "^sa\\.m"}
+    assert second_filter["_id"] == {"$nin": [exact_id]}
+
+
+@pytest.mark.asyncio
+async def test_rating_stats_for_users_reads_counters_in_one_query():
+    """Test that batch stats come from one users query, counting only users without counters."""
+    u1, u2 = ObjectId(), ObjectId()
+    users = MagicMock()
+    users.find = MagicMock(return_value=_cursor([
+        {"_id": u1, "rating_stats": {"sum": 12, "count": 3, "histogram": {"5": 2, "2": 1}}},
+        {"_id": u2},
+    ]))
+    aggregate_cursor = MagicMock()
+    aggregate_cursor.to_list = AsyncMock(return_value=[{"_id": {"user": str(u2), "stars": 4}, "count": 1}])
+    ratings = MagicMock()
+    ratings.aggregate = MagicMock(return_value=aggregate_cursor)
+    with patch("services.rating_service.get_db") as mock_get_db:
+        mock_get_db.return_value.__getitem__.side_effect = {"users": users, "ratings": ratings}.__getitem__
+        stats = await rating_service.get_rating_stats_for_users([str(u1), str(u2), "legacy"])
+
+    assert users.find.call_args.args[0] == {"$or": [{"_id": {"$in": [u1, u2]}}, {"id": {"$in": ["legacy"]}}]}
+    assert stats[str(u1)]["average_rating"] == 4.0
+    assert stats[str(u1)]["rating_breakdown"][5] == 2
+    match = ratings.aggregate.call_args.args[0][0]["$match"]
+    assert sorted(match["rated_user_id"]["$in"]) == sorted([str(u2), "legacy"])
+    assert stats[str(u2)]["total_ratings"] == 1
+    assert stats["legacy"] == {"average_rating": 0.0, "total_ratings": 0, "rating_breakdown": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}}
@@ -0,0 +1,40 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor records the `_id` of the last document on a page and, when the
+listing is sorted by another field, that field's value. Clients treat it as
+an opaque string and pass it back to fetch the next page.
+"""
+
+import base64
+import json
+from typing import Any, Dict
+
+from bson import ObjectId
+
+
+def encode_cursor(doc: Dict[str, Any], sort_field: str, **extra: Any) -> str:
+    """Build an opaque cursor from the last document of a page.
+
+    Extra keyword arguments (JSON-serializable) are stored in the cursor and
+    returned by decode_cursor.
+    """
+    payload = {"id": str(doc["_id"]), **extra}
+    if sort_field != "_id":
+        payload["k"] = doc.get(sort_field)
+    raw = json.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        last_id = payload["id"]
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    payload["id"] = ObjectId(last_id) if ObjectId.is_valid(last_id) else last_id
+    return payload
@@ -10,9 +10,36 @@ import { itemsAPI } from '@/services/api';
 import { toListingCardData } from '@/utils/itemTransforms';
 import { useAuth } from '@/contexts/AuthContext';
 
+const PAGE_SIZE = 24;
+
+// Backend statuses that normalizeStatus() folds into each availability option
+const AVAILABILITY_STATUSES = {
+  available: ['available'],
+  pending: ['pending', 'in_progress', 'locked'],
+  unavailable: ['unavailable', 'swapped', 'closed', 'sold'],
+};
+
+// Build the server-side query for the current filters, sort and search
+function buildBrowseParams(filters, sortBy, searchQuery, user) {
+  return {
+    category: filters.categories,
+    location: filters.locations,
+    condition: filters.conditions,
+    min_credits: filters.minCredits,
+    max_credits: filters.maxCredits,
+    status: AVAILABILITY_STATUSES[filters.availability] || null,
+    q: searchQuery.trim(),
+    // Hide own items for logged-in users
+    exclude_owner: user?.id,
+    sort: sortBy,
+    limit: PAGE_SIZE,
+  };
+}
+
 export default function BrowsePage() {
   const { user } = useAuth();
   const [searchQuery, setSearchQuery] = useState('');
+  const [debouncedQuery, setDebouncedQuery] = useState('');
   const [sortBy, setSortBy] = useState('newest');
   const [filters, setFilters] = useState({
     categories: [],
@@ -24,33 +51,66 @@ export default function BrowsePage() {
   });
   const [showFilters, setShowFilters] = useState(false);
   const [listings, setListings] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
 
-  // Fetch items from backend
+  // Avoid a backend round trip on every keystroke
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  // Fetch the first page whenever filters, sort or search change
   useEffect(() => {
+    let cancelled = false;
     const fetchItems = async () => {
       try {
         setLoading(true);
         setError(null);
-        const data = await itemsAPI.getItems();
-        // Show all items on browse page, including unavailable ones (we'll visually indicate them but keep them visible)
-        const allItems = Array.isArray(data) ? data : [];
-        setListings(allItems);
+        const data = await itemsAPI.browseItems(
+          buildBrowseParams(filters, sortBy, debouncedQuery, user)
+        );
+        if (cancelled) return;
+        setListings(Array.isArray(data?.items) ? data.items : []);
+        setNextCursor(data?.next_cursor || null);
       } catch (err) {
+        if (cancelled) return;
         console.error('Error fetching items:', err);
         setError(err.message || 'Failed to load items');
       } finally {
-        setLoading(false);
+        if (!cancelled) setLoading(false);
       }
     };
 
     fetchItems();
-  }, []);
+    return () => {
+      cancelled = true;
+    };
+  }, [filters, sortBy, debouncedQuery, user]);
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const data = await itemsAPI.browseItems({
+        ...buildBrowseParams(filters, sortBy, debouncedQuery, user),
+        cursor: nextCursor,
+      });
+      setListings((prev) => [...prev, ...(Array.isArray(data?.items) ? data.items : [])]);
+      setNextCursor(data?.next_cursor || null);
+    } catch (err) {
+      console.error('Error fetching more items:', err);
+      setError(err.message || 'Failed to load more items');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   // Transform backend items to listing format via shared helper
-  const transformListings = (items) => {
-    return items.map((item) => {
+  const filteredListings = useMemo(() => {
+    return listings.map((item) => {
       const base = toListingCardData(item);
       if (!base) return null;
       const isOwner = user && item.owner_id && user.id === item.owner_id;
@@ -60,105 +120,7 @@ export default function BrowsePage() {
         isOwner,
       };
     }).filter(Boolean);
-  };
-
-  // Filter and sort listings
-  const filteredListings = useMemo(() => {
-    const transformedListings = transformListings(listings);
-    let filtered = [...transformedListings];
-
-    // Hide own items for logged-in users
-    if (user) {
-      filtered = filtered.filter((item) => !item.isOwner);
-    }
-
-    // Search filter
-    if (searchQuery) {
-      const query = searchQuery.toLowerCase();
-      filtered = filtered.filter(
-        (item) =>
-          item.title.toLowerCase().includes(query) ||
-          item.brand?.toLowerCase().includes(query) ||
-          item.category?.toLowerCase().includes(query)
-      );
-    }
-
-    // Category filter
-    if (filters.categories.length > 0) {
-      filtered = filtered.filter((item) =>
-        filters.categories.includes(item.category)
-      );
-    }
-
-    // Location filter
-    if (filters.locations && filters.locations.length > 0) {
-      filtered = filtered.filter((item) =>
-        item.location && filters.locations.includes(item.location)
-      );
-    }
-
-    // Condition filter
-    if (filters.conditions.length > 0) {
-      filtered = filtered.filter((item) =>
-        filters.conditions.includes(item.condition)
-      );
-    }
-
-    // Credits range filter (since all items are 1 credit now, this is less useful but kept for compatibility)
-    if (filters.minCredits !== null) {
-      filtered = filtered.filter((item) => item.credits >= filters.minCredits);
-    }
-    if (filters.maxCredits !== null) {
-      filtered = filtered.filter((item) => item.credits <= filters.maxCredits);
-    }
-
-    // Availability filter (available | unavailable | pending)
-    if (filters.availability && filters.availability !== 'all') {
-      if (filters.availability === 'unavailable') {
-        filtered = filtered.filter((item) => item.status === 'unavailable');
-      } else if (filters.availability === 'available') {
-        filtered = filtered.filter((item) => item.status === 'available');
-      } else if (filters.availability === 'pending') {
-        filtered = filtered.filter((item) => item.status === 'pending');
-      }
-    }
-
-    // Sort
-    switch (sortBy) {
-      case 'newest':
-        // Sort by ID (newer items typically have higher IDs)
-        // If items have created_at, we could sort by that instead
-        filtered.sort((a, b) => {
-          // Try to sort by ID (assuming newer items have higher IDs)
-          // If IDs are not sortable, maintain current order
-          if (a.id && b.id) {
-            // Compare as strings if they're not numeric
-            return b.id.localeCompare(a.id);
-          }
-          return 0;
-        });
-        break;
-      case 'oldest':
-        // Sort by ID (older items typically have lower IDs)
-        filtered.sort((a, b) => {
-          if (a.id && b.id) {
-            return a.id.localeCompare(b.id);
-          }
-          return 0;
-        });
-        break;
-      case 'title-asc':
-        filtered.sort((a, b) => a.title.localeCompare(b.title));
-        break;
-      case 'title-desc':
-        filtered.sort((a, b) => b.title.localeCompare(a.title));
-        break;
-      default:
-        break;
-    }
-
-    return filtered;
-  }, [searchQuery, filters, sortBy, listings]);
+  }, [listings, user]);
 
   const handleFilterChange = (newFilters) => {
     setFilters(newFilters);
@@ -323,14 +285,27 @@ export default function BrowsePage() {
               <>
                 <div className="mb-4 flex items-center justify-between">
                   <p className="text-swapcircle-secondary text-sm">
-                    Showing {filteredListings.length} of {listings.length} items
+                    Showing {filteredListings.length} items
                   </p>
                 </div>
                 {filteredListings.length > 0 ? (
-                  <ListingsGrid
-                    title=""
-                    listings={filteredListings}
-                  />
+                  <>
+                    <ListingsGrid
+                      title=""
+                      listings={filteredListings}
+                    />
+                    {nextCursor && (
+                      <div className="text-center mt-8">
+                        <button
+                          onClick={loadMore}
+                          disabled={loadingMore}
+                          className="btn-secondary"
+                        >
+                          {loadingMore ? 'Loading...' : 'Load more'}
+                        </button>
+                      </div>
+                    )}
+                  </>
                 ) : (
               <div className="text-center py-16">
                 <svg
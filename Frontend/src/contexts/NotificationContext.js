@@ -11,6 +11,8 @@ export function NotificationProvider({ children }) {
   const [notifications, setNotifications] = useState([]);
   const [unreadCount, setUnreadCount] = useState(0);
   const pollingIntervalRef = useRef(null);
+  const eventSourceRef = useRef(null);
+  const syncCursorRef = useRef(null);
   const shownToastIds = useRef(new Set()); // For preventing duplicate toast notifications
 
   // Helper to format notification message
@@ -23,6 +25,35 @@ export function NotificationProvider({ children }) {
   };
 
   useEffect(() => {
+    // Show a toast for each unread notification not shown yet
+    const showToasts = (items) => {
+      if (!window.__notificationContainer || !items) return;
+      const newUnreadNotifications = items.filter(
+        (n) => !n.read && !shownToastIds.current.has(n.id)
+      );
+
+      newUnreadNotifications.forEach((notification) => {
+        shownToastIds.current.add(notification.id);
+        const { message, type } = formatNotification(notification);
+
+        // Show the toast
+        setTimeout(() => {
+          window.__notificationContainer.addNotification({
+            type,
+            message,
+            duration: 5000,
+          });
+        }, 0);
+
+        // Mark as read immediately after showing to prevent re-showing
+        setTimeout(() => {
+          notificationsAPI.markAsRead(notification.id).catch(err => {
+            console.error('Error marking notification as read:', err);
+          });
+        }, 1000);
+      });
+    };
+
     // Load notifications from backend
     const loadNotifications = async () => {
       if (!isAuthenticated || !user) return;
@@ -35,65 +66,80 @@ export function NotificationProvider({ children }) {
 
         setNotifications(notificationsData || []);
         setUnreadCount(unreadData?.count || 0);
-
-        // Show toast notifications for new unread notifications
-        if (window.__notificationContainer && notificationsData) {
-          const newUnreadNotifications = notificationsData.filter(
-            (n) => !n.read && !shownToastIds.current.has(n.id)
-          );
-
-          newUnreadNotifications.forEach((notification) => {
-            shownToastIds.current.add(notification.id);
-            const { message, type } = formatNotification(notification);
-            
-            // Show the toast
-            setTimeout(() => {
-              window.__notificationContainer.addNotification({
-                type,
-                message,
-                duration: 5000,
-              });
-            }, 0);
-            
-            // Mark as read immediately after showing to prevent re-showing
-            setTimeout(() => {
-              notificationsAPI.markAsRead(notification.id).catch(err => {
-                console.error('Error marking notification as read:', err);
-              });
-            }, 1000);
-          });
-        }
+        showToasts(notificationsData);
       } catch (error) {
         console.error('Error loading notifications:', error);
       }
     };
 
+    const stopUpdates = () => {
+      if (pollingIntervalRef.current) {
+        clearInterval(pollingIntervalRef.current);
+        pollingIntervalRef.current = null;
+      }
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close();
+        eventSourceRef.current = null;
+      }
+    };
+
     // Don't poll if still loading auth state or not authenticated
     if (loading || !isAuthenticated || !user) {
       if (!isAuthenticated) {
         setNotifications([]);
         setUnreadCount(0);
         shownToastIds.current.clear();
+        syncCursorRef.current = null;
       }
-      if (pollingIntervalRef.current) {
-        clearInterval(pollingIntervalRef.current);
-        pollingIntervalRef.current = null;
-      }
+      stopUpdates();
       return;
     }
 
     // Load notifications immediately
     loadNotifications();
 
-    // Poll every 5 seconds
-    pollingIntervalRef.current = setInterval(loadNotifications, 5000);
+    if (typeof window !== 'undefined' && typeof window.EventSource !== 'undefined') {
+      // Server pushes new notifications and unread-count changes.
+      // EventSource reconnects on its own and resumes from the last event ID.
+      const source = new window.EventSource(notificationsAPI.streamUrl());
+      source.addEventListener('notification', (event) => {
+        const { notification } = JSON.parse(event.data);
+        setNotifications((prev) =>
+          prev.some((n) => n.id === notification.id) ? prev : [notification, ...prev]
+        );
+        showToasts([notification]);
+      });
+      source.addEventListener('unread_count', (event) => {
+        setUnreadCount(JSON.parse(event.data).unread_count || 0);
+      });
+      eventSourceRef.current = source;
+    } else {
+      // Where streaming is unavailable, poll every 5 seconds for changes only
+      const syncNotifications = async () => {
+        try {
+          const data = await notificationsAPI.sync(syncCursorRef.current);
+          const changed = data?.notifications || [];
+          if (changed.length) {
+            setNotifications((prev) => {
+              const byId = new Map(changed.map((n) => [n.id, n]));
+              const updated = prev.map((n) => byId.get(n.id) || n);
+              const added = changed.filter((n) => !prev.some((p) => p.id === n.id));
+              return [...added, ...updated].sort((a, b) =>
+                (b.created_at || '').localeCompare(a.created_at || '')
+              );
+            });
+            showToasts(changed);
+          }
+          setUnreadCount(data?.unread_count || 0);
+          syncCursorRef.current = data?.cursor || syncCursorRef.current;
+        } catch (error) {
+          console.error('Error syncing notifications:', error);
+        }
+      };
+      pollingIntervalRef.current = setInterval(syncNotifications, 5000);
+    }
 
-    return () => {
-      if (pollingIntervalRef.current) {
-        clearInterval(pollingIntervalRef.current);
-        pollingIntervalRef.current = null;
-      }
-    };
+    return stopUpdates;
   }, [isAuthenticated, loading, user]);
 
   const markAsRead = async (notificationId) => {
@@ -2,6 +2,24 @@ import { useEffect, useMemo, useState } from 'react';
 import { itemsAPI, userAPI } from '@/services/api';
 import { getItemMetadata, getImageUrl } from '@/utils/itemParser';
 
+const toProfileListing = (item) => {
+  const metadata = getItemMetadata(item);
+  const firstImage = item.images && item.images.length > 0 ? item.images[0] : null;
+  const imageUrl = firstImage ? getImageUrl(firstImage) : '/api/placeholder/300';
+
+  return {
+    id: item.id,
+    title: item.title,
+    size: metadata.size || 'Size M',
+    credits: metadata.credits || 2,
+    condition: metadata.condition || 'Good',
+    timestamp: 'Recently',
+    image: imageUrl,
+    status: item.status || 'available',
+    showSwappedStatus: true,
+  };
+};
+
 // Handles fetching core profile data (user info, listings, swap history, rating stats)
 // to keep data concerns out of the Profile component.
 export function useProfileData(usernameProp, isAuthenticated, authUser) {
@@ -21,8 +39,11 @@ export function useProfileData(usernameProp, isAuthenticated, authUser) {
         setError(null);
 
         let userData;
+        let profile = null;
         if (usernameProp) {
-          userData = await userAPI.getUserByUsername(usernameProp);
+          // One request for the user, their listings and counts
+          profile = await userAPI.getPublicProfile(usernameProp);
+          userData = profile.user;
         } else if (isAuthenticated && authUser) {
           userData = await userAPI.getUser(authUser.id);
         } else {
@@ -54,25 +75,16 @@ export function useProfileData(usernameProp, isAuthenticated, authUser) {
           total_ratings: userData.total_ratings || 0,
         });
 
+        if (profile) {
+          const listed = Object.values(profile.item_counts || {}).reduce((sum, count) => sum + count, 0);
+          setListings((profile.listings || []).map(toProfileListing));
+          setUser((prev) => (prev ? { ...prev, listed, swapped: profile.swap_count || 0 } : null));
+          return;
+        }
+
         // Fetch user's items
         const userItems = await itemsAPI.getItems({ owner_id: userData.id });
-        const transformedListings = userItems.map((item) => {
-          const metadata = getItemMetadata(item);
-          const firstImage = item.images && item.images.length > 0 ? item.images[0] : null;
-          const imageUrl = firstImage ? getImageUrl(firstImage) : '/api/placeholder/300';
-
-          return {
-            id: item.id,
-            title: item.title,
-            size: metadata.size || 'Size M',
-            credits: metadata.credits || 2,
-            condition: metadata.condition || 'Good',
-            timestamp: 'Recently',
-            image: imageUrl,
-            status: item.status || 'available',
-            showSwappedStatus: true,
-          };
-        });
+        const transformedListings = userItems.map(toProfileListing);
         setListings(transformedListings);
 
         // Swap history only for own profile
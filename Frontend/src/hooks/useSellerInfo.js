@@ -27,7 +27,8 @@ export function useSellerInfo(ownerId) {
         });
 
         try {
-          const stats = await ratingAPI.getRatingStats(ownerId);
+          // Batched with the other sellers shown on the page
+          const stats = await ratingAPI.loadRatingStats(ownerId);
           setSellerRatingStats({
             average_rating: stats.average_rating,
             total_ratings: stats.total_ratings || 0,
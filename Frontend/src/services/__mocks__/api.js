@@ -31,6 +31,7 @@ const itemAPI = {
 
 const itemsAPI = {
   getItems: jest.fn(async () => []),
+  browseItems: jest.fn(async () => ({ items: [], next_cursor: null, has_more: false })),
 }
 
 module.exports = {
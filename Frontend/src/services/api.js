@@ -302,6 +302,13 @@ export const userAPI = {
     return apiRequest(`/users/username/${username}`);
   },
 
+  /**
+   * Get a user's public profile (user, listings, rating stats and counts) in one request
+   */
+  async getPublicProfile(username) {
+    return apiRequest(`/users/username/${username}/profile`);
+  },
+
   /**
    * Update user profile
    */
@@ -388,10 +395,25 @@ export const reportAPI = {
  */
 export const itemsAPI = {
   /**
-   * Get all items
+   * Get all items (legacy unpaginated list)
    */
   async getItems(filters = {}) {
-    const queryParams = new URLSearchParams(filters).toString();
+    const queryParams = new URLSearchParams({ ...filters, paginate: 'false' }).toString();
+    return apiRequest(`/items?${queryParams}`);
+  },
+
+  /**
+   * Get one page of items filtered and sorted on the server.
+   * Returns { items, next_cursor, has_more }; pass next_cursor back as `cursor`
+   * to fetch the following page.
+   */
+  async browseItems(params = {}) {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value === null || value === undefined || value === '') return;
+      query.set(key, Array.isArray(value) ? value.join(',') : value);
+    });
+    const queryParams = query.toString();
     return apiRequest(`/items${queryParams ? `?${queryParams}` : ''}`);
   },
 
@@ -734,6 +756,40 @@ export const notificationsAPI = {
     });
   },
 
+  /**
+   * Get notifications changed since a sync cursor plus the unread count
+   */
+  async sync(since = null) {
+    const params = new URLSearchParams();
+    if (since) params.append('since', since);
+    return apiRequest(`/notifications/sync?${params.toString()}`, {
+      method: 'GET',
+    });
+  },
+
+  /**
+   * Get a page of older, archived notifications (newest first)
+   */
+  async getArchived(cursor = null, limit = 50) {
+    const params = new URLSearchParams();
+    params.append('limit', limit.toString());
+    if (cursor) params.append('cursor', cursor);
+    return apiRequest(`/notifications/archive?${params.toString()}`, {
+      method: 'GET',
+    });
+  },
+
+  /**
+   * URL of the Server-Sent Events stream pushing new notifications.
+   * EventSource cannot send headers, so the token goes in the query string.
+   */
+  streamUrl() {
+    const token = typeof window !== 'undefined' ? localStorage.getItem('token') : null;
+    const params = new URLSearchParams();
+    if (token) params.append('token', token);
+    return `${API_BASE_URL}/notifications/stream?${params.toString()}`;
+  },
+
   /**
    * Get count of unread notifications
    */
@@ -771,6 +827,28 @@ export const notificationsAPI = {
   },
 };
 
+// Maximum user IDs per POST /ratings/stats:batch (matches the backend limit)
+const RATING_STATS_BATCH_LIMIT = 300;
+
+// Rating stats requested in the current tick, keyed by user ID
+let pendingRatingStats = null;
+
+function flushRatingStats() {
+  const pending = pendingRatingStats;
+  pendingRatingStats = null;
+  const userIds = [...pending.keys()];
+  for (let i = 0; i < userIds.length; i += RATING_STATS_BATCH_LIMIT) {
+    const chunk = userIds.slice(i, i + RATING_STATS_BATCH_LIMIT);
+    ratingAPI.getRatingStatsBatch(chunk)
+      .then(({ stats }) => {
+        chunk.forEach((id) => pending.get(id).forEach(({ resolve }) => resolve(stats[id])));
+      })
+      .catch((err) => {
+        chunk.forEach((id) => pending.get(id).forEach(({ reject }) => reject(err)));
+      });
+  }
+}
+
 /**
  * Ratings API
  */
@@ -802,6 +880,31 @@ export const ratingAPI = {
       method: 'GET',
     });
   },
+
+  /**
+   * Get rating statistics for many users in one request (public)
+   */
+  async getRatingStatsBatch(userIds) {
+    return apiRequest('/ratings/stats:batch', {
+      method: 'POST',
+      body: { user_ids: userIds },
+    });
+  },
+
+  /**
+   * Get one user's rating statistics. Calls made in the same tick (e.g. by
+   * every card on a listing page) are combined into one batch request.
+   */
+  loadRatingStats(ratedUserId) {
+    return new Promise((resolve, reject) => {
+      if (!pendingRatingStats) {
+        pendingRatingStats = new Map();
+        setTimeout(flushRatingStats, 0);
+      }
+      if (!pendingRatingStats.has(ratedUserId)) pendingRatingStats.set(ratedUserId, []);
+      pendingRatingStats.get(ratedUserId).push({ resolve, reject });
+    });
+  },
 };
 
 export default apiRequest;
\ No newline at end of file
@@ -1,4 +1,4 @@
-import { apiRequest } from './api'
+import { apiRequest, ratingAPI } from './api'
 
 describe('apiRequest', () => {
   beforeEach(() => {
@@ -38,3 +38,37 @@ describe('apiRequest', () => {
     await expect(apiRequest('/x')).rejects.toThrow(/Cannot connect to backend/)
   })
 })
+
+describe('ratingAPI.loadRatingStats', () => {
+  beforeEach(() => {
+    jest.clearAllMocks()
+    localStorage.clear()
+  })
+
+  test('combines calls made in the same tick into one batch request', async () => {
+    global.fetch = jest.fn().mockResolvedValueOnce({
+      ok: true,
+      headers: { get: () => 'application/json' },
+      json: async () => ({
+        stats: {
+          u1: { average_rating: 4.5, total_ratings: 2 },
+          u2: { average_rating: 0, total_ratings: 0 },
+        },
+      }),
+    })
+
+    const [first, second, again] = await Promise.all([
+      ratingAPI.loadRatingStats('u1'),
+      ratingAPI.loadRatingStats('u2'),
+      ratingAPI.loadRatingStats('u1'),
+    ])
+
+    expect(global.fetch).toHaveBeenCalledTimes(1)
+    const [url, options] = global.fetch.mock.calls[0]
+    expect(url).toMatch(/\/ratings\/stats:batch$/)
+    expect(JSON.parse(options.body)).toEqual({ user_ids: ['u1', 'u2'] })
+    expect(first.average_rating).toBe(4.5)
+    expect(second.total_ratings).toBe(0)
+    expect(again).toBe(first)
+  })
+})